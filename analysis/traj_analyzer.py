@@ -1,6 +1,31 @@
+import logging as log
+from collections import namedtuple
 import numpy as np
 from dynamics.wind_models import wind_model, ddt_wind_model, get_wind_vector
-from plot.plot import *
+
+EnergyAnalysis = namedtuple(
+    "EnergyAnalysis",
+    [
+        "times",
+        "v",
+        "E_tot",
+        "E_kin",
+        "E_pot",
+        "P_tot",
+        "P_dissipated",
+        "P_gained",
+        "S_dyn_active",
+        "S_dyn_passive",
+        "E_dissipated",
+        "E_dyn_active",
+        "E_dyn_passive",
+        # Integrated over the whole trajectory, except total_E_dyn_passive
+        # which stops before the invalid finite differences at the end
+        "total_E_dissipated",
+        "total_E_dyn_active",
+        "total_E_dyn_passive",
+    ],
+)
 
 
 def _calc_abs_vel(h, v_r, w):
@@ -24,62 +49,67 @@ def _calc_ddt_winds(h, h_dot):
     return ddt_w
 
 
-def _generate_finite_diff_matrix_third_order(N, dt):
-    D = (
-        -11 / 6 * np.diag(np.ones(N), 0)
-        + 3 * np.diag(np.ones((N - 1)), 1)
-        - 3 / 2 * np.diag(np.ones((N - 2)), 2)
-        + 1 / 3 * np.diag(np.ones((N - 3)), 3)
+# Values at the end of a finite difference that use the truncated stencil
+N_INVALID_FINITE_DIFF = 3
+
+
+def _calc_finite_diff_third_order(graph, dt):
+    # Third order forward finite differences, applied as a stencil.
+    # The last three values use the truncated stencil, as if the
+    # graph was zero after the end
+    N = graph.shape[0]
+    padded = np.concatenate((graph, np.zeros(3)))
+    ddt_graph = (
+        -11 / 6 * padded[0:N]
+        + 3 * padded[1 : N + 1]
+        - 3 / 2 * padded[2 : N + 2]
+        + 1 / 3 * padded[3 : N + 3]
     ) / dt
-    return D
+    return ddt_graph
+
+
+def _calc_row_dot(a, b):
+    # Row wise dot products, without forming a N x N matrix
+    return np.einsum("ij,ij->i", a, b)
 
 
 def _calc_energy(h, v, m, g):
-    N = h.shape[0]
-    v_squared = np.diag(v.dot(v.T))
+    v_squared = _calc_row_dot(v, v)
     E_kin = 0.5 * m * v_squared
     E_pot = m * g * h
     return E_kin, E_pot
 
 
 def _calc_drag_param(v_r, c, c_Dp, A, AR):
-    v_r_norm = np.sqrt(np.diag(v_r.dot(v_r.T)))
-    c_squared = np.diag(c.dot(c.T))
+    v_r_norm = np.sqrt(_calc_row_dot(v_r, v_r))
+    c_squared = _calc_row_dot(c, c)
     d = 0.5 * A * v_r_norm * c_Dp + (2 * c_squared) / (np.pi * AR * A * v_r_norm)
     return d
 
 
 def _calc_dissipation_power(v_r, d, rho):
-    v_r_squared = np.diag(v_r.dot(v_r.T))
+    v_r_squared = _calc_row_dot(v_r, v_r)
     P_dissipated = -rho * d * v_r_squared
     return P_dissipated
 
 
-def _calc_gained_power(v, w, ddt_w, D, m):
-    v_T_w = np.diag(v.dot(w.T))
-    S_dyn_passive = m * D.dot(v_T_w)
-    S_dyn_active = -m * np.diag(v.dot(ddt_w.T))
+def _calc_gained_power(v, w, ddt_w, dt, m):
+    v_T_w = _calc_row_dot(v, w)
+    S_dyn_passive = m * _calc_finite_diff_third_order(v_T_w, dt)
+    S_dyn_active = -m * _calc_row_dot(v, ddt_w)
 
     return S_dyn_passive, S_dyn_active
 
 
 def _calc_integral(graph, dt):
-    N = graph.shape[0]
-    Riemann_matrix = np.tril(np.ones(N)) * dt
-    integral = Riemann_matrix.dot(graph)  # Use Riemann sums to calculate integral
+    integral = np.cumsum(graph) * dt  # Use Riemann sums to calculate integral
     return integral
 
 
 # Written to work with NED frame
-def do_energy_analysis(times, x_traj, u_traj, phys_params):
-    print("### Running energy analysis")
-
+def calc_energy_analysis(times, x_traj, u_traj, phys_params):
     (m, c_Dp, A, b, rho, g, AR) = phys_params
     dt = times[1] - times[0]
-    N = x_traj.shape[0]
-
-    # Derivative matrix
-    D = _generate_finite_diff_matrix_third_order(N, dt)
 
     # Generate all needed trajectories
     h = -x_traj[:, 2]
@@ -97,9 +127,9 @@ def do_energy_analysis(times, x_traj, u_traj, phys_params):
     E_tot = E_kin + E_pot
 
     # Calculate powers
-    P_tot = D.dot(E_tot)
+    P_tot = _calc_finite_diff_third_order(E_tot, dt)
     P_dissipated = _calc_dissipation_power(v_r, d, rho)
-    S_dyn_passive, S_dyn_active = _calc_gained_power(v, w, ddt_w, D, m)
+    S_dyn_passive, S_dyn_active = _calc_gained_power(v, w, ddt_w, dt, m)
     P_gained = S_dyn_passive + S_dyn_active
 
     # Integrate powers to look at energy
@@ -107,72 +137,111 @@ def do_energy_analysis(times, x_traj, u_traj, phys_params):
     E_dyn_active = _calc_integral(S_dyn_active, dt)
     E_dyn_passive = _calc_integral(S_dyn_passive, dt)
 
-    # TODO should these be moved somewhere else?
-    # PLOTTING
-    plot_energies(times, E_tot, E_kin, E_pot)
-    # plot_powers(times[:-3], P_tot[:-3], P_dissipated[:-3], P_gained[:-3])
+    # NOTE the last three values of the finite differences are not valid.
+    # S_dyn_passive is the only integrated power from finite differences,
+    # so only its total stops at the last valid value.
+    return EnergyAnalysis(
+        times=times,
+        v=v,
+        E_tot=E_tot,
+        E_kin=E_kin,
+        E_pot=E_pot,
+        P_tot=P_tot,
+        P_dissipated=P_dissipated,
+        P_gained=P_gained,
+        S_dyn_active=S_dyn_active,
+        S_dyn_passive=S_dyn_passive,
+        E_dissipated=E_dissipated,
+        E_dyn_active=E_dyn_active,
+        E_dyn_passive=E_dyn_passive,
+        total_E_dissipated=E_dissipated[-1],
+        total_E_dyn_active=E_dyn_active[-1],
+        total_E_dyn_passive=E_dyn_passive[-N_INVALID_FINITE_DIFF - 1],
+    )
+
+
+def plot_energy_analysis(energy_analysis):
+    # Only import plotting when it is needed
+    from plot.plot import plot_energies, plot_power_terms
+
+    e = energy_analysis
+    plot_energies(e.times, e.E_tot, e.E_kin, e.E_pot)
+    # plot_powers(e.times[:-3], e.P_tot[:-3], e.P_dissipated[:-3], e.P_gained[:-3])
     plot_power_terms(
-        times[:-3],
-        P_dissipated[:-3],
-        S_dyn_active[:-3],
-        S_dyn_passive[:-3],
-        E_dissipated[:-3],
-        E_dyn_active[:-3],
-        E_dyn_passive[:-3],
+        e.times[:-3],
+        e.P_dissipated[:-3],
+        e.S_dyn_active[:-3],
+        e.S_dyn_passive[:-3],
+        e.E_dissipated[:-3],
+        e.E_dyn_active[:-3],
+        e.E_dyn_passive[:-3],
     )
+    return
 
-    return E_dyn_active - E_dissipated, v
+
+def do_energy_analysis(times, x_traj, u_traj, phys_params, plot=True):
+    log.info(" ### Running energy analysis")
+
+    energy_analysis = calc_energy_analysis(times, x_traj, u_traj, phys_params)
+    if plot:
+        plot_energy_analysis(energy_analysis)
+
+    return (
+        energy_analysis.E_dyn_active - energy_analysis.E_dissipated,
+        energy_analysis.v,
+    )
+
+
+def convert_traj_to_NED(x_knots_ENU, u_knots_ENU):
+    x_knots_NED = np.zeros(x_knots_ENU.shape)
+    u_knots_NED = np.zeros(u_knots_ENU.shape)
+
+    x_knots_NED[:, 0] = x_knots_ENU[:, 1]
+    x_knots_NED[:, 1] = x_knots_ENU[:, 0]
+    x_knots_NED[:, 2] = -x_knots_ENU[:, 2]
+    x_knots_NED[:, 3] = x_knots_ENU[:, 4]
+    x_knots_NED[:, 4] = x_knots_ENU[:, 3]
+    x_knots_NED[:, 5] = -x_knots_ENU[:, 5]
+
+    u_knots_NED[:, 0] = u_knots_ENU[:, 1]
+    u_knots_NED[:, 1] = u_knots_ENU[:, 0]
+    u_knots_NED[:, 2] = -u_knots_ENU[:, 2]
+    return x_knots_NED, u_knots_NED
 
 
 def calc_phys_values_from_traj(
     zhukovskii_glider, phys_params, x_knots_NED, u_knots_NED
 ):
     (m, c_Dp, A, b, rho, g, AR) = phys_params
-    c_knots = u_knots_NED  # Circulation
-
-    # Calculate bank angle
-    phi_knots = np.zeros((x_knots_NED.shape[0], 1))
-    for k in range(x_knots_NED.shape[0]):
-        v_r = x_knots_NED[k, 3:6]
-        c = u_knots_NED[k, :]
-        phi = zhukovskii_glider.calc_bank_angle(v_r, c)
-        phi_knots[k] = phi
+    # All knots are calculated at once, sharing the norms between channels
+    h = -x_knots_NED[:, 2]
+    v_r = x_knots_NED[:, 3:6]
+    c = u_knots_NED  # Circulation
+    v_r_norm = np.linalg.norm(v_r, axis=1)
+    c_norm = np.linalg.norm(c, axis=1)
 
     # Calculate relative flight path angle
-    gamma_knots = np.zeros((x_knots_NED.shape[0], 1))
-    for k in range(x_knots_NED.shape[0]):
-        v_r = x_knots_NED[k, 3:6]
-        gamma = zhukovskii_glider.calc_rel_flight_path_angle(v_r)
-        gamma_knots[k] = gamma
+    gamma = zhukovskii_glider.calc_rel_flight_path_angle(v_r, v_r_norm=v_r_norm)
+
+    # Calculate bank angle
+    phi = zhukovskii_glider.calc_bank_angle(v_r, c, gamma=gamma, c_norm=c_norm)
 
     # Calculate heading angle
-    psi_knots = np.zeros((x_knots_NED.shape[0], 1))
-    for k in range(x_knots_NED.shape[0]):
-        h = -x_knots_NED[k, 2]
-        v_r = x_knots_NED[k, 3:6]
-        psi = zhukovskii_glider.calc_heading(h, v_r)
-        psi_knots[k] = psi
+    psi = zhukovskii_glider.calc_heading(h, v_r)
 
     # Calculate lift coeff
-    c_l_knots = np.zeros((x_knots_NED.shape[0], 1))
-    for k in range(x_knots_NED.shape[0]):
-        v_r = x_knots_NED[k, 3:6]
-        c = u_knots_NED[k, :]
-        c_l = zhukovskii_glider.calc_lift_coeff(v_r, c, A)
-        c_l_knots[k] = c_l
+    c_l = zhukovskii_glider.calc_lift_coeff(v_r, c, A, v_r_norm=v_r_norm, c_norm=c_norm)
 
     # Calculate load factor
-    n_knots = np.zeros((x_knots_NED.shape[0], 1))
-    for k in range(x_knots_NED.shape[0]):
-        v_r = x_knots_NED[k, 3:6]
-        c = u_knots_NED[k, :]
-        n = zhukovskii_glider.calc_load_factor(v_r, c, m, g, rho)
-        n_knots[k] = n
+    n = zhukovskii_glider.calc_load_factor(
+        v_r, c, m, g, rho, v_r_norm=v_r_norm, c_norm=c_norm
+    )
 
+    # One column per channel
     return (
-        phi_knots,
-        gamma_knots,
-        psi_knots,
-        c_l_knots,
-        n_knots,
+        phi.reshape((-1, 1)),
+        gamma.reshape((-1, 1)),
+        psi.reshape((-1, 1)),
+        c_l.reshape((-1, 1)),
+        n.reshape((-1, 1)),
     )
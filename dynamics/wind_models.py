@@ -40,20 +40,37 @@ def ddt_exp_wind_model(z, z_dot):
 
 
 def log_wind_model(z):
-    # Check for type for plotting. NOTE will fail if plotter has z<h_0
-    if (not type(z) == type(np.array(1))) and z < h_0:
+    if type(z) == type(np.array(1)):
+        # NOTE zero wind below ground, log(1) = 0
+        return w_ref * (np.log(np.maximum(z, h_0) / h_0)) / (np.log(h_ref / h_0))
+    if z < h_0:
         return 0  # NOTE zero wind below ground
     w = w_ref * (np.log(z / h_0)) / (np.log(h_ref / h_0))
     return w
 
 
 def ddz_log_wind_model(z):
+    if type(z) == type(np.array(1)):
+        z_above_ground = np.maximum(z, h_0)
+        dw_dz = w_ref / (np.log(h_ref / h_0) * z_above_ground)
+        return np.where(z < h_0, 0, dw_dz)  # NOTE zero wind below ground
+    if z < h_0:
+        return 0  # NOTE zero wind below ground
     dw_dz = w_ref / (np.log(h_ref / h_0) * z)
-    if (not type(z) == type(np.array(1))) and z < h_0:
-        dw_dz = 0  # NOTE zero wind below ground
     return dw_dz
 
 
+def d2dz2_log_wind_model(z):
+    if type(z) == type(np.array(1)):
+        z_above_ground = np.maximum(z, h_0)
+        d2w_dz2 = -w_ref / (np.log(h_ref / h_0) * z_above_ground ** 2)
+        return np.where(z < h_0, 0, d2w_dz2)  # NOTE zero wind below ground
+    if z < h_0:
+        return 0  # NOTE zero wind below ground
+    d2w_dz2 = -w_ref / (np.log(h_ref / h_0) * z ** 2)
+    return d2w_dz2
+
+
 def ddt_log_wind_model(z, z_dot):
     dw_dz = ddz_log_wind_model(z)
     dw_dt = dw_dz * z_dot
@@ -79,6 +96,17 @@ def ddz_logistic_wind_model(z):
     return dw_dz
 
 
+def d2dz2_logistic_wind_model(z):
+    delta = 3  # wind_shear_layer thickness
+    d2w_dz2 = (
+        w_freestream
+        * np.exp(-z / delta)
+        * (np.exp(-z / delta) - 1)
+        / (delta ** 2 * (1 + np.exp(-z / delta)) ** 3)
+    )
+    return d2w_dz2
+
+
 def ddt_logistic_wind_model(z, z_dot):
     dw_dz = ddz_logistic_wind_model(z)
     w_dot = dw_dz * z_dot
@@ -103,8 +131,32 @@ def get_wind_jacobian(z):
 
 wind_model = log_wind_model
 ddz_wind_model = ddz_log_wind_model
+d2dz2_wind_model = d2dz2_log_wind_model
 ddt_wind_model = ddt_log_wind_model
 
+
+def get_wind_params():
+    # Everything that defines the active wind field
+    return (wind_model.__name__, w_ref, w_freestream, h_ref, h_0, alpha)
+
+
+DEFAULT_WIND_PARAMS = {"w_ref": w_ref, "h_ref": h_ref, "h_0": h_0, "alpha": alpha}
+
+
+def set_wind_params(**wind_params):
+    # Changes the wind field for all wind models, e.g. set_wind_params(w_ref=10)
+    global w_ref, w_freestream, h_ref, h_0, alpha
+    for name in wind_params:
+        if name not in ("w_ref", "h_ref", "h_0", "alpha"):
+            raise ValueError("Unknown wind parameter: {0}".format(name))
+    w_ref = wind_params.get("w_ref", w_ref)
+    w_freestream = w_ref
+    h_ref = wind_params.get("h_ref", h_ref)
+    h_0 = wind_params.get("h_0", h_0)
+    alpha = wind_params.get("alpha", alpha)
+    return
+
+
 # PLOTTING FUNCTIONs
 
 # Assume wind blows from north to south, i.e. along negative y axis
@@ -1,3 +1,4 @@
+import weakref
 import numpy as np
 from pydrake.all import (
     eq,
@@ -9,6 +10,12 @@ from pydrake.all import (
     TemplateSystem,
     LeafSystem_,
 )
+from pydrake.autodiffutils import (
+    AutoDiffXd,
+    ExtractValue,
+    ExtractGradient,
+    InitializeAutoDiff,
+)
 from math import sqrt
 
 from dynamics.wind_models import (
@@ -16,8 +23,13 @@ from dynamics.wind_models import (
     ddt_wind_model,
     get_wind_vector,
     get_wind_jacobian,
+    ddz_wind_model,
+    d2dz2_wind_model,
 )
 
+# NOTE increase when the dynamics change, this invalidates all cached solutions
+DYNAMICS_VERSION = 1
+
 
 class RelativeZhukovskiiGlider:
     def __init__(
@@ -112,33 +124,43 @@ class RelativeZhukovskiiGlider:
         return v
 
     # NOTE This is meant to be used for dimensionalized inputs and outputs
+    # NOTE The calc functions below accept single vectors of shape (3,) or
+    # whole trajectories of shape (N, 3). Norms that are already calculated
+    # can be passed in to avoid recalculating them.
     def calc_heading(self, h, v_r):
         # Assumes psi meaured from x-axis in NED frame (i.e. heading is measured from the north)
-        psi = np.arctan2(v_r[1], v_r[0])
+        psi = np.arctan2(v_r[..., 1], v_r[..., 0])
         return psi
 
-    def calc_rel_flight_path_angle(self, v_r):
-        v_r_norm = np.linalg.norm(v_r)
-        gamma = np.arcsin(-v_r[2] / v_r_norm)  # Relative flight path angle
+    def calc_rel_flight_path_angle(self, v_r, v_r_norm=None):
+        if v_r_norm is None:
+            v_r_norm = np.linalg.norm(v_r, axis=-1)
+        gamma = np.arcsin(-v_r[..., 2] / v_r_norm)  # Relative flight path angle
         return gamma
 
-    def calc_bank_angle(self, v_r, c):
-        gamma = self.calc_rel_flight_path_angle(v_r)
-        c_norm = np.linalg.norm(c)
+    def calc_bank_angle(self, v_r, c, gamma=None, c_norm=None):
+        if gamma is None:
+            gamma = self.calc_rel_flight_path_angle(v_r)
+        if c_norm is None:
+            c_norm = np.linalg.norm(c, axis=-1)
 
-        phi = np.arcsin(c[2] / (c_norm) * np.cos(gamma))
+        phi = np.arcsin(c[..., 2] / (c_norm) * np.cos(gamma))
         return phi
 
-    def calc_lift_coeff(self, v_r, c, A):
-        c_norm = np.linalg.norm(c)
-        v_r_norm = np.linalg.norm(v_r)
+    def calc_lift_coeff(self, v_r, c, A, v_r_norm=None, c_norm=None):
+        if c_norm is None:
+            c_norm = np.linalg.norm(c, axis=-1)
+        if v_r_norm is None:
+            v_r_norm = np.linalg.norm(v_r, axis=-1)
 
         c_l = c_norm / (0.5 * A * v_r_norm)
         return c_l
 
-    def calc_load_factor(self, v_r, c, m, g, rho):
-        c_norm = np.linalg.norm(c)
-        v_r_norm = np.linalg.norm(v_r)
+    def calc_load_factor(self, v_r, c, m, g, rho, v_r_norm=None, c_norm=None):
+        if c_norm is None:
+            c_norm = np.linalg.norm(c, axis=-1)
+        if v_r_norm is None:
+            v_r_norm = np.linalg.norm(v_r, axis=-1)
         lift = rho * c_norm * v_r_norm
         weight = m * g
 
@@ -153,6 +175,9 @@ class RelativeZhukovskiiGlider:
             self.C,
         )
 
+    def get_phys_params(self):
+        return (self.m, self.c_Dp, self.A, self.b, self.rho, self.g, self.AR)
+
     def get_wing_area(self):
         return self.A
 
@@ -185,8 +210,15 @@ class RelativeZhukovskiiGlider:
 
         return constraints_dimless
 
-    def create_drake_plant(self):
-        return DrakeSysWrapper(3, self.continuous_dynamics_dimless)
+    def create_drake_plant(self, keep_glider_alive=True):
+        dynamics = self.continuous_dynamics_dimless
+        dynamics_jacobian = self.continuous_dynamics_jacobian_dimless
+        if not keep_glider_alive:
+            # The plant only holds weak references to the glider, so that
+            # programs cached per glider are freed together with it
+            dynamics = _weak_method(dynamics)
+            dynamics_jacobian = _weak_method(dynamics_jacobian)
+        return DrakeSysWrapper(3, dynamics, dynamics_jacobian)
 
     def continuous_dynamics_dimless(self, x, u):
         # NOTE This actually uses ENU frame, not NED. i.e., z is positive upwards
@@ -216,11 +248,133 @@ class RelativeZhukovskiiGlider:
         x_dot = np.concatenate((p_dot, v_r_dot))
         return x_dot
 
+    def continuous_dynamics_jacobian_dimless(self, x, u):
+        # Analytic jacobian of continuous_dynamics_dimless,
+        # returns [df/dx, df/du] with shape (6, 9)
+        # NOTE the wind is along the y axis and only depends on the height,
+        # so the wind jacobian only has the [1, 2] element
+        c = u
+        v_r = x[3:6]
+
+        dw_dz = ddz_wind_model(self.L * x[2]) * (
+            self.L / self.V_l
+        )  # Nondimensionalized wind derivative
+        d2w_dz2 = d2dz2_wind_model(self.L * x[2]) * (
+            self.L ** 2 / self.V_l
+        )  # Nondimensionalized second wind derivative
+
+        # Same epsilon as in continuous_dynamics_dimless
+        epsilon = 0.001
+        v_r_squared = v_r.dot(v_r)
+        c_squared = c.dot(c)
+        r = np.sqrt(v_r_squared + epsilon)
+        l_term = (v_r_squared + c_squared) / (2 * r)
+        # dl/dv_r = dl_dv_r_scale * v_r, dl/dc = c / r
+        dl_dv_r_scale = 1 / r - (v_r_squared + c_squared) / (2 * r ** 3)
+
+        J = np.zeros((6, 9))
+        # p_dot = v_r + w(h)
+        J[0, 3] = J[1, 4] = J[2, 5] = 1
+        J[1, 2] = -dw_dz
+
+        # v_r_dot = -e_z - (l_term / Lam * I + dw_dx - skew(c)) v_r
+        J[3:6, 3:6] = -dl_dv_r_scale / self.Lam * v_r[:, None] * v_r[None, :]
+        J[3, 3] -= l_term / self.Lam
+        J[4, 4] -= l_term / self.Lam
+        J[5, 5] -= l_term / self.Lam
+        J[4, 2] = d2w_dz2 * v_r[2]
+        J[4, 5] += dw_dz
+        # skew(c)
+        J[3, 4] -= c[2]
+        J[3, 5] += c[1]
+        J[4, 3] += c[2]
+        J[4, 5] -= c[0]
+        J[5, 3] -= c[1]
+        J[5, 4] += c[0]
+
+        J[3:6, 6:9] = -1 / (self.Lam * r) * v_r[:, None] * c[None, :]
+        # -skew(v_r)
+        J[3, 7] += v_r[2]
+        J[3, 8] -= v_r[1]
+        J[4, 6] -= v_r[2]
+        J[4, 8] += v_r[0]
+        J[5, 6] += v_r[1]
+        J[5, 7] -= v_r[0]
+        return J
+
+    def continuous_dynamics_dimless_batch(self, x, u):
+        # Vectorized continuous_dynamics_dimless for a whole trajectory,
+        # x has shape (N, 6), u has shape (N, 3), returns shape (N, 6)
+        c = u
+        v_r = x[:, 3:6]
+
+        w = wind_model(self.L * x[:, 2]) / self.V_l  # Nondimensionalized wind
+        dw_dz = ddz_wind_model(self.L * x[:, 2]) * (
+            self.L / self.V_l
+        )  # Nondimensionalized wind derivative
+
+        # Same epsilon as in continuous_dynamics_dimless
+        epsilon = 0.001
+        v_r_squared = np.einsum("ij,ij->i", v_r, v_r)
+        c_squared = np.einsum("ij,ij->i", c, c)
+        l_term = (v_r_squared + c_squared) / (2 * np.sqrt(v_r_squared + epsilon))
+
+        x_dot = np.empty((x.shape[0], 6))
+        # p_dot = v_r + w
+        x_dot[:, 0:3] = v_r
+        x_dot[:, 1] -= w
+        # v_r_dot = -e_z - (l_term / Lam * I + dw_dx - skew(c)) v_r
+        x_dot[:, 3:6] = -(l_term / self.Lam)[:, None] * v_r + np.cross(c, v_r)
+        x_dot[:, 4] += dw_dz * v_r[:, 2]
+        x_dot[:, 5] -= 1
+        return x_dot
+
+    def continuous_dynamics_jacobian_dimless_batch(self, x, u):
+        # Vectorized continuous_dynamics_jacobian_dimless,
+        # returns [df/dx, df/du] with shape (N, 6, 9)
+        c = u
+        v_r = x[:, 3:6]
+
+        dw_dz = ddz_wind_model(self.L * x[:, 2]) * (self.L / self.V_l)
+        d2w_dz2 = d2dz2_wind_model(self.L * x[:, 2]) * (self.L ** 2 / self.V_l)
+
+        epsilon = 0.001
+        v_r_squared = np.einsum("ij,ij->i", v_r, v_r)
+        c_squared = np.einsum("ij,ij->i", c, c)
+        r = np.sqrt(v_r_squared + epsilon)
+        l_term = (v_r_squared + c_squared) / (2 * r)
+        dl_dv_r_scale = 1 / r - (v_r_squared + c_squared) / (2 * r ** 3)
+
+        J = np.zeros((x.shape[0], 6, 9))
+        # p_dot = v_r + w(h)
+        J[:, 0, 3] = J[:, 1, 4] = J[:, 2, 5] = 1
+        J[:, 1, 2] = -dw_dz
+
+        # v_r_dot = -e_z - (l_term / Lam * I + dw_dx - skew(c)) v_r
+        J[:, 3:6, 3:6] = -(dl_dv_r_scale / self.Lam)[:, None, None] * v_r[
+            :, :, None
+        ] * v_r[:, None, :] + skew_matrix_batch(c)
+        for i in range(3):
+            J[:, 3 + i, 3 + i] -= l_term / self.Lam
+        J[:, 4, 2] = d2w_dz2 * v_r[:, 2]
+        J[:, 4, 5] += dw_dz
+
+        J[:, 3:6, 6:9] = -(1 / (self.Lam * r))[:, None, None] * (
+            v_r[:, :, None] * c[:, None, :]
+        ) - skew_matrix_batch(v_r)
+        return J
+
 
 @TemplateSystem.define("DrakeSysWrapper_")
 def DrakeSysWrapper_(T):
     class Impl(LeafSystem_[T]):
-        def _construct(self, num_inputs, continuous_dynamics, converter=None):
+        def _construct(
+            self,
+            num_inputs,
+            continuous_dynamics,
+            dynamics_jacobian=None,
+            converter=None,
+        ):
             LeafSystem_[T].__init__(self, converter)
 
             self.DeclareVectorInputPort("u", BasicVector_[T](num_inputs))
@@ -229,19 +383,41 @@ def DrakeSysWrapper_(T):
             # Three positions, three velocities
             self.DeclareContinuousState(3, 3, 0)
             self.continuous_dynamics = continuous_dynamics
+            self.dynamics_jacobian = dynamics_jacobian
             self.num_inputs = num_inputs
 
         def _construct_copy(self, other, converter=None):
             Impl._construct(
-                self, other.num_inputs, other.continuous_dynamics, converter=converter
+                self,
+                other.num_inputs,
+                other.continuous_dynamics,
+                other.dynamics_jacobian,
+                converter=converter,
             )
 
         def DoCalcTimeDerivatives(self, context, derivatives):
             x = context.get_continuous_state_vector().CopyToVector()
             u = self.EvalVectorInput(context, 0).CopyToVector()
-            x_dot = self.continuous_dynamics(x, u)
+            if T == AutoDiffXd and self.dynamics_jacobian is not None:
+                x_dot = self._calc_autodiff_dynamics(x, u)
+            else:
+                x_dot = self.continuous_dynamics(x, u)
             derivatives.get_mutable_vector().SetFromVector(x_dot)
 
+        def _calc_autodiff_dynamics(self, x, u):
+            # Evaluate the dynamics with floats, and apply the chain rule
+            # with the analytic jacobian instead of pushing AutoDiffXd
+            # through the dynamics
+            x_and_u = np.concatenate((x, u))
+            values = ExtractValue(x_and_u).flatten()
+            gradients = ExtractGradient(x_and_u)
+            x_value = values[0:6]
+            u_value = values[6:]
+
+            x_dot_value = self.continuous_dynamics(x_value, u_value)
+            x_dot_gradient = self.dynamics_jacobian(x_value, u_value).dot(gradients)
+            return InitializeAutoDiff(x_dot_value, x_dot_gradient).flatten()
+
         # y = x
         def CopyStateOut(self, context, output):
             x = context.get_continuous_state_vector().CopyToVector()
@@ -253,6 +429,23 @@ def DrakeSysWrapper_(T):
 DrakeSysWrapper = DrakeSysWrapper_[None]
 
 
+def _weak_method(method):
+    weak_method = weakref.WeakMethod(method)
+    return lambda *args: weak_method()(*args)
+
+
 def skew_matrix(v):
     S = np.array([[0, -v[2], v[1]], [v[2], 0, -v[0]], [-v[1], v[0], 0]])
     return S
+
+
+def skew_matrix_batch(v):
+    # Skew matrices of all rows in v, shape (N, 3, 3)
+    S = np.zeros((v.shape[0], 3, 3))
+    S[:, 0, 1] = -v[:, 2]
+    S[:, 0, 2] = v[:, 1]
+    S[:, 1, 0] = v[:, 2]
+    S[:, 1, 2] = -v[:, 0]
+    S[:, 2, 0] = -v[:, 1]
+    S[:, 2, 1] = v[:, 0]
+    return S
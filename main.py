@@ -1,8 +1,14 @@
 #!/usr/bin/env python3
 
 import sys, getopt
+import json
 import logging as log
-from trajopt.trajectory_generator import *
+import numpy as np
+from trajopt.results import SOLUTION_CACHE_DIR, show_sweep_result
+from trajopt.solver_config import DEFAULT_SOLVER_CONFIG
+from trajopt.solution_cache import SolutionCache
+from trajopt.parameter_sweep import get_parameter_samples
+from trajopt.job_queue import JobQueue, JobScheduler
 
 
 def main(argv):
@@ -12,22 +18,64 @@ def main(argv):
     avg_vel_scale_guess = 1
     run_once = True
     n_angles = 9
+    n_workers = 1
+    resume = False
+    adaptive = False
+    max_solves = 40
+    use_cache = True
+    build_table = False
+    param_sweep_config = None
+    mesh_tol = None
+    solver_config = DEFAULT_SOLVER_CONFIG
+    n_racers = 1
+    race_deadline = None
+    preview = False
+    serve_port = None
 
     # Command line parsing
     try:
         opts, args = getopt.getopt(
-            argv, "a:p:v:s:", ["angle=", "period=", "velocity=", "sweep=", "show_sweep"]
+            argv,
+            "ha:p:v:s:w:",
+            [
+                "angle=",
+                "period=",
+                "velocity=",
+                "sweep=",
+                "workers=",
+                "resume",
+                "adaptive=",
+                "show_sweep",
+                "clear_cache",
+                "no_cache",
+                "build_table",
+                "param_sweep=",
+                "mesh_tol=",
+                "solver=",
+                "solver_tol=",
+                "max_iter=",
+                "max_solve_time=",
+                "race=",
+                "race_deadline=",
+                "preview",
+                "serve=",
+                "submit=",
+                "jobs",
+                "job=",
+                "cancel=",
+                "scheduler",
+            ],
         )
     except getopt.GetoptError:
         print(
-            "main.py -a <travel_angle> -p <period_guess> -v <velocity_guess> -s <n_sweep_angles> --show_sweep"
+            "main.py -a <travel_angle> -p <period_guess> -v <velocity_guess> -s <n_sweep_angles> -w <n_workers> --adaptive <max_solves> --resume --show_sweep --no_cache --clear_cache --build_table --param_sweep <config.json> --mesh_tol <tolerance> --solver <snopt|ipopt> --solver_tol <tolerance> --max_iter <iterations> --max_solve_time <seconds> --race <n_racers> --race_deadline <seconds> --preview --serve <port> --submit <job.json> --jobs --job <job_id> --cancel <job_id> --scheduler"
         )
         sys.exit(2)
 
     for opt, arg in opts:
         if opt == "-h":
             print(
-                "main.py -a <travel_angle> -p <period_guess> -v <velocity_guess> -s <n_sweep_angles> --show_sweep"
+                "main.py -a <travel_angle> -p <period_guess> -v <velocity_guess> -s <n_sweep_angles> -w <n_workers> --adaptive <max_solves> --resume --show_sweep --no_cache --clear_cache --build_table --param_sweep <config.json> --mesh_tol <tolerance> --solver <snopt|ipopt> --solver_tol <tolerance> --max_iter <iterations> --max_solve_time <seconds> --race <n_racers> --race_deadline <seconds> --preview --serve <port> --submit <job.json> --jobs --job <job_id> --cancel <job_id> --scheduler"
             )
             sys.exit()
         elif opt in ("-a", "--angle"):
@@ -39,9 +87,118 @@ def main(argv):
         elif opt in ("-s", "--sweep"):
             run_once = False
             n_angles = int(arg)
+        elif opt in ("-w", "--workers"):
+            n_workers = int(arg)
+        elif opt == "--adaptive":
+            run_once = False
+            adaptive = True
+            max_solves = int(arg)
+        elif opt == "--resume":
+            resume = True
         elif opt in ("--show_sweep"):
             show_sweep_result()
             return
+        elif opt == "--param_sweep":
+            param_sweep_config = arg
+        elif opt == "--build_table":
+            build_table = True
+        elif opt == "--mesh_tol":
+            mesh_tol = float(arg)
+        elif opt == "--solver":
+            solver_config = solver_config._replace(solver=arg)
+        elif opt == "--solver_tol":
+            solver_config = solver_config._replace(
+                optimality_tol=float(arg), feasibility_tol=float(arg)
+            )
+        elif opt == "--max_iter":
+            solver_config = solver_config._replace(max_iterations=int(arg))
+        elif opt == "--max_solve_time":
+            solver_config = solver_config._replace(max_time=float(arg))
+        elif opt == "--race":
+            n_racers = int(arg)
+        elif opt == "--race_deadline":
+            race_deadline = float(arg)
+        elif opt == "--preview":
+            preview = True
+        elif opt == "--serve":
+            serve_port = int(arg)
+        elif opt == "--submit":
+            with open(arg, "r") as f:
+                job = json.load(f)
+            print(
+                JobQueue().submit(
+                    job["kind"], job.get("args", {}), job.get("priority", 0)
+                )
+            )
+            return
+        elif opt == "--jobs":
+            for record in JobQueue().get_jobs():
+                print(
+                    "{0} {1} {2} priority {3}{4}".format(
+                        record["id"],
+                        record["kind"],
+                        record["status"],
+                        record["priority"],
+                        ", cancel requested" if record["cancel_requested"] else "",
+                    )
+                )
+            return
+        elif opt == "--job":
+            # Streams the finished angles until the job has finished
+            for record in JobQueue().stream_progress(arg):
+                print(
+                    "{0} deg: {1}, avg speed {2}, period {3}".format(
+                        record["travel_angle"],
+                        record["status"],
+                        record["avg_speed"],
+                        record["period"],
+                    )
+                )
+            print(JobQueue().get(arg)["status"])
+            return
+        elif opt == "--cancel":
+            JobQueue().cancel(arg)
+            return
+        elif opt == "--scheduler":
+            log.basicConfig(
+                format="%(levelname)s:%(message)s",
+                filename="scheduler_log.log",
+                filemode="w",
+                level=log.DEBUG,
+            )
+            JobScheduler(JobQueue()).run()
+            return
+        elif opt == "--no_cache":
+            use_cache = False
+        elif opt == "--clear_cache":
+            SolutionCache(SOLUTION_CACHE_DIR).clear()
+            return
+
+    if serve_port is not None:
+        # Set logging
+        log.basicConfig(
+            format="%(levelname)s:%(message)s",
+            filename="service_log.log",
+            filemode="w",
+            level=log.DEBUG,
+        )
+        from trajopt.trajectory_service import serve_trajectories
+
+        serve_trajectories(serve_port, n_workers)
+        return 0
+
+    # Imported after parsing, as pydrake and matplotlib are slow to import
+    # and only needed when solving
+    import matplotlib.pyplot as plt
+    from trajopt.trajectory_generator import (
+        calc_and_plot_trajectory,
+        preview_trajectory,
+        get_preview_solver_config,
+        sweep_calculation,
+        adaptive_sweep_calculation,
+        parameter_sweep_calculation,
+        generate_lookup_table,
+    )
 
     # Physical parameters
     m = 8.5
@@ -71,6 +228,51 @@ def main(argv):
         h0,
     )
 
+    if param_sweep_config is not None:
+        # Set logging
+        log.basicConfig(
+            format="%(levelname)s:%(message)s",
+            filename="param_sweep_run.log",
+            filemode="w",
+            level=log.DEBUG,
+        )
+        with open(param_sweep_config, "r") as f:
+            config = json.load(f)
+        parameter_sweep_calculation(
+            get_parameter_samples(config),
+            config.get("travel_angles", [travel_angle]),
+            period_guess,
+            avg_vel_scale_guess,
+            n_workers=n_workers,
+            resume=resume,
+            solver_config=solver_config,
+        )
+        return 0
+
+    if build_table and run_once:
+        # Build the table from the last sweep
+        generate_lookup_table(phys_params)
+        return 0
+
+    if preview and run_once:
+        # Set logging
+        log.basicConfig(
+            format="%(levelname)s:%(message)s",
+            filename="preview_log.log",
+            filemode="w",
+            level=log.DEBUG,
+        )
+        _, _, _, message = preview_trajectory(
+            phys_params,
+            phys_constraints,
+            travel_angle,
+            period_guess,
+            avg_vel_scale_guess,
+            solver_config=get_preview_solver_config(solver_config),
+        )
+        print(message)
+        return 0
+
     if run_once:
         # Set logging
         log.basicConfig(
@@ -86,6 +288,11 @@ def main(argv):
             period_guess,
             avg_vel_scale_guess,
             plot_axis="",
+            use_cache=use_cache,
+            mesh_tol=mesh_tol,
+            solver_config=solver_config,
+            n_racers=n_racers,
+            race_deadline=race_deadline,
         )
 
     else:
@@ -96,9 +303,31 @@ def main(argv):
             filemode="w",
             level=log.DEBUG,
         )
-        sweep_calculation(
-            phys_params, travel_angle, period_guess, avg_vel_scale_guess, n_angles
-        )
+        if adaptive:
+            adaptive_sweep_calculation(
+                phys_params,
+                period_guess,
+                avg_vel_scale_guess,
+                n_initial_angles=n_angles,
+                max_solves=max_solves,
+                n_workers=n_workers,
+                resume=resume,
+                solver_config=solver_config,
+            )
+        else:
+            sweep_calculation(
+                phys_params,
+                travel_angle,
+                period_guess,
+                avg_vel_scale_guess,
+                n_angles,
+                n_workers=n_workers,
+                resume=resume,
+                solver_config=solver_config,
+            )
+
+        if build_table:
+            generate_lookup_table(phys_params)
 
         show_sweep_result()
         plt.show()
@@ -1,10 +1,6 @@
 import matplotlib.pyplot as plt
 from matplotlib.collections import PolyCollection
-from mpl_toolkits.mplot3d import Axes3D
-from mpl_toolkits.mplot3d.art3d import Poly3DCollection, Line3DCollection
-from matplotlib.animation import FuncAnimation
 import matplotlib.ticker as ticker
-import matplotlib.animation as animation
 
 import numpy as np
 
@@ -369,6 +365,9 @@ def plot_glider_pos(
     plot_axis="",
     save_traj=False,
 ):
+    # The 3D toolkit is only imported when plotting in 3D
+    from mpl_toolkits.mplot3d import Axes3D
+
     fig = plt.figure()
     ax = fig.gca(projection="3d")
 
@@ -607,6 +606,8 @@ def _set_real_aspect_ratio(axis_limits, ax):
 
 
 def _draw_gliders(x_trj, u_trj, traj_time, ax):
+    from mpl_toolkits.mplot3d.art3d import Poly3DCollection, Line3DCollection
+
     glider_interval = 1  # s
     scale = 1
 
@@ -750,6 +751,10 @@ def _get_glider_corners(x, c, scale):
 
 # TODO OUTDATED with new relative model
 def save_trajectory_gif(zhukovskii_glider, traj, travel_angle):
+    from mpl_toolkits.mplot3d import Axes3D
+    from matplotlib.animation import FuncAnimation
+    import matplotlib.animation as animation
+
     ## ANIMATION FILE SETTINGS
     filepath = "./animations/"
     filename = "glider_psi_{0}_degs.mp4".format(int(travel_angle * (180 / np.pi)))
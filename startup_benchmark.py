@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+
+import sys, getopt
+import os
+import json
+import time
+import tempfile
+import subprocess
+import numpy as np
+from trajopt.results import SWEEP_SPEEDS_FILE, SWEEP_PERIODS_FILE
+from trajopt.solve_telemetry import TelemetryLog
+
+STARTUP_BENCHMARK_FILE = "./results/startup_benchmark.jsonl"
+HEAVY_MODULES = (
+    "pydrake",
+    "matplotlib",
+    "mpl_toolkits.mplot3d",
+    "matplotlib.animation",
+)
+
+# The arguments of every CLI mode of main.py, and the functions that do the
+# work of the mode, as (module, function[, return value]). The work is
+# replaced by a no-op once the module of the function is imported, so that
+# only the startup of the mode is timed.
+STARTUP_MODES = {
+    "help": (["-h"], []),
+    "show_sweep": (["--show_sweep"], [("plot.plot", "plot_sweep_polar")]),
+    "solve": (
+        ["-a", "90"],
+        [("trajopt.trajectory_generator", "calc_and_plot_trajectory")],
+    ),
+    "sweep": (
+        ["-s", "9"],
+        [
+            ("trajopt.trajectory_generator", "sweep_calculation"),
+            ("plot.plot", "plot_sweep_polar"),
+        ],
+    ),
+    "preview": (
+        ["--preview"],
+        [
+            (
+                "trajopt.trajectory_generator",
+                "preview_trajectory",
+                (False, None, None, ""),
+            )
+        ],
+    ),
+    "serve": (
+        ["--serve", "0"],
+        [("trajopt.trajectory_service", "serve_trajectories")],
+    ),
+    "scheduler": (["--scheduler"], [("trajopt.job_queue", "JobScheduler.run")]),
+}
+
+STARTUP_CODE = """
+import sys, json, builtins
+
+stubs = {stubs}
+_import = builtins.__import__
+
+
+def stubbed_import(name, *args, **kwargs):
+    # Stubs are set when main imports their module, after it has been loaded
+    module = _import(name, *args, **kwargs)
+    for module_name, stub_name, *return_value in stubs:
+        if module_name == name:
+            target = sys.modules[module_name]
+            path = stub_name.split(".")
+            for attr in path[:-1]:
+                target = getattr(target, attr)
+            value = return_value[0] if return_value else None
+            setattr(target, path[-1], lambda *args, value=value, **kwargs: value)
+    return module
+
+
+builtins.__import__ = stubbed_import
+import main
+
+try:
+    exit_code = main.main({argv})
+except SystemExit as e:
+    exit_code = e.code
+print(json.dumps([exit_code, [m for m in {heavy_modules} if m in sys.modules]]))
+"""
+
+
+def time_startup(argv, stubs):
+    # Runs main.main(argv) in a fresh interpreter, in an empty directory with
+    # empty sweep results. Returns the wall time, the exit code and the heavy
+    # modules that were loaded.
+    code = STARTUP_CODE.format(
+        stubs=list(stubs), argv=list(argv), heavy_modules=HEAVY_MODULES
+    )
+    repo_dir = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, MPLBACKEND="Agg")
+    env["PYTHONPATH"] = os.pathsep.join(
+        [repo_dir] + [path for path in [os.environ.get("PYTHONPATH")] if path]
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        for filename in (SWEEP_SPEEDS_FILE, SWEEP_PERIODS_FILE):
+            filename = os.path.join(directory, filename)
+            os.makedirs(os.path.dirname(filename), exist_ok=True)
+            with open(filename, "w") as f:
+                json.dump(dict(), f)
+
+        start_time = time.time()
+        output = subprocess.run(
+            [sys.executable, "-c", code],
+            stdout=subprocess.PIPE,
+            check=True,
+            cwd=directory,
+            env=env,
+            universal_newlines=True,
+        ).stdout
+        startup_time = time.time() - start_time
+    exit_code, loaded_modules = json.loads(output.splitlines()[-1])
+    return startup_time, exit_code, loaded_modules
+
+
+def run_startup_benchmark(n_repeats=5, filename=STARTUP_BENCHMARK_FILE):
+    records = []
+    for mode, (argv, stubs) in STARTUP_MODES.items():
+        startup_times = []
+        for _ in range(n_repeats):
+            startup_time, exit_code, loaded_modules = time_startup(argv, stubs)
+            startup_times.append(startup_time)
+        record = {
+            "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "mode": mode,
+            "n_repeats": n_repeats,
+            "median_time": float(np.median(startup_times)),
+            "min_time": float(np.min(startup_times)),
+            "exit_code": exit_code,
+            "loaded_modules": loaded_modules,
+        }
+        print(
+            "{0}: median {1:.3f} s, min {2:.3f} s, loads {3}".format(
+                mode, record["median_time"], record["min_time"], loaded_modules
+            )
+        )
+        records.append(record)
+
+    # The records are appended, so that the startup time can be tracked
+    telemetry_log = TelemetryLog(filename)
+    for record in records:
+        telemetry_log.add(record)
+    return records
+
+
+def main(argv):
+    n_repeats = 5
+    try:
+        opts, args = getopt.getopt(argv, "n:", ["repeats="])
+    except getopt.GetoptError:
+        print("startup_benchmark.py -n <repeats>")
+        sys.exit(2)
+
+    for opt, arg in opts:
+        if opt in ("-n", "--repeats"):
+            n_repeats = int(arg)
+
+    run_startup_benchmark(n_repeats)
+    return 0
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
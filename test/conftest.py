@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from trajopt.direct_collocation import SolutionDetails
+
+
+def _get_solution_details(**fields):
+    # Details of a solved angle, fields are overridden by the arguments
+    details = dict(
+        avg_speed=10,
+        period=5,
+        limited_by_time_step="false",
+        cost=-1,
+        formulation_time=0.01,
+        solve_time=2,
+    )
+    details.update(fields)
+    return SolutionDetails(**details)
+
+
+def _get_straight_solution(travel_angle, period=5, avg_speed=10, n_knots=200):
+    # Straight line towards travel_angle (deg) at avg_speed, in the format
+    # returned by direct_collocation_relative
+    times = np.linspace(0, period, n_knots)
+    dir_vector = np.array(
+        [np.sin(travel_angle * np.pi / 180), np.cos(travel_angle * np.pi / 180)]
+    )
+    x_knots = np.zeros((n_knots, 6))
+    x_knots[:, 0:2] = avg_speed * np.outer(times, dir_vector)
+    x_knots[:, 2] = 5
+    x_knots[:, 3:5] = avg_speed * dir_vector
+    u_knots = np.zeros((n_knots, 3))
+    u_knots[:, 2] = 1
+    solution_details = _get_solution_details(avg_speed=avg_speed, period=period)
+    return solution_details, (times, x_knots, u_knots)
+
+
+@pytest.fixture
+def get_solution_details():
+    return _get_solution_details
+
+
+@pytest.fixture
+def get_straight_solution():
+    return _get_straight_solution
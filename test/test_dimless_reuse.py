@@ -0,0 +1,69 @@
+import numpy as np
+
+from dynamics.zhukovskii_glider import RelativeZhukovskiiGlider
+from dynamics.wind_models import set_wind_params, DEFAULT_WIND_PARAMS
+from trajopt.direct_collocation import (
+    get_dimless_problem,
+    calc_dimless_problem_residual,
+    calc_collocation_defects,
+    is_same_dimless_solution,
+)
+
+
+def get_knots(N=11):
+    # Slow circle at constant height, far from all constraint bounds
+    sample_times = np.linspace(0, 2, N)
+    angles = np.pi * sample_times
+    x_knots = np.zeros((N, 6))
+    x_knots[:, 0] = np.sin(angles)
+    x_knots[:, 1] = np.cos(angles)
+    x_knots[:, 2] = 0.5
+    x_knots[:, 3] = np.cos(angles)
+    x_knots[:, 4] = -np.sin(angles)
+    u_knots = np.zeros((N, 3))
+    u_knots[:, 0] = -np.sin(angles) * 0.3
+    u_knots[:, 1] = -np.cos(angles) * 0.3
+    u_knots[:, 2] = 0.5
+    return sample_times, x_knots, u_knots
+
+
+def test_scaled_glider_has_same_dimless_problem():
+    zhukovskii_glider = RelativeZhukovskiiGlider()
+    dimless_problem = get_dimless_problem(zhukovskii_glider)
+    defects = calc_collocation_defects(zhukovskii_glider, get_knots())
+
+    # Four times the mass gives four times the characteristic length and
+    # twice the characteristic speed, so scale heights and wind accordingly
+    k = 4
+    scaled_glider = RelativeZhukovskiiGlider(
+        m=8.5 * k, min_height=0.5 * k, max_height=100 * k, h0=5 * k
+    )
+    try:
+        set_wind_params(
+            w_ref=DEFAULT_WIND_PARAMS["w_ref"] * np.sqrt(k),
+            h_ref=DEFAULT_WIND_PARAMS["h_ref"] * k,
+            h_0=DEFAULT_WIND_PARAMS["h_0"] * k,
+        )
+        scaled_dimless_problem = get_dimless_problem(scaled_glider)
+        scaled_defects = calc_collocation_defects(scaled_glider, get_knots())
+    finally:
+        set_wind_params(**DEFAULT_WIND_PARAMS)
+
+    assert (
+        calc_dimless_problem_residual(dimless_problem[0], scaled_dimless_problem[0])
+        < 1e-9
+    )
+    assert np.allclose(defects, scaled_defects)
+
+    # Only the fixed max speed differs, which is inactive for these knots
+    bounds_differ = ~np.isclose(dimless_problem[1], scaled_dimless_problem[1])
+    assert list(np.flatnonzero(bounds_differ)) == [0]
+    assert is_same_dimless_solution(
+        dimless_problem, scaled_dimless_problem, get_knots()
+    )
+
+    # A glider with other dimless groups does not share solutions
+    other_dimless_problem = get_dimless_problem(RelativeZhukovskiiGlider(h0=10))
+    assert not is_same_dimless_solution(
+        dimless_problem, other_dimless_problem, get_knots()
+    )
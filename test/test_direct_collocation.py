@@ -0,0 +1,152 @@
+import gc
+import weakref
+import numpy as np
+from pydrake.autodiffutils import InitializeAutoDiff, ExtractGradient
+
+from dynamics.zhukovskii_glider import RelativeZhukovskiiGlider, DrakeSysWrapper
+import trajopt.direct_collocation as direct_collocation
+from trajopt.direct_collocation import (
+    DirectCollocationProblem,
+    get_collocation_problem,
+)
+
+
+def _calc_finite_diff_gradient(f, values, delta=1e-6):
+    gradient = np.zeros(len(values))
+    for i in range(len(values)):
+        e = np.zeros(len(values))
+        e[i] = delta
+        gradient[i] = (f(values + e) - f(values - e)) / (2 * delta)
+    return gradient
+
+
+def test_cost_gradients_finite_diff():
+    problem = DirectCollocationProblem(RelativeZhukovskiiGlider(), N=11)
+    problem.set_travel_angle(70 * np.pi / 180)
+    rng = np.random.default_rng(0)
+    costs = problem.dircol.GetAllCosts()
+    assert len(costs) == 2
+    for cost in costs:
+        evaluator = cost.evaluator()
+        for _ in range(3):
+            # All values positive, as one of them is the time step
+            values = rng.uniform(0.5, 1.5, evaluator.num_vars())
+            seed = rng.normal(size=(evaluator.num_vars(), 2))
+            value = evaluator.Eval(InitializeAutoDiff(values, seed))[0]
+            gradient = _calc_finite_diff_gradient(
+                lambda values: evaluator.Eval(values)[0], values
+            )
+            assert np.isclose(value.value(), evaluator.Eval(values)[0])
+            assert np.allclose(
+                value.derivatives(), gradient.dot(seed), rtol=1e-5, atol=1e-7
+            )
+
+
+def test_drake_plant_jacobian_matches_autodiff():
+    # The analytic jacobian against AutoDiffXd through the dynamics, with
+    # random derivatives of the state and input
+    zhukovskii_glider = RelativeZhukovskiiGlider()
+    plant = zhukovskii_glider.create_drake_plant().ToAutoDiffXd()
+    autodiff_plant = DrakeSysWrapper(
+        3, zhukovskii_glider.continuous_dynamics_dimless
+    ).ToAutoDiffXd()
+    rng = np.random.default_rng(0)
+    for _ in range(5):
+        x = rng.normal(size=6)
+        x[2] = rng.uniform(0.1, 5)  # Dimless height above ground
+        u = rng.normal(size=3)
+        x_and_u = InitializeAutoDiff(
+            np.concatenate((x, u)), rng.normal(size=(9, 4))
+        ).flatten()
+
+        x_dots = []
+        for system in (plant, autodiff_plant):
+            context = system.CreateDefaultContext()
+            context.SetContinuousState(x_and_u[0:6])
+            system.get_input_port(0).FixValue(context, x_and_u[6:9])
+            x_dots.append(system.EvalTimeDerivatives(context).CopyToVector())
+
+        assert np.allclose(
+            [x_dot.value() for x_dot in x_dots[0]],
+            [x_dot.value() for x_dot in x_dots[1]],
+        )
+        assert np.allclose(ExtractGradient(x_dots[0]), ExtractGradient(x_dots[1]))
+
+
+def _get_program_values(problem, values):
+    # Coefficients and bounds of all linear constraints and bounds, and the
+    # costs at the given values
+    dircol = problem.dircol
+    program_values = []
+    for bindings in (
+        dircol.linear_constraints(),
+        dircol.linear_equality_constraints(),
+        dircol.bounding_box_constraints(),
+    ):
+        for binding in bindings:
+            evaluator = binding.evaluator()
+            program_values.append(evaluator.lower_bound())
+            program_values.append(evaluator.upper_bound())
+            if hasattr(evaluator, "GetDenseA"):
+                program_values.append(evaluator.GetDenseA())
+    for binding in dircol.GetAllCosts():
+        n_vars = binding.evaluator().num_vars()
+        program_values.append(binding.evaluator().Eval(values[:n_vars]))
+    return program_values
+
+
+def test_reused_program_matches_fresh_program():
+    zhukovskii_glider = RelativeZhukovskiiGlider()
+    reused_problem = DirectCollocationProblem(zhukovskii_glider, N=11)
+    reused_problem.set_travel_angle(20 * np.pi / 180)
+    reused_problem.set_period_guess(3)
+    reused_problem.set_travel_angle(250 * np.pi / 180)
+    reused_problem.set_period_guess(5)
+
+    fresh_problem = DirectCollocationProblem(zhukovskii_glider, N=11)
+    fresh_problem.set_travel_angle(250 * np.pi / 180)
+    fresh_problem.set_period_guess(5)
+
+    values = np.random.default_rng(0).uniform(0.5, 1.5, 100)
+    reused_values = _get_program_values(reused_problem, values)
+    fresh_values = _get_program_values(fresh_problem, values)
+    assert len(reused_values) == len(fresh_values)
+    for reused_value, fresh_value in zip(reused_values, fresh_values):
+        assert np.allclose(reused_value, fresh_value)
+
+    # The comparison does see a change of travel angle
+    fresh_problem.set_travel_angle(20 * np.pi / 180)
+    fresh_values = _get_program_values(fresh_problem, values)
+    assert not all(
+        np.allclose(reused_value, fresh_value)
+        for reused_value, fresh_value in zip(reused_values, fresh_values)
+    )
+
+
+def test_collocation_problem_cache_keys():
+    zhukovskii_glider = RelativeZhukovskiiGlider()
+    problem = get_collocation_problem(zhukovskii_glider, N=11, max_dt_scale=3)
+    assert get_collocation_problem(zhukovskii_glider, N=11, max_dt_scale=3) is problem
+
+    other_problems = [
+        get_collocation_problem(zhukovskii_glider, N=13, max_dt_scale=3),
+        get_collocation_problem(zhukovskii_glider, N=11, max_dt_scale=1.5),
+        get_collocation_problem(RelativeZhukovskiiGlider(), N=11, max_dt_scale=3),
+    ]
+    assert len(set(map(id, [problem] + other_problems))) == 4
+    assert [p.N for p in other_problems] == [13, 11, 11]
+    assert [p.max_dt_scale for p in other_problems] == [3, 1.5, 3]
+
+
+def test_collocation_problem_freed_with_glider():
+    zhukovskii_glider = RelativeZhukovskiiGlider(m=9)
+    problem = get_collocation_problem(zhukovskii_glider, N=11)
+    problem_ref = weakref.ref(problem)
+    assert zhukovskii_glider in direct_collocation._collocation_problems
+
+    del zhukovskii_glider, problem
+    gc.collect()
+    assert problem_ref() is None
+    assert not any(
+        glider.m == 9 for glider in direct_collocation._collocation_problems.keys()
+    )
@@ -0,0 +1,71 @@
+import time
+import pytest
+import multiprocessing as mp
+
+from trajopt.job_queue import (
+    JobQueue,
+    JobScheduler,
+    QUEUED,
+    RUNNING,
+    CANCELLED,
+)
+
+
+def test_job_queue(tmp_path):
+    job_queue = JobQueue(str(tmp_path))
+    sweep_id = job_queue.submit("sweep", {"params": {"m": 9}, "n_angles": 4})
+    single_id = job_queue.submit("single", {"travel_angle": 100}, priority=5)
+    assert job_queue.get(sweep_id)["args"]["n_workers"] == 1
+    assert job_queue.get(single_id)["status"] == QUEUED
+    assert [record["id"] for record in job_queue.get_queued_jobs()] == [
+        single_id,
+        sweep_id,
+    ]
+
+    assert job_queue.cancel(sweep_id)
+    assert job_queue.get(sweep_id)["cancel_requested"]
+    assert job_queue.get_progress(sweep_id) == []
+
+    single_id = job_queue.submit("single", {"params": {"min_height": 1}})
+    assert job_queue.get(single_id)["args"]["params"] == {"min_height": 1}
+
+    for kind, args in (
+        ("adaptive", {}),
+        ("sweep", {"travel_angle": 90}),
+        ("single", {"params": {"mass": 9}}),
+        ("sweep", {"params": {"min_height": 1}}),
+    ):
+        with pytest.raises(ValueError):
+            job_queue.submit(kind, args)
+
+
+def test_scheduler_requeues_interrupted_jobs(tmp_path, monkeypatch):
+    job_queue = JobQueue(str(tmp_path))
+    sweep_id = job_queue.submit("sweep", {"n_workers": 64})
+    job_queue.set_status(sweep_id, RUNNING)
+    cancelled_id = job_queue.submit("single", {})
+    job_queue.cancel(cancelled_id)
+
+    scheduler = JobScheduler(job_queue, max_processes=2)
+    record = job_queue.get(sweep_id)
+    assert record["status"] == QUEUED
+    assert record["args"]["resume"]
+
+    # Cancelled jobs are never started, and the sweep is not run here
+    started = []
+    monkeypatch.setattr(
+        scheduler, "_start", lambda record, n_processes: started.append(n_processes)
+    )
+    scheduler.step()
+    assert job_queue.get(cancelled_id)["status"] == CANCELLED
+    assert started == [2]
+
+
+def test_scheduler_stops_job_without_process_group(tmp_path):
+    # A job that is stopped before it has created its own process group
+    scheduler = JobScheduler(JobQueue(str(tmp_path)), max_processes=1)
+    process = mp.Process(target=time.sleep, args=(60,))
+    process.start()
+    scheduler.processes["job"] = (process, 1)
+    scheduler._stop("job", timeout=5)
+    assert not process.is_alive()
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from dynamics.zhukovskii_glider import RelativeZhukovskiiGlider
+from trajopt.trajectory_store import TrajectoryStore
+from trajopt.lookup_table import TrajectoryLookupTable, build_lookup_table
+
+
+def test_lookup_table(tmp_path, get_straight_solution):
+    trajectory_store = TrajectoryStore(str(tmp_path / "trajectories.npy"))
+    trajectory_store.add(80.0, *get_straight_solution(80.0, 4))
+    trajectory_store.add(100.0, *get_straight_solution(100.0, 4))
+    trajectory_store.add(300.0, *get_straight_solution(300.0, 8))
+    # Failed angles are not part of the table
+    solution_details, _ = get_straight_solution(200.0, 4)
+    trajectory_store.add(200.0, solution_details, None, status="failed")
+    filename = str(tmp_path / "lookup_table.bin")
+    build_lookup_table(RelativeZhukovskiiGlider(), trajectory_store, filename, 32)
+
+    lookup_table = TrajectoryLookupTable(filename)
+    assert np.allclose(lookup_table.angles, [80, 100, 300])
+    times, x_knots, u_knots, period, avg_speed = lookup_table.query(80.0)
+    assert np.isclose(period, 4)
+    assert np.isclose(avg_speed, 10)
+
+    # Rotated and interpolated between 80 and 100 deg
+    times, x_knots, u_knots, period, avg_speed = lookup_table.query(95.0)
+    _, (_, x_expected, u_expected) = get_straight_solution(95.0, 4, n_knots=32)
+    assert np.allclose(times, np.linspace(0, 4, 32))
+    assert np.allclose(x_knots, x_expected, atol=1e-4)
+    assert np.allclose(u_knots, u_expected, atol=1e-4)
+
+    # Queries in the 140 deg gap between 300 and 80 deg are refused
+    with pytest.raises(ValueError):
+        lookup_table.query(10.0)
+    assert np.isclose(lookup_table.query(300.0)[3], 8)
+
+    # Time normalized between periods of 4 and 8 s, wrapping around 0 deg
+    lookup_table = TrajectoryLookupTable(filename, max_angle_gap=None)
+    times, x_knots, u_knots, period, avg_speed = lookup_table.query(10.0)
+    assert np.isclose(period, 6)
+    assert np.isclose(times[-1], 6)
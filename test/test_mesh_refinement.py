@@ -0,0 +1,52 @@
+import numpy as np
+
+from dynamics.zhukovskii_glider import RelativeZhukovskiiGlider
+from trajopt.direct_collocation import (
+    calc_avg_speed_drift,
+    calc_integration_errors,
+    simulate_knots,
+)
+
+
+def get_simulated_knots(zhukovskii_glider, N=11, n_steps=100):
+    # Glide with a constant input, integrated with small Euler steps
+    sample_times = np.linspace(0, 1, N)
+    u = np.array([[0, 0, 0.8]])
+    x = np.array([[0, 0, 1, 0, 1, 0]], dtype=float)
+    x_knots = [x[0]]
+    dt = (sample_times[1] - sample_times[0]) / n_steps
+    for _ in range(N - 1):
+        for _ in range(n_steps):
+            x = x + dt * zhukovskii_glider.continuous_dynamics_dimless_batch(x, u)
+        x_knots.append(x[0])
+    return sample_times, np.array(x_knots), np.repeat(u, N, axis=0)
+
+
+def test_integration_errors():
+    zhukovskii_glider = RelativeZhukovskiiGlider()
+    sample_times, x_knots, u_knots = get_simulated_knots(zhukovskii_glider)
+    errors = calc_integration_errors(
+        zhukovskii_glider, (sample_times, x_knots, u_knots)
+    )
+    assert errors.shape == (10,)
+    assert np.max(errors) < 1e-3
+
+    # Only the segments next to a perturbed knot have errors
+    x_knots[5, 2] += 0.1
+    errors = calc_integration_errors(
+        zhukovskii_glider, (sample_times, x_knots, u_knots)
+    )
+    assert list(np.flatnonzero(errors > 1e-2)) == [4, 5]
+
+
+def test_simulate_knots():
+    zhukovskii_glider = RelativeZhukovskiiGlider()
+    sample_times, x_knots, u_knots = get_simulated_knots(zhukovskii_glider)
+    x_sim = simulate_knots(zhukovskii_glider, (sample_times, x_knots, u_knots))
+    assert x_sim.shape == x_knots.shape
+    assert np.max(np.abs(x_sim - x_knots)) < 1e-3
+    assert calc_avg_speed_drift(0, x_knots, x_sim) < 1e-3
+
+    # Unlike the integration errors, the drift does not start over at every knot
+    x_knots[-1, 1] *= 1.1
+    assert np.isclose(calc_avg_speed_drift(0, x_knots, x_sim), 0.1 / 1.1, rtol=1e-2)
@@ -0,0 +1,112 @@
+import gc
+import os
+import weakref
+import numpy as np
+
+import trajopt.trajectory_generator as trajectory_generator
+from trajopt.direct_collocation import get_collocation_problem
+from trajopt.parameter_sweep import (
+    ParameterSweepResults,
+    get_grid_samples,
+    get_latin_hypercube_samples,
+    split_params,
+)
+
+
+def test_grid_samples_are_ordered_for_continuation():
+    param_values = {"m": [6, 8, 10], "b": [3, 4], "w_ref": [10, 15]}
+    samples = get_grid_samples(param_values)
+    assert len(samples) == 12
+    assert len(set(tuple(sample.values()) for sample in samples)) == 12
+
+    # Consecutive samples differ in a single parameter by a single step
+    for sample, next_sample in zip(samples[:-1], samples[1:]):
+        steps = [
+            abs(
+                param_values[name].index(sample[name])
+                - param_values[name].index(next_sample[name])
+            )
+            for name in param_values
+        ]
+        assert sorted(steps) == [0, 0, 1]
+
+
+def test_latin_hypercube_samples():
+    samples = get_latin_hypercube_samples({"m": (5, 10), "c_Dp": (0.02, 0.04)}, 20)
+    m_values = np.array([sample["m"] for sample in samples])
+    # One sample in every stratum
+    assert np.all(np.sort(np.floor((m_values - 5) / 5 * 20)) == np.arange(20))
+
+    glider_params, wind_params = split_params(dict(samples[0], w_ref=12))
+    assert set(glider_params.keys()) == {"m", "c_Dp"}
+    assert wind_params == {"w_ref": 12}
+
+
+def test_parameter_sweep_results(tmp_path, get_solution_details):
+    filename = str(tmp_path / "parameter_sweep.npy")
+    results = ParameterSweepResults(filename, ["m", "w_ref"])
+    for m in [6, 8]:
+        for w_ref in [10, 15]:
+            solution_details = get_solution_details(avg_speed=m + w_ref)
+            results.add({"m": m, "w_ref": w_ref}, 90.0, solution_details)
+    # A failed problem is retried, and the solution replaces the failure
+    results.add({"m": 8, "w_ref": 10}, 45.0, get_solution_details(), "failed")
+    results.save()
+
+    results = ParameterSweepResults(filename, ["m", "w_ref"])
+    assert results.is_completed({"m": 8, "w_ref": 10}, 90.0)
+    assert not results.is_completed({"m": 8, "w_ref": 10}, 45.0)
+    results.add({"m": 8, "w_ref": 10}, 45.0, get_solution_details(avg_speed=12))
+    assert results.is_completed({"m": 8, "w_ref": 10}, 45.0)
+    assert len(results.query(m=8, w_ref=10, travel_angle=45)) == 1
+
+    records = results.query(m=8, travel_angle=90)
+    assert np.all(records["w_ref"] == [10, 15])
+    assert np.all(records["avg_speed"] == [18, 23])
+    assert len(results.query(travel_angle=90)) == 4
+
+
+def test_parameter_sweep_results_journal(tmp_path, get_solution_details):
+    filename = str(tmp_path / "parameter_sweep.npy")
+    results = ParameterSweepResults(filename, ["m"])
+    results.add({"m": 6}, 90.0, get_solution_details(avg_speed=1))
+    results.save()
+
+    # Added results are kept without saving, e.g. after a crash
+    results.add({"m": 8}, 90.0, get_solution_details(avg_speed=2))
+    results.add({"m": 6}, 90.0, get_solution_details(avg_speed=3))
+    journal_size = os.path.getsize(filename + ".journal")
+    assert journal_size == 2 * results.records.dtype.itemsize
+    with open(filename + ".journal", "ab") as f:
+        f.write(b"cut off")
+
+    results = ParameterSweepResults(filename, ["m"])
+    records = results.query(travel_angle=90)
+    assert np.all(records["m"] == [6, 8])
+    # The last result of a problem replaces the earlier ones
+    assert np.all(records["avg_speed"] == [3, 2])
+
+    # Saving merges the journal into the file
+    results.save()
+    assert not os.path.exists(filename + ".journal")
+    results = ParameterSweepResults(filename, ["m"])
+    assert np.all(results.query(travel_angle=90)["avg_speed"] == [3, 2])
+
+
+def test_parameter_chain_frees_programs(monkeypatch, get_solution_details):
+    # Only the program of the current sample is kept alive
+    problem_refs = []
+
+    def solve_sweep_chain(zhukovskii_glider, travel_angles, *args, **kwargs):
+        problem = get_collocation_problem(zhukovskii_glider, N=11)
+        problem_refs.append(weakref.ref(problem))
+        yield travel_angles[0], get_solution_details(), None, None, "solved"
+
+    monkeypatch.setattr(trajectory_generator, "solve_sweep_chain", solve_sweep_chain)
+    samples = [{"m": m, "w_ref": 12} for m in np.linspace(6, 10, 5)]
+    for _ in trajectory_generator.solve_parameter_chain(90.0, samples):
+        gc.collect()
+        assert sum(problem_ref() is not None for problem_ref in problem_refs) <= 1
+    gc.collect()
+    assert len(problem_refs) == 5
+    assert all(problem_ref() is None for problem_ref in problem_refs)
@@ -0,0 +1,74 @@
+import os
+import time
+import numpy as np
+
+from trajopt.direct_collocation import SolutionDetails
+from trajopt.solution_cache import SolutionCache, get_cache_key
+
+
+def get_solution(get_straight_solution, avg_speed):
+    # The cache stores the details as a dict, as solve returns them
+    solution_details, solution_trajectory = get_straight_solution(
+        90.0, avg_speed=avg_speed
+    )
+    return solution_details._asdict(), solution_trajectory
+
+
+def test_cache_key():
+    definition = {"phys_params": (8.5, 0.033), "travel_angle": 90}
+    assert get_cache_key(definition) == get_cache_key(
+        {"travel_angle": 90.0, "phys_params": (np.float64(8.5), 0.033)}
+    )
+    assert get_cache_key(definition) != get_cache_key(
+        {"phys_params": (8.5, 0.033), "travel_angle": 91}
+    )
+
+
+def test_solution_cache(tmp_path, get_straight_solution):
+    solution_cache = SolutionCache(str(tmp_path), max_entries=2)
+    assert solution_cache.get("a") is None
+
+    solution_cache.put("a", *get_solution(get_straight_solution, 1.0))
+    solution_details, solution_trajectory = solution_cache.get("a")
+    _, expected_trajectory = get_solution(get_straight_solution, 1.0)
+    for values, expected_values in zip(solution_trajectory, expected_trajectory):
+        assert np.array_equal(values, expected_values)
+
+    # The least recently used solution is evicted
+    solution_cache.put("b", *get_solution(get_straight_solution, 2.0))
+    past = time.time() - 10
+    os.utime(os.path.join(str(tmp_path), "b.npz"), (past, past))
+    solution_cache.put("c", *get_solution(get_straight_solution, 3.0))
+    assert sorted(solution_cache.get_keys()) == ["a", "c"]
+
+    solution_cache.invalidate("a")
+    assert solution_cache.get("a") is None
+    solution_cache.clear()
+    assert solution_cache.get_keys() == []
+
+
+def test_cached_details_rebuild_solution_details(tmp_path, get_solution_details):
+    # Details as a solve returns them, with numpy values and missing metrics
+    solution_details = get_solution_details(
+        avg_speed=np.float64(12.3456789),
+        period=np.float64(5.5),
+        iterations=np.int64(42),
+        solver="snopt",
+    )
+    solution_cache = SolutionCache(str(tmp_path))
+    solution_cache.put(
+        "a",
+        solution_details._asdict(),
+        (np.linspace(0, 1, 3), np.zeros((3, 6)), np.zeros((3, 3))),
+    )
+    cached_details = SolutionDetails(**solution_cache.get("a")[0])
+    assert np.isclose(cached_details.avg_speed, 12.3456789)
+    assert cached_details.iterations == 42
+    assert cached_details.solver == "snopt"
+    assert np.isnan(cached_details.constraint_violation)
+    for name, value in solution_details._asdict().items():
+        cached_value = getattr(cached_details, name)
+        if isinstance(value, str):
+            assert cached_value == value
+        else:
+            assert np.isclose(cached_value, value, equal_nan=True)
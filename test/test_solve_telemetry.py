@@ -0,0 +1,68 @@
+import numpy as np
+
+from trajopt.solve_telemetry import (
+    TelemetryLog,
+    get_telemetry_record,
+    summarize_telemetry,
+)
+
+
+def get_timed_details(get_solution_details, solve_time, retries=0):
+    return get_solution_details(
+        avg_speed=np.float64(20),
+        formulation_time=0.1,
+        solve_time=solve_time,
+        iterations=100,
+        retries=retries,
+        total_time=solve_time * (retries + 1),
+    )
+
+
+def test_telemetry_log(tmp_path, get_solution_details):
+    telemetry_log = TelemetryLog(str(tmp_path / "telemetry.jsonl"))
+    telemetry_log.add(
+        get_telemetry_record(90, get_timed_details(get_solution_details, 2), "solved")
+    )
+    telemetry_log.add(
+        get_telemetry_record(
+            100, get_timed_details(get_solution_details, 3, 1), "failed", m=8.5
+        )
+    )
+    # A record cut off by a crash
+    with open(telemetry_log.filename, "a") as f:
+        f.write('{"travel_angle": 1')
+
+    records = telemetry_log.load()
+    assert len(records) == 2
+    assert records[0]["avg_speed"] == 20
+    assert records[1]["m"] == 8.5
+    assert np.isnan(records[0]["constraint_violation"])
+
+
+def test_summarize_telemetry(get_solution_details):
+    records = [
+        get_telemetry_record(
+            angle, get_timed_details(get_solution_details, solve_time), "solved"
+        )
+        for angle, solve_time in zip(range(0, 100, 10), range(1, 11))
+    ]
+    records.append(
+        get_telemetry_record(
+            100, get_timed_details(get_solution_details, 20, 1), "solved"
+        )
+    )
+    records.append(
+        get_telemetry_record(
+            110, get_timed_details(get_solution_details, 30, 2), "failed"
+        )
+    )
+
+    summary = summarize_telemetry(records, n_slowest=2)
+    assert summary["n_records"] == 12
+    assert summary["n_solved"] == 11
+    assert summary["n_attempts"] == 15
+    assert summary["failure_rate"] == 4 / 15
+    assert summary["failure_rate_by_angle"]["100.0"] == 0.5
+    assert summary["failure_rate_by_angle"]["110.0"] == 1
+    assert summary["solve_time"]["p50"] == 6
+    assert summary["slowest_angles"] == [[110, 90], [100, 40]]
@@ -0,0 +1,49 @@
+import pytest
+
+import main
+import trajopt.trajectory_generator as trajectory_generator
+from trajopt.solver_config import DEFAULT_SOLVER_CONFIG, get_solver_option_values
+
+
+def test_solver_option_values():
+    assert get_solver_option_values(DEFAULT_SOLVER_CONFIG) == {}
+
+    solver_config = DEFAULT_SOLVER_CONFIG._replace(optimality_tol=1e-4, max_time=60)
+    assert get_solver_option_values(solver_config) == {
+        "Major optimality tolerance": 1e-4,
+        "Time limit": 60.0,
+    }
+    solver_config = solver_config._replace(solver="ipopt", max_iterations=100.0)
+    assert get_solver_option_values(solver_config) == {
+        "tol": 1e-4,
+        "max_iter": 100,
+        "max_wall_time": 60.0,
+    }
+
+    with pytest.raises(ValueError):
+        get_solver_option_values(DEFAULT_SOLVER_CONFIG._replace(solver="fmincon"))
+
+
+def test_preview_solver_config(tmp_path, monkeypatch, capsys):
+    assert (
+        trajectory_generator.get_preview_solver_config(DEFAULT_SOLVER_CONFIG)
+        == trajectory_generator.PREVIEW_SOLVER_CONFIG
+    )
+
+    # The solver options of the command line are passed to the preview, which
+    # keeps its relaxed tolerances otherwise
+    solver_configs = []
+
+    def preview_trajectory(*args, solver_config, **kwargs):
+        solver_configs.append(solver_config)
+        return True, None, None, "preview message"
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(trajectory_generator, "preview_trajectory", preview_trajectory)
+    main.main(["--preview", "--solver", "ipopt", "--max_iter", "50"])
+    assert solver_configs == [
+        trajectory_generator.PREVIEW_SOLVER_CONFIG._replace(
+            solver="ipopt", max_iterations=50
+        )
+    ]
+    assert capsys.readouterr().out == "preview message\n"
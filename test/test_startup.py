@@ -0,0 +1,45 @@
+import os
+import sys
+import json
+import subprocess
+
+from startup_benchmark import STARTUP_MODES, time_startup
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def get_imported_modules(code):
+    # Top level modules imported by the code in a fresh interpreter, apart
+    # from those imported at startup
+    code = (
+        "import sys, json\n"
+        + "modules = set(sys.modules)\n"
+        + code
+        + "\nprint(json.dumps(sorted(set(sys.modules) - modules)))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        stdout=subprocess.PIPE,
+        check=True,
+        cwd=REPO_DIR,
+        universal_newlines=True,
+    ).stdout
+    return set(module.split(".")[0] for module in json.loads(output.splitlines()[-1]))
+
+
+def test_light_startup():
+    # Parsing the arguments and clearing the cache do not load the solver
+    modules = get_imported_modules("import main\nimport trajopt.results")
+    assert "pydrake" not in modules
+    assert "matplotlib" not in modules
+
+
+def test_startup_benchmark_runs_main():
+    # -h takes the help path, not the exit for unknown options
+    _, exit_code, _ = time_startup(*STARTUP_MODES["help"])
+    assert exit_code is None
+    # The scheduler is started, but does not run
+    _, exit_code, _ = time_startup(*STARTUP_MODES["scheduler"])
+    assert exit_code is None
+    _, exit_code, _ = time_startup(["--unknown"], [])
+    assert exit_code == 2
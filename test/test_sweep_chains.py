@@ -0,0 +1,79 @@
+import os
+import signal
+import multiprocessing as mp
+import numpy as np
+import pytest
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from trajopt.trajectory_generator import (
+    get_sweep_chains,
+    split_sweep_chains,
+    _get_chain_results,
+)
+
+
+def test_split_sweep_chains():
+    chains = get_sweep_chains(10)
+    for n_chains in (1, 4, 6, 9):
+        split_chains = split_sweep_chains(chains, n_chains)
+        assert len(split_chains) == max(n_chains, len(chains))
+        # Every chain is split in consecutive parts, in the order of the chain
+        assert np.array_equal(np.hstack(split_chains), np.hstack(chains))
+        assert all(len(chain) > 0 for chain in split_chains)
+
+    split_chains = split_sweep_chains(chains, 5)
+    assert [chain[0] for chain in split_chains] == [280, 270, 220, 70, 80]
+    assert [chain[-1] for chain in split_chains] == [340, 230, 180, 10, 170]
+
+    # Chains of one angle can not be split further
+    split_chains = split_sweep_chains([np.array([10]), np.array([]), [20, 30]], 5)
+    assert [list(chain) for chain in split_chains] == [[10], [20], [30]]
+
+
+def _put_results(result_queue, results):
+    for result in results:
+        result_queue.put(result)
+    result_queue.put(None)
+
+
+def _kill_worker(result_queue):
+    result_queue.put("started")
+    os.kill(os.getpid(), signal.SIGKILL)
+
+
+def _raise_error(result_queue):
+    try:
+        result_queue.put("started")
+        raise ValueError("Solver error")
+    finally:
+        result_queue.put(None)
+
+
+def test_chain_results_surface_dead_worker():
+    manager = mp.Manager()
+    result_queue = manager.Queue()
+    try:
+        with ProcessPoolExecutor(2) as executor:
+            futures = [
+                executor.submit(_put_results, result_queue, [1, 2]),
+                executor.submit(_put_results, result_queue, [3]),
+            ]
+            results = _get_chain_results(futures, result_queue, poll_interval=0.1)
+            assert sorted(results) == [1, 2, 3]
+
+        with ProcessPoolExecutor(2) as executor:
+            futures = [executor.submit(_raise_error, result_queue)]
+            results = _get_chain_results(futures, result_queue, poll_interval=0.1)
+            assert next(results) == "started"
+            with pytest.raises(ValueError):
+                next(results)
+
+        with ProcessPoolExecutor(2) as executor:
+            futures = [executor.submit(_kill_worker, result_queue)]
+            results = _get_chain_results(futures, result_queue, poll_interval=0.1)
+            assert next(results) == "started"
+            with pytest.raises(BrokenProcessPool):
+                next(results)
+    finally:
+        manager.shutdown()
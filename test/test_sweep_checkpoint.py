@@ -0,0 +1,197 @@
+import os
+import json
+import numpy as np
+
+import trajopt.trajectory_generator as trajectory_generator
+from dynamics.zhukovskii_glider import RelativeZhukovskiiGlider
+from trajopt.results import (
+    SWEEP_CHECKPOINT_FILE,
+    SWEEP_PERIODS_FILE,
+    SWEEP_SPEEDS_FILE,
+)
+from trajopt.sweep_checkpoint import SweepCheckpoint
+
+
+def get_knots(value, N=5):
+    return (
+        np.linspace(0, 1, N),
+        np.full((N, 6), value, dtype=float),
+        np.full((N, 3), value, dtype=float),
+    )
+
+
+def test_checkpoint_round_trip(tmp_path, get_solution_details):
+    filename = str(tmp_path / "checkpoint.npz")
+    checkpoint = SweepCheckpoint(filename)
+    checkpoint.add_solution(
+        10, get_solution_details(avg_speed=12.5, period=7.0), get_knots(1)
+    )
+    checkpoint.add_solution(
+        20, get_solution_details(avg_speed=0, period=0), None, status="failed"
+    )
+    checkpoint.save()
+
+    checkpoint = SweepCheckpoint(filename)
+    assert checkpoint.is_completed(10)
+    assert not checkpoint.is_completed(20)
+    assert checkpoint.get_status(20) == "failed"
+    assert checkpoint.get_status(30) is None
+    assert checkpoint.get_completed_results() == ({10.0: 12.5}, {10.0: 7.0})
+    solved_knots = checkpoint.get_solved_knots()
+    assert list(solved_knots) == [10.0]
+    for array, loaded_array in zip(get_knots(1), solved_knots[10.0]):
+        assert np.array_equal(array, loaded_array)
+
+
+def test_checkpoint_journal(tmp_path, get_solution_details):
+    filename = str(tmp_path / "checkpoint.npz")
+    checkpoint = SweepCheckpoint(filename)
+    checkpoint.add_solution(
+        10, get_solution_details(avg_speed=1, period=1), get_knots(10)
+    )
+    checkpoint.save()
+
+    # Added angles are kept without saving, e.g. after a crash
+    checkpoint.add_solution(
+        20, get_solution_details(avg_speed=2, period=1), None, status="failed"
+    )
+    journal_sizes = [os.path.getsize(filename + ".journal")]
+    for travel_angle, avg_speed in [(20, 3), (30, 4)]:
+        checkpoint.add_solution(
+            travel_angle,
+            get_solution_details(avg_speed=avg_speed, period=1),
+            get_knots(travel_angle),
+        )
+        journal_sizes.append(os.path.getsize(filename + ".journal"))
+    # Every entry only writes itself
+    assert journal_sizes[2] - journal_sizes[1] == journal_sizes[1] - journal_sizes[0]
+    # The last entry is cut off by a crash
+    with open(filename + ".journal", "r+b") as f:
+        f.truncate(os.path.getsize(filename + ".journal") - 10)
+
+    checkpoint = SweepCheckpoint(filename)
+    assert checkpoint.get_completed_results() == (
+        {10.0: 1.0, 20.0: 3.0},
+        {10.0: 1.0, 20.0: 1.0},
+    )
+    assert checkpoint.get_status(30) is None
+    assert np.array_equal(checkpoint.get_solved_knots()[20.0][1], get_knots(20)[1])
+
+    # Loading compacts the journal into the file
+    assert not os.path.exists(filename + ".journal")
+    checkpoint = SweepCheckpoint(filename)
+    assert list(checkpoint.get_solved_knots()) == [10.0, 20.0]
+
+
+def test_nearest_knots_wrap_around(tmp_path, get_solution_details):
+    checkpoint = SweepCheckpoint(str(tmp_path / "checkpoint.npz"))
+    assert checkpoint.get_nearest_knots(10) is None
+    checkpoint.add_solution(
+        350, get_solution_details(avg_speed=1, period=1), get_knots(350)
+    )
+    checkpoint.add_solution(
+        30, get_solution_details(avg_speed=1, period=1), get_knots(30)
+    )
+    checkpoint.add_solution(
+        200, get_solution_details(avg_speed=1, period=1), None, status="failed"
+    )
+
+    assert checkpoint.get_nearest_knots(5)[1][0, 0] == 350
+    assert checkpoint.get_nearest_knots(15)[1][0, 0] == 30
+    # Failed angles have no knots, and are never used
+    assert checkpoint.get_nearest_knots(200)[1][0, 0] == 350
+    assert checkpoint.get_nearest_knots(100)[1][0, 0] == 30
+
+
+def test_import_sweep_results(tmp_path, get_solution_details):
+    speeds_filename = str(tmp_path / "speeds.json")
+    periods_filename = str(tmp_path / "periods.json")
+    with open(speeds_filename, "w") as f:
+        json.dump({"0.5": 11.0, "90.0": 12.0}, f)
+    with open(periods_filename, "w") as f:
+        json.dump({"0.5": 6.0, "90.0": 7.0}, f)
+
+    checkpoint = SweepCheckpoint(str(tmp_path / "checkpoint.npz"))
+    checkpoint.add_solution(
+        90, get_solution_details(avg_speed=13.0, period=8.0), get_knots(90)
+    )
+    checkpoint.import_sweep_results(speeds_filename, periods_filename)
+    assert checkpoint.get_status(0.5) == "imported"
+    assert checkpoint.is_completed(0.5)
+    # Solved angles are not overwritten, and imported angles have no knots
+    assert checkpoint.get_completed_results() == (
+        {0.5: 11.0, 90.0: 13.0},
+        {0.5: 6.0, 90.0: 8.0},
+    )
+    assert list(checkpoint.get_solved_knots()) == [90.0]
+
+    checkpoint = SweepCheckpoint(str(tmp_path / "radians.npz"))
+    checkpoint.import_sweep_results(speeds_filename, periods_filename, in_radians=True)
+    assert checkpoint.is_completed(0.5 * 180 / np.pi)
+
+
+def test_resume_skips_completed_angles(tmp_path, monkeypatch, get_solution_details):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs(os.path.join("results", "plots"))
+    checkpoint = SweepCheckpoint(SWEEP_CHECKPOINT_FILE)
+    checkpoint.add_solution(
+        280, get_solution_details(avg_speed=1, period=1), get_knots(280)
+    )
+    checkpoint.add_solution(
+        290, get_solution_details(avg_speed=1, period=1), get_knots(290)
+    )
+    checkpoint.add_solution(
+        300, get_solution_details(avg_speed=1, period=1), None, status="failed"
+    )
+    checkpoint.save()
+
+    # Only the chains are recorded, nothing is solved
+    runs = []
+
+    def run_sweep_chains(phys_params, chains, *args, **kwargs):
+        runs.append((chains, kwargs["initial_knots"]))
+        return iter([])
+
+    monkeypatch.setattr(trajectory_generator, "run_sweep_chains", run_sweep_chains)
+    monkeypatch.setattr(trajectory_generator, "find_dimless_reuse", lambda *args: None)
+    monkeypatch.setattr(
+        trajectory_generator,
+        "reuse_dimless_sweep_results",
+        lambda glider, checkpoint, store, chains: chains,
+    )
+    monkeypatch.setattr(
+        trajectory_generator, "update_warm_start_library", lambda *args: None
+    )
+    monkeypatch.setattr(
+        trajectory_generator, "write_telemetry_summary", lambda *args: None
+    )
+
+    phys_params = RelativeZhukovskiiGlider().get_phys_params()
+    trajectory_generator.sweep_calculation(phys_params, 0, n_angles=36, resume=True)
+    (chains, initial_knots) = runs[0]
+    angles = np.hstack(chains)
+    assert 280 not in angles and 290 not in angles
+    # Failed angles are solved again
+    assert 300 in angles
+    assert len(angles) == len(np.hstack(trajectory_generator.get_sweep_chains(10))) - 2
+    # The chain starts from the nearest solved angle
+    assert chains[0][0] == 300
+    assert initial_knots[0][1][0, 0] == 290
+
+    # Without resume, the checkpoint is cleared
+    trajectory_generator.sweep_calculation(phys_params, 0, n_angles=36)
+    assert 280 in np.hstack(runs[1][0])
+
+
+def test_resume_imports_json_results(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs(os.path.join("results", "plots"))
+    with open(SWEEP_SPEEDS_FILE, "w") as f:
+        json.dump({"280.0": 11.0}, f)
+    with open(SWEEP_PERIODS_FILE, "w") as f:
+        json.dump({"280.0": 6.0}, f)
+
+    checkpoint, _ = trajectory_generator.open_sweep_results(resume=True)
+    assert checkpoint.get_status(280) == "imported"
+    checkpoint, _ = trajectory_generator.open_sweep_results(resume=False)
+    assert checkpoint.get_status(280) is None
@@ -0,0 +1,111 @@
+import numpy as np
+
+from trajopt.sweep_recovery import (
+    DEFAULT_RECOVERY_CONFIG,
+    get_recovery_attempts,
+    get_race_starts,
+    interpolate_knots,
+)
+
+
+def get_knots(period, value, N=11):
+    sample_times = np.linspace(0, period, N)
+    return (
+        sample_times,
+        np.full((N, 6), value) + sample_times[:, None] / period,
+        np.full((N, 3), value),
+    )
+
+
+def test_interpolate_knots():
+    knots_0 = get_knots(2.0, 0.0)
+    knots_1 = get_knots(4.0, 1.0, N=21)
+    sample_times, x_knots, u_knots = interpolate_knots(knots_0, knots_1, 0.25)
+    assert np.allclose(sample_times, np.linspace(0, 2.5, 11))
+    assert np.allclose(x_knots[:, 0], 0.25 + np.linspace(0, 1, 11))
+    assert np.allclose(u_knots, 0.25)
+
+
+def test_recovery_schedule():
+    previous_knots = get_knots(2.0, 0.0)
+    solved_knots = {10.0: previous_knots, 30.0: get_knots(3.0, 1.0)}
+    attempts = get_recovery_attempts(
+        DEFAULT_RECOVERY_CONFIG._replace(max_attempts=20),
+        20.0,
+        previous_knots,
+        solved_knots,
+        period_guess=7,
+        avg_vel_guess=10,
+    )
+    steps = [attempt.step for attempt in attempts]
+    assert steps == [
+        "previous",
+        "neighbours",
+        "interpolated",
+        "perturbed_period",
+        "perturbed_period",
+        "straight_line",
+        "straight_line",
+        "straight_line",
+    ]
+    # The previous solution is not retried as a neighbour
+    assert attempts[1].source == "neighbour 30.0"
+    assert [attempt.period_guess for attempt in attempts[3:5]] == [5.25, 10.5]
+    assert attempts[-1].knots is None
+
+    attempts = get_recovery_attempts(
+        DEFAULT_RECOVERY_CONFIG, 20.0, None, dict(), period_guess=7, avg_vel_guess=10
+    )
+    assert np.allclose([attempt.avg_vel_guess for attempt in attempts], [10, 9, 8.1])
+    assert len(attempts) <= DEFAULT_RECOVERY_CONFIG.max_attempts
+
+
+def test_race_starts():
+    attempts = get_race_starts(7, 8.0, 20.0, warm_start=(get_knots(2.0, 0.0), "stored"))
+    assert [attempt.source for attempt in attempts] == ["stored"] * 5 + [
+        "straight line"
+    ] * 2
+    assert [attempt.period_guess for attempt in attempts] == [8, 6, 12, 4, 16, 8, 6]
+    assert all(attempt.avg_vel_guess == 20 for attempt in attempts)
+
+    attempts = get_race_starts(20, 8.0, 20.0)
+    assert len(attempts) == 15
+    assert len(set((a.period_guess, a.avg_vel_guess) for a in attempts)) == 15
+
+
+def test_perturbed_period_attempts():
+    previous_knots = get_knots(2.0, 0.0)
+    attempts = get_recovery_attempts(
+        DEFAULT_RECOVERY_CONFIG._replace(schedule=("perturbed_period",)),
+        20.0,
+        previous_knots,
+        dict(),
+        period_guess=7,
+        avg_vel_guess=10,
+    )
+    assert len(attempts) == len(DEFAULT_RECOVERY_CONFIG.period_scales)
+    for attempt, scale in zip(attempts, DEFAULT_RECOVERY_CONFIG.period_scales):
+        sample_times, x_knots, u_knots = attempt.knots
+        # The guess itself is stretched, not only the period guess
+        assert not np.allclose(sample_times, previous_knots[0])
+        assert np.allclose(sample_times, scale * previous_knots[0])
+        assert np.allclose(x_knots, previous_knots[1])
+        assert np.allclose(u_knots, previous_knots[2])
+
+
+def test_recovery_always_has_an_attempt():
+    previous_knots = get_knots(2.0, 0.0)
+    for config in (
+        DEFAULT_RECOVERY_CONFIG._replace(max_attempts=0),
+        DEFAULT_RECOVERY_CONFIG._replace(schedule=()),
+    ):
+        attempts = get_recovery_attempts(
+            config, 20.0, previous_knots, dict(), period_guess=7, avg_vel_guess=10
+        )
+        assert [(a.step, a.source) for a in attempts] == [("previous", "previous")]
+        assert attempts[0].knots is previous_knots
+
+        attempts = get_recovery_attempts(
+            config, 20.0, None, dict(), period_guess=7, avg_vel_guess=10
+        )
+        assert [a.source for a in attempts] == ["straight line"]
@@ -0,0 +1,120 @@
+import os
+import logging
+import numpy as np
+
+import trajopt.trajectory_generator as trajectory_generator
+from dynamics.zhukovskii_glider import RelativeZhukovskiiGlider
+from trajopt.sweep_refinement import get_refinement_angles
+
+
+def test_refines_only_large_changes():
+    travel_angles = [0, 40, 80, 120]
+    avg_speeds = [10, 10.5, 20, 20.2]
+    periods = [5, 5, 5.2, 5.1]
+    refinement_angles = get_refinement_angles(
+        travel_angles, avg_speeds, periods, speed_tol=1, period_tol=1
+    )
+    assert refinement_angles == [60]
+
+
+def test_orders_by_change_and_respects_budget():
+    travel_angles = [0, 40, 80, 120]
+    avg_speeds = [10, 12, 20, 20]
+    periods = [5, 5, 5, 9]
+    refinement_angles = get_refinement_angles(
+        travel_angles, avg_speeds, periods, speed_tol=1, period_tol=1
+    )
+    assert refinement_angles == [60, 100, 20]
+    refinement_angles = get_refinement_angles(
+        travel_angles, avg_speeds, periods, speed_tol=1, period_tol=1, max_angles=1
+    )
+    assert refinement_angles == [60]
+
+
+def test_topology_change_and_min_increment():
+    travel_angles = np.array([0, 1.5, 40])
+    avg_speeds = np.array([10, 30, 10])
+    periods = np.array([5, 5, 5])
+    topologies = ["false", "false", "upper"]
+    refinement_angles = get_refinement_angles(
+        travel_angles,
+        avg_speeds,
+        periods,
+        topologies,
+        speed_tol=100,
+        period_tol=100,
+        min_angle_increment=1,
+    )
+    assert refinement_angles == [20.75]
+
+
+def test_wrap_around_interval():
+    travel_angles = [20, 180, 340]
+    avg_speeds = [10, 10, 20]
+    periods = [5, 5, 5]
+    refinement_angles = get_refinement_angles(
+        travel_angles, avg_speeds, periods, speed_tol=1, period_tol=1
+    )
+    assert refinement_angles == [260]
+    refinement_angles = get_refinement_angles(
+        travel_angles, avg_speeds, periods, speed_tol=1, period_tol=1, wrap_around=True
+    )
+    # The midpoint between 340 and 20 deg lies at 0 deg
+    assert refinement_angles == [260, 0]
+
+    refinement_angles = get_refinement_angles(
+        [300, 350], [10, 20], [5, 5], speed_tol=1, period_tol=1, wrap_around=True
+    )
+    assert refinement_angles == [325, 145]
+    assert get_refinement_angles([300], [10], [5], wrap_around=True) == []
+
+
+def _run_adaptive_sweep(
+    monkeypatch, get_solution_details, get_avg_speed, coarse_angles
+):
+    # Coarse angles are solved with the given avg speed, refinements fail
+    def run_sweep_chains(phys_params, chains, *args, **kwargs):
+        for travel_angle in np.hstack(chains):
+            solution_details = get_solution_details(
+                avg_speed=get_avg_speed(travel_angle)
+            )
+            if travel_angle not in coarse_angles:
+                yield travel_angle, solution_details, None, None, "failed"
+                continue
+            trajectory = (np.linspace(0, 5, 200), np.ones((200, 6)), np.ones((200, 3)))
+            yield travel_angle, solution_details, trajectory, None, "solved"
+
+    monkeypatch.setattr(trajectory_generator, "run_sweep_chains", run_sweep_chains)
+    monkeypatch.setattr(
+        trajectory_generator, "update_warm_start_library", lambda *args: None
+    )
+    trajectory_generator.adaptive_sweep_calculation(
+        RelativeZhukovskiiGlider().get_phys_params(), n_initial_angles=9
+    )
+
+
+def test_adaptive_sweep_converged_log(
+    tmp_path, monkeypatch, caplog, get_solution_details
+):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs(os.path.join("results", "plots"))
+    coarse_angles = np.hstack(trajectory_generator.get_sweep_chains(40))
+    caplog.set_level(logging.INFO)
+
+    _run_adaptive_sweep(
+        monkeypatch, get_solution_details, lambda angle: 10, coarse_angles
+    )
+    assert "Sweep converged" in caplog.text
+
+    # 320 deg differs from its neighbours at 280 and, across 0 deg, at 10 deg.
+    # Both midpoints fail.
+    caplog.clear()
+    _run_adaptive_sweep(
+        monkeypatch,
+        get_solution_details,
+        lambda angle: 20 if angle > 300 else 10,
+        coarse_angles,
+    )
+    assert "Sweep converged" not in caplog.text
+    assert "Refining sweep at angles [300.0, 345.0]" in caplog.text
+    assert "2 intervals above tolerance" in caplog.text
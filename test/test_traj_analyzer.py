@@ -0,0 +1,143 @@
+import numpy as np
+
+from dynamics.zhukovskii_glider import RelativeZhukovskiiGlider
+from analysis.traj_analyzer import (
+    _calc_finite_diff_third_order,
+    _calc_integral,
+    _calc_energy,
+    _calc_drag_param,
+    calc_energy_analysis,
+    calc_phys_values_from_traj,
+    do_energy_analysis,
+    N_INVALID_FINITE_DIFF,
+)
+
+
+def _get_random_traj(N=50):
+    rng = np.random.default_rng(0)
+    h = rng.uniform(1, 10, N)
+    v = rng.normal(size=(N, 3))
+    c = rng.normal(size=(N, 3))
+    return h, v, c
+
+
+def test_finite_diff_matches_dense_matrix():
+    N = 50
+    dt = 0.1
+    graph = np.sin(np.linspace(0, 3, N))
+    D = (
+        -11 / 6 * np.diag(np.ones(N), 0)
+        + 3 * np.diag(np.ones((N - 1)), 1)
+        - 3 / 2 * np.diag(np.ones((N - 2)), 2)
+        + 1 / 3 * np.diag(np.ones((N - 3)), 3)
+    ) / dt
+    assert np.allclose(_calc_finite_diff_third_order(graph, dt), D.dot(graph))
+
+
+def test_integral_matches_riemann_matrix():
+    N = 50
+    dt = 0.1
+    graph = np.cos(np.linspace(0, 3, N))
+    Riemann_matrix = np.tril(np.ones(N)) * dt
+    assert np.allclose(_calc_integral(graph, dt), Riemann_matrix.dot(graph))
+
+
+def test_row_reductions_match_dense_matrices():
+    h, v, c = _get_random_traj()
+    m, g = 8.5, 9.81
+    c_Dp, A, AR = 0.033, 0.65, 3.306 ** 2 / 0.65
+
+    E_kin, E_pot = _calc_energy(h, v, m, g)
+    assert np.allclose(E_kin, 0.5 * m * np.diag(v.dot(v.T)))
+    assert np.allclose(E_pot, m * g * h)
+
+    v_norm = np.sqrt(np.diag(v.dot(v.T)))
+    c_squared = np.diag(c.dot(c.T))
+    d = 0.5 * A * v_norm * c_Dp + (2 * c_squared) / (np.pi * AR * A * v_norm)
+    assert np.allclose(_calc_drag_param(v, c, c_Dp, A, AR), d)
+
+
+def test_energy_analysis_is_headless():
+    N = 100
+    times = np.linspace(0, 5, N)
+    h, v, c = _get_random_traj(N)
+    x_traj = np.hstack((np.zeros((N, 2)), -h.reshape((N, 1)), v))
+    phys_params = (8.5, 0.033, 0.65, 3.306, 1.255, 9.81, 3.306 ** 2 / 0.65)
+
+    energy_analysis = calc_energy_analysis(times, x_traj, c, phys_params)
+    assert energy_analysis.E_tot.shape == (N,)
+    assert np.isclose(
+        energy_analysis.total_E_dyn_active, energy_analysis.E_dyn_active[-1]
+    )
+
+
+def test_passive_total_skips_invalid_finite_differences():
+    N = 100
+    times = np.linspace(0, 5, N)
+    h, v, c = _get_random_traj(N)
+    x_traj = np.hstack((np.zeros((N, 2)), -h.reshape((N, 1)), v))
+    phys_params = (8.5, 0.033, 0.65, 3.306, 1.255, 9.81, 3.306 ** 2 / 0.65)
+
+    energy_analysis = calc_energy_analysis(times, x_traj, c, phys_params)
+    dt = times[1] - times[0]
+    valid = N - N_INVALID_FINITE_DIFF
+    assert np.isclose(
+        energy_analysis.total_E_dyn_passive,
+        np.sum(energy_analysis.S_dyn_passive[:valid]) * dt,
+    )
+    assert np.isclose(
+        energy_analysis.total_E_dissipated,
+        np.sum(energy_analysis.P_dissipated) * dt,
+    )
+
+
+def test_energy_analysis_without_plot_opens_no_figure(monkeypatch):
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    def fail(*args, **kwargs):
+        raise AssertionError("plt was used without plot")
+
+    monkeypatch.setattr(plt, "figure", fail)
+    monkeypatch.setattr(plt, "show", fail)
+    monkeypatch.setattr(plt, "subplots", fail)
+
+    N = 100
+    times = np.linspace(0, 5, N)
+    h, v, c = _get_random_traj(N)
+    x_traj = np.hstack((np.zeros((N, 2)), -h.reshape((N, 1)), v))
+    phys_params = (8.5, 0.033, 0.65, 3.306, 1.255, 9.81, 3.306 ** 2 / 0.65)
+    n_figures = len(plt.get_fignums())
+    E_gained, v_abs = do_energy_analysis(times, x_traj, c, phys_params, plot=False)
+    assert E_gained.shape == (N,)
+    assert len(plt.get_fignums()) == n_figures
+
+
+def test_phys_values_match_per_knot_calculation():
+    N = 200
+    rng = np.random.default_rng(0)
+    x_knots = rng.normal(size=(N, 6)) * 10
+    u_knots = rng.normal(size=(N, 3)) * 5
+    zhukovskii_glider = RelativeZhukovskiiGlider()
+    phys_params = zhukovskii_glider.get_phys_params()
+    (m, c_Dp, A, b, rho, g, AR) = phys_params
+
+    phys_values = calc_phys_values_from_traj(
+        zhukovskii_glider, phys_params, x_knots, u_knots
+    )
+    assert all(values.shape == (N, 1) for values in phys_values)
+
+    # The scalar calculation for every knot, as before vectorization
+    for k in range(N):
+        v_r = x_knots[k, 3:6]
+        c = u_knots[k, :]
+        gamma = np.arcsin(-v_r[2] / np.linalg.norm(v_r))
+        phi = np.arcsin(c[2] / np.linalg.norm(c) * np.cos(gamma))
+        psi = np.arctan2(v_r[1], v_r[0])
+        c_l = np.linalg.norm(c) / (0.5 * A * np.linalg.norm(v_r))
+        n = rho * np.linalg.norm(c) * np.linalg.norm(v_r) / (m * g)
+        assert np.allclose(
+            [values[k, 0] for values in phys_values], [phi, gamma, psi, c_l, n]
+        )
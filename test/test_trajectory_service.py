@@ -0,0 +1,89 @@
+import gc
+import json
+import threading
+import weakref
+import urllib.error
+import urllib.request
+import pytest
+from collections import OrderedDict
+from http.server import ThreadingHTTPServer
+
+import trajopt.direct_collocation as direct_collocation
+import trajopt.trajectory_service as trajectory_service
+from trajopt.trajectory_service import (
+    SERVICE_HOST,
+    TrajectoryService,
+    get_service_glider,
+    get_service_handler,
+    parse_request,
+)
+
+
+def test_parse_request():
+    request = parse_request(
+        {"travel_angle": 90, "params": {"m": 9}, "constraints": {"min_height": 1}}
+    )
+    assert request["params"] == {"m": 9, "min_height": 1}
+    assert request["n_points"] == request["N"] == 31
+    assert request["solver_config"]["solver"] == "snopt"
+
+    request = parse_request({"travel_angle": 90, "solver_config": {"max_time": 5}})
+    assert request["solver_config"]["max_time"] == 5
+    assert parse_request({"travel_angle": 90})["solver_config"]["max_time"] is None
+
+    for request in (
+        {},
+        {"travel_angle": 90, "angle": 90},
+        {"travel_angle": 90, "params": {"mass": 9}},
+        {"travel_angle": 90, "solver_config": {"tol": 1e-3}},
+    ):
+        with pytest.raises(ValueError):
+            parse_request(request)
+
+
+def test_service_gliders_free_evicted_programs(monkeypatch):
+    monkeypatch.setattr(trajectory_service, "MAX_SERVICE_GLIDERS", 2)
+    monkeypatch.setattr(trajectory_service, "_service_gliders", OrderedDict())
+    problem_refs = []
+    for m in [6, 7, 8, 9, 10]:
+        zhukovskii_glider = get_service_glider({"m": m})
+        assert get_service_glider({"m": m}) is zhukovskii_glider
+        problem = direct_collocation.get_collocation_problem(zhukovskii_glider, N=11)
+        problem_refs.append(weakref.ref(problem))
+    del zhukovskii_glider, problem
+    gc.collect()
+
+    # Only the programs of the last two gliders are kept
+    is_alive = [problem_ref() is not None for problem_ref in problem_refs]
+    assert is_alive == [False] * 3 + [True] * 2
+    masses = [glider.m for glider in direct_collocation._collocation_problems.keys()]
+    assert not any(m in masses for m in [6, 7, 8])
+
+
+def test_service_requests(tmp_path):
+    service = TrajectoryService(
+        1,
+        str(tmp_path / "warm_starts"),
+        str(tmp_path / "cache"),
+        str(tmp_path / "telemetry.jsonl"),
+    )
+    server = ThreadingHTTPServer((SERVICE_HOST, 0), get_service_handler(service))
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    url = "http://{0}:{1}".format(SERVICE_HOST, server.server_address[1])
+    try:
+        with urllib.request.urlopen(url + "/status") as response:
+            assert json.loads(response.read())["n_workers"] == 1
+
+        # A request without travel angle
+        http_request = urllib.request.Request(
+            url + "/solve", data=json.dumps({"period_guess": 7}).encode()
+        )
+        with pytest.raises(urllib.error.HTTPError) as e:
+            urllib.request.urlopen(http_request)
+        assert e.value.code == 400
+        assert json.loads(e.value.read())["type"] == "error"
+    finally:
+        server.shutdown()
+        server.server_close()
+        service.close()
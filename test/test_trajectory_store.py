@@ -0,0 +1,62 @@
+import os
+import numpy as np
+
+from trajopt.trajectory_store import TrajectoryStore
+
+
+def test_store_roundtrip(tmp_path, get_straight_solution):
+    filename = str(tmp_path / "trajectories.npy")
+    trajectory_store = TrajectoryStore(filename)
+    for travel_angle in [90.0, 10.0, 45.0]:
+        trajectory_store.add(
+            travel_angle, *get_straight_solution(travel_angle, avg_speed=5)
+        )
+    # Replacing an angle keeps one record per angle
+    trajectory_store.add(45.0, *get_straight_solution(45.0, avg_speed=4.5))
+    # Failed angles are stored without trajectory, and are not results
+    solution_details, _ = get_straight_solution(60.0)
+    trajectory_store.add(60.0, solution_details, None, status="failed")
+    trajectory_store.save()
+
+    loaded_store = TrajectoryStore(filename, mmap=True)
+    assert np.allclose(loaded_store.get_angles(), [10.0, 45.0, 60.0, 90.0])
+    assert loaded_store.get(30.0) is None
+    assert loaded_store.get(60.0)["status"] == "failed"
+
+    # The trajectory is returned as it was solved
+    _, expected_trajectory = get_straight_solution(90.0, avg_speed=5)
+    for values, expected_values in zip(
+        loaded_store.get_trajectory(90.0), expected_trajectory
+    ):
+        assert np.array_equal(values, expected_values)
+
+    solution_avg_speeds, solution_periods = loaded_store.get_results()
+    assert solution_avg_speeds == {10.0: 5, 45.0: 4.5, 90.0: 5}
+    assert solution_periods[10.0] == 5
+
+
+def test_store_journal(tmp_path, get_straight_solution):
+    filename = str(tmp_path / "trajectories.npy")
+    trajectory_store = TrajectoryStore(filename)
+    trajectory_store.add(10.0, *get_straight_solution(10.0, avg_speed=1))
+    trajectory_store.save()
+
+    # Added records are kept without saving, e.g. after a crash
+    trajectory_store.add(90.0, *get_straight_solution(90.0))
+    trajectory_store.add(10.0, *get_straight_solution(10.0, avg_speed=2))
+    journal_size = os.path.getsize(filename + ".journal")
+    assert journal_size == 2 * trajectory_store.records.dtype.itemsize
+    with open(filename + ".journal", "ab") as f:
+        f.write(b"cut off")
+
+    loaded_store = TrajectoryStore(filename)
+    assert np.allclose(loaded_store.get_angles(), [10.0, 90.0])
+    # The last record of an angle replaces the earlier ones
+    assert loaded_store.get(10.0)["avg_speed"] == 2.0
+
+    # Saving merges the journal into the file
+    loaded_store.save()
+    assert not os.path.exists(filename + ".journal")
+    loaded_store = TrajectoryStore(filename, mmap=True)
+    assert np.allclose(loaded_store.get_angles(), [10.0, 90.0])
+    assert loaded_store.get(10.0)["avg_speed"] == 2.0
@@ -0,0 +1,80 @@
+import numpy as np
+
+from dynamics.zhukovskii_glider import RelativeZhukovskiiGlider
+from dynamics.wind_models import set_wind_params, DEFAULT_WIND_PARAMS
+from trajopt.warm_start_library import WarmStartLibrary, rotate_knots
+
+
+def get_knots(travel_angle, N=11):
+    # Straight line towards travel_angle
+    sample_times = np.linspace(0, 2, N)
+    dir_vector = np.array(
+        [np.sin(travel_angle * np.pi / 180), np.cos(travel_angle * np.pi / 180)]
+    )
+    x_knots = np.zeros((N, 6))
+    x_knots[:, 0:2] = np.outer(sample_times, dir_vector)
+    x_knots[:, 2] = 1
+    x_knots[:, 3:5] = dir_vector
+    u_knots = np.zeros((N, 3))
+    u_knots[:, 0:2] = dir_vector
+    return sample_times, x_knots, u_knots
+
+
+def test_rotate_knots():
+    _, x_knots, u_knots = rotate_knots(get_knots(30), 45)
+    _, x_expected, u_expected = get_knots(75)
+    assert np.allclose(x_knots, x_expected)
+    assert np.allclose(u_knots, u_expected)
+
+
+def test_warm_start_library(tmp_path):
+    zhukovskii_glider = RelativeZhukovskiiGlider()
+    warm_start_library = WarmStartLibrary(str(tmp_path), zhukovskii_glider)
+    assert warm_start_library.get_knots(90) is None
+    warm_start_library.add(80, get_knots(80))
+    warm_start_library.add(100, get_knots(100))
+    warm_start_library.save()
+
+    warm_start_library = WarmStartLibrary(str(tmp_path), zhukovskii_glider)
+    knots, source = warm_start_library.get_knots(90)
+    assert source == "interpolated 80.0 and 100.0"
+    assert np.allclose(knots[1], get_knots(90)[1])
+    knots, source = warm_start_library.get_knots(110)
+    assert source == "rotated 100.0"
+    assert np.allclose(knots[1], get_knots(110)[1])
+    assert warm_start_library.get_knots(270) is None
+
+    # Other gliders do not share solutions
+    other_glider = RelativeZhukovskiiGlider(m=10)
+    assert WarmStartLibrary(str(tmp_path), other_glider).get_knots(90) is None
+
+
+def test_warm_start_library_wind(tmp_path):
+    zhukovskii_glider = RelativeZhukovskiiGlider()
+    warm_start_library = WarmStartLibrary(str(tmp_path), zhukovskii_glider)
+    warm_start_library.add(90, get_knots(90))
+    warm_start_library.save()
+    dimless_problem = warm_start_library.dimless_problem
+
+    # Solutions under another wind are not shared
+    try:
+        set_wind_params(w_ref=DEFAULT_WIND_PARAMS["w_ref"] * 1.5)
+        other_library = WarmStartLibrary(str(tmp_path), zhukovskii_glider)
+        assert other_library.key != warm_start_library.key
+        assert other_library.get_knots(90) is None
+    finally:
+        set_wind_params(**DEFAULT_WIND_PARAMS)
+
+    # Every entry keeps the dimless problem it was solved for
+    warm_start_library = WarmStartLibrary(str(tmp_path), key=warm_start_library.key)
+    warm_start_library.dimless_problem = (
+        dimless_problem[0] * 2,
+        dimless_problem[1],
+    )
+    warm_start_library.add(100, get_knots(100))
+    warm_start_library.save()
+    warm_start_library = WarmStartLibrary(str(tmp_path), key=warm_start_library.key)
+    assert np.allclose(warm_start_library.dimless_problems[90][0], dimless_problem[0])
+    assert np.allclose(
+        warm_start_library.dimless_problems[100][0], dimless_problem[0] * 2
+    )
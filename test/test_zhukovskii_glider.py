@@ -0,0 +1,77 @@
+import numpy as np
+from pydrake.autodiffutils import InitializeAutoDiff, ExtractGradient
+
+from dynamics.zhukovskii_glider import RelativeZhukovskiiGlider
+
+
+def _get_random_states(n_states=20):
+    rng = np.random.default_rng(0)
+    x = rng.normal(size=(n_states, 6))
+    x[:, 2] = rng.uniform(0.1, 5, n_states)  # Dimless height above ground
+    u = rng.normal(size=(n_states, 3))
+    return x, u
+
+
+def _calc_finite_diff_jacobian(zhukovskii_glider, x, u, delta=1e-6):
+    x_and_u = np.concatenate((x, u))
+    J = np.zeros((6, 9))
+    for i in range(9):
+        e = np.zeros(9)
+        e[i] = delta
+        f_plus = zhukovskii_glider.continuous_dynamics_dimless(
+            (x_and_u + e)[0:6], (x_and_u + e)[6:9]
+        )
+        f_minus = zhukovskii_glider.continuous_dynamics_dimless(
+            (x_and_u - e)[0:6], (x_and_u - e)[6:9]
+        )
+        J[:, i] = (f_plus - f_minus) / (2 * delta)
+    return J
+
+
+def test_dynamics_jacobian_finite_diff():
+    zhukovskii_glider = RelativeZhukovskiiGlider()
+    x_states, u_inputs = _get_random_states()
+    for x, u in zip(x_states, u_inputs):
+        J = zhukovskii_glider.continuous_dynamics_jacobian_dimless(x, u)
+        J_finite_diff = _calc_finite_diff_jacobian(zhukovskii_glider, x, u)
+        assert J.shape == (6, 9)
+        assert np.allclose(J, J_finite_diff, rtol=1e-5, atol=1e-6)
+
+
+def test_drake_plant_uses_jacobian():
+    zhukovskii_glider = RelativeZhukovskiiGlider()
+    plant = zhukovskii_glider.create_drake_plant().ToAutoDiffXd()
+    context = plant.CreateDefaultContext()
+    x_states, u_inputs = _get_random_states(n_states=3)
+    for x, u in zip(x_states, u_inputs):
+        x_and_u = InitializeAutoDiff(np.concatenate((x, u))).flatten()
+        context.SetContinuousState(x_and_u[0:6])
+        plant.get_input_port(0).FixValue(context, x_and_u[6:9])
+        x_dot = plant.EvalTimeDerivatives(context).CopyToVector()
+
+        x_dot_value = np.array([x_dot_i.value() for x_dot_i in x_dot])
+        assert np.allclose(
+            x_dot_value, zhukovskii_glider.continuous_dynamics_dimless(x, u)
+        )
+        assert np.allclose(
+            ExtractGradient(x_dot),
+            zhukovskii_glider.continuous_dynamics_jacobian_dimless(x, u),
+        )
+
+
+def test_batch_dynamics_matches_single_state():
+    zhukovskii_glider = RelativeZhukovskiiGlider()
+    x_states, u_inputs = _get_random_states()
+    x_states[0, 2] = 0  # Below ground, i.e. no wind
+
+    x_dots = zhukovskii_glider.continuous_dynamics_dimless_batch(x_states, u_inputs)
+    Js = zhukovskii_glider.continuous_dynamics_jacobian_dimless_batch(
+        x_states, u_inputs
+    )
+    assert x_dots.shape == (x_states.shape[0], 6)
+    assert Js.shape == (x_states.shape[0], 6, 9)
+    for x, u, x_dot, J in zip(x_states, u_inputs, x_dots, Js):
+        assert np.allclose(x_dot, zhukovskii_glider.continuous_dynamics_dimless(x, u))
+        assert np.allclose(
+            J, zhukovskii_glider.continuous_dynamics_jacobian_dimless(x, u)
+        )
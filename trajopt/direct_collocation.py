@@ -1,5 +1,7 @@
 import time
+import weakref
 import logging as log
+from collections import namedtuple
 import numpy as np
 from pydrake.all import (
     eq,
@@ -14,6 +16,53 @@ from pydrake.all import (
     DiagramBuilder,
     LogOutput,
 )
+from pydrake.autodiffutils import AutoDiffXd, ExtractValue, ExtractGradient
+from dynamics.wind_models import get_wind_vector
+from trajopt.solver_config import (
+    DEFAULT_SOLVER_CONFIG,
+    solve_with_config,
+    get_exit_status,
+)
+
+# The fields after solve_time default to unknown for solutions stored
+# before they existed. retries, warm_start and total_time are set by the
+# sweeps, for all attempts at an angle.
+SolutionDetails = namedtuple(
+    "SolutionDetails",
+    [
+        "avg_speed",
+        "period",
+        "limited_by_time_step",
+        "cost",
+        "formulation_time",
+        "solve_time",
+        "solver",
+        "iterations",
+        "exit_status",
+        "reconstruction_time",
+        "constraint_violation",
+        "retries",
+        "warm_start",
+        "total_time",
+    ],
+    defaults=("unknown", -1, "unknown", np.nan, np.nan, 0, "unknown", np.nan),
+)
+
+MAX_VEL = 40  # m/s
+
+# Prebuilt problems, reused for every solve with the same glider. The
+# problems only hold weak references to their glider, so they are freed
+# together with it.
+_collocation_problems = weakref.WeakKeyDictionary()
+
+
+def get_collocation_problem(zhukovskii_glider, N=31, max_dt_scale=3):
+    problems = _collocation_problems.setdefault(zhukovskii_glider, dict())
+    if (N, max_dt_scale) not in problems:
+        problems[(N, max_dt_scale)] = DirectCollocationProblem(
+            zhukovskii_glider, N=N, max_dt_scale=max_dt_scale
+        )
+    return problems[(N, max_dt_scale)]
 
 
 def direct_collocation_relative(
@@ -25,14 +74,510 @@ def direct_collocation_relative(
     initial_guess=None,
     PRINT_GLIDER_DETAILS=False,
     PLOT_INITIAL_GUESS=False,
+    N=31,  # Collocation points
+    max_dt_scale=3,  # NOTE N=21 and max_dt_scale=1.5 speeds up the solver!
+    solver_config=DEFAULT_SOLVER_CONFIG,
+    N_plot=200,  # Points in solution_trajectory, N_plot=N returns the knots
+):
+    problem = get_collocation_problem(zhukovskii_glider, N, max_dt_scale)
+    return problem.solve(
+        travel_angle,
+        period_guess=period_guess,
+        avg_vel_scale_guess=avg_vel_scale_guess,
+        avg_vel_guess=avg_vel_guess,
+        initial_guess=initial_guess,
+        PLOT_INITIAL_GUESS=PLOT_INITIAL_GUESS,
+        solver_config=solver_config,
+        N_plot=N_plot,
+    )
+
+
+class DirectCollocationProblem:
+    # The program is formulated once. The travel angle, period bounds,
+    # initial state and initial guess are updated in place before every solve.
+    # NOTE the caller keeps zhukovskii_glider alive, the problem only holds
+    # a weak reference to it
+    def __init__(self, zhukovskii_glider, N=31, max_dt_scale=3):
+        start_time = time.time()
+
+        self.glider_ref = weakref.ref(zhukovskii_glider)
+        self.N = N
+        self.max_dt_scale = max_dt_scale
+
+        # Get model parameters
+        V_l, L, T, C = zhukovskii_glider.get_char_values()
+        A = zhukovskii_glider.get_wing_area()
+        # TODO neater way of passing params
+        (
+            max_bank_angle,
+            max_lift_coeff,
+            min_lift_coeff,
+            max_load_factor,
+            min_height,
+            max_height,
+            h0,
+            min_travelled_distance,
+        ) = zhukovskii_glider.get_constraints()
+
+        # Make all values dimless
+        max_lift_coeff *= V_l / C
+        min_height /= L
+        max_height /= L
+        min_travelled_distance /= L
+        h0 /= L
+        self.h0 = h0
+
+        ######
+        # DEFINE TRAJOPT PROBLEM
+        # Implemented as dimensionless
+        ######
+
+        # Time step bounds are set for every solve in set_period_guess
+        plant = zhukovskii_glider.create_drake_plant(keep_glider_alive=False)
+        context = plant.CreateDefaultContext()
+        dircol = DirectCollocation(
+            plant,
+            context,
+            num_time_samples=N,
+            minimum_timestep=0.1,
+            maximum_timestep=1,
+            # TODO add/find solution treshold
+        )
+        self.plant = plant
+        self.dircol = dircol
+        # Constrain all timesteps, h[k], to be equal,
+        # so the trajectory breaks are evenly distributed.
+        dircol.AddEqualTimeIntervalsConstraints()
+
+        # Keep the time step bounds added by DirectCollocation
+        time_step = dircol.timestep(0)[0]
+        self.time_step_bounds = next(
+            binding
+            for binding in dircol.bounding_box_constraints()
+            if any(var.EqualTo(time_step) for var in binding.variables())
+        )
+
+        ######
+        # ADD CONSTRAINTS
+        ######
+
+        ## Add input constraint
+        u = dircol.input()
+
+        # Brake param
+        enable_brake_param = u.shape[0] > 3
+        if enable_brake_param:
+            dircol.AddConstraintToAllKnotPoints(0 <= u[3])
+
+        ## Add state constraints
+        x = dircol.state()
+
+        # Max velocity constraint
+        max_vel = MAX_VEL / V_l
+        airspeed_squared = x[3:6].T.dot(x[3:6])
+        dircol.AddConstraintToAllKnotPoints(airspeed_squared <= max_vel ** 2)
+
+        # Lift coefficient constraint
+        lift_coeff_squared = u.T.dot(u) / ((0.5 * A) ** 2 * x[3:6].T.dot(x[3:6]))
+        dircol.AddConstraintToAllKnotPoints(lift_coeff_squared <= max_lift_coeff ** 2)
+        dircol.AddConstraintToAllKnotPoints(min_lift_coeff ** 2 <= lift_coeff_squared)
+
+        # Load factor constraint
+        load_factor_squared = x[3:6].T.dot(x[3:6]) * u.T.dot(u)
+        dircol.AddConstraintToAllKnotPoints(load_factor_squared <= max_load_factor ** 2)
+
+        # Height constraints
+        dircol.AddConstraintToAllKnotPoints(min_height <= x[2])
+        dircol.AddConstraintToAllKnotPoints(x[2] <= max_height)
+
+        # Bank angle constraint
+        max_sin_bank_angle_squared = np.sin(max_bank_angle) ** 2
+        sin_bank_angle_squared = u[2] ** 2 / (
+            u.T.dot(u) * (1 - x[5] ** 2 / (x[3:6].T.dot(x[3:6])))
+        )
+        dircol.AddConstraintToAllKnotPoints(
+            sin_bank_angle_squared <= max_sin_bank_angle_squared
+        )
+
+        # Initial state constraint
+        x0_pos = np.array([0, 0, h0])
+        self.initial_pos_constraint = dircol.AddBoundingBoxConstraint(
+            x0_pos, x0_pos, dircol.initial_state()[0:3]
+        )
+
+        ## Periodicity constraints
+        # Periodic height
+        dircol.AddLinearConstraint(dircol.final_state()[2] == dircol.initial_state()[2])
+
+        # Periodic velocities
+        dircol.AddLinearConstraint(dircol.final_state()[3] == dircol.initial_state()[3])
+        dircol.AddLinearConstraint(dircol.final_state()[4] == dircol.initial_state()[4])
+        dircol.AddLinearConstraint(dircol.final_state()[5] == dircol.initial_state()[5])
+
+        # Periodic inputs
+        dircol.AddLinearConstraint(dircol.input(0)[0] == dircol.input(N - 1)[0])
+        dircol.AddLinearConstraint(dircol.input(0)[1] == dircol.input(N - 1)[1])
+        dircol.AddLinearConstraint(dircol.input(0)[2] == dircol.input(N - 1)[2])
+
+        # Final position constraint in terms of travel angle,
+        # i.e. no final position perpendicular to the travel direction.
+        # The coefficients are set in set_travel_angle.
+        # NOTE initial horizontal position is constrained to zero
+        hor_pos_final = dircol.final_state()[0:2]
+        self.final_pos_constraint = dircol.AddLinearEqualityConstraint(
+            np.array([[1, 0]]), np.zeros(1), hor_pos_final
+        )
+
+        # Constraint covered distance along travel angle to be positive
+        self.min_travelled_distance = min_travelled_distance
+        self.travelled_distance_constraint = dircol.AddLinearConstraint(
+            np.array([[0, 1]]),
+            np.array([min_travelled_distance]),
+            np.array([np.inf]),
+            hor_pos_final,
+        )
+
+        ## Objective function
+        # Maximize average velocity travelled in desired direction
+        Q = 1
+        # NOTE the cost only holds dir_vector, which is updated in place.
+        # Drake keeps the cost alive from C++, so a reference to self would
+        # keep the problem alive forever.
+        dir_vector = np.array([0.0, 1.0])
+        self.dir_vector = dir_vector
+
+        def average_speed(vars):
+            # -Q * dir_vector^T p_f / (h * N)
+            hor_pos_final = vars[0:2]
+            time_step = vars[2]
+            avg_speed = dir_vector.dot(hor_pos_final) / (time_step * N)
+            gradient = np.empty(3)
+            gradient[0:2] = -Q * dir_vector / (time_step * N)
+            gradient[2] = Q * avg_speed / time_step
+            return -Q * avg_speed, gradient
+
+        dircol.AddCost(
+            _cost_with_gradient(average_speed),
+            vars=hor_pos_final.tolist() + [time_step],
+        )
+
+        # Cost on input effort
+        R = 0.01
+
+        # Constrain input rates
+        # Using 1st order forward finite differences, where the last
+        # knot point only sees -u[N-1]. Evaluated as differences
+        # instead of a dense N x N matrix, so it is O(N).
+        def input_rate(vars):
+            time_step = vars[0]
+            u = vars[1:].reshape(N, 3)
+            u_change = u[1:] - u[:-1]
+            u_change_squared = np.sum(u_change ** 2) + u[-1].dot(u[-1])
+
+            # D^T D u, with D the finite difference matrix
+            DTD_u = np.zeros((N, 3))
+            DTD_u[:-1] -= u_change
+            DTD_u[1:] += u_change
+            DTD_u[-1] += u[-1]
+
+            gradient = np.empty(1 + 3 * N)
+            gradient[0] = -R * u_change_squared / time_step ** 2
+            gradient[1:] = (2 * R / time_step) * DTD_u.ravel()
+            return R * u_change_squared / time_step, gradient
+
+        input_vars = (
+            np.vstack([dircol.input(i).reshape((3, 1)) for i in range(N)])
+            .flatten()
+            .tolist()
+        )
+        dircol.AddCost(_cost_with_gradient(input_rate), vars=[time_step] + input_vars)
+
+        self.build_time = time.time() - start_time
+        self.n_solves = 0
+        log.debug("\tBuilt trajopt template in: {0} s".format(self.build_time))
+        return
+
+    def set_travel_angle(self, travel_angle):
+        self.travel_angle = travel_angle
+        self.dir_vector[:] = [np.sin(travel_angle), np.cos(travel_angle)]
+
+        # cos(psi) * x_f - sin(psi) * y_f = 0
+        self.final_pos_constraint.evaluator().UpdateCoefficients(
+            np.array([[np.cos(travel_angle), -np.sin(travel_angle)]]), np.zeros(1)
+        )
+        # dir_vector^T p_f >= min_travelled_distance
+        self.travelled_distance_constraint.evaluator().UpdateCoefficients(
+            self.dir_vector.reshape((1, 2)),
+            np.array([self.min_travelled_distance]),
+            np.array([np.inf]),
+        )
+        return
+
+    def set_period_guess(self, period_guess):
+        # NOTE period_guess is dimless
+        self.min_dt = (period_guess / self.N) * 0.5
+        self.max_dt = (period_guess / self.N) * self.max_dt_scale
+        n_time_steps = self.N - 1
+        self.time_step_bounds.evaluator().set_bounds(
+            np.full(n_time_steps, self.min_dt), np.full(n_time_steps, self.max_dt)
+        )
+        return
+
+    def set_initial_height(self, h0):
+        # NOTE h0 is dimless
+        self.h0 = h0
+        x0_pos = np.array([0, 0, h0])
+        self.initial_pos_constraint.evaluator().set_bounds(x0_pos, x0_pos)
+        return
+
+    def solve(
+        self,
+        travel_angle,
+        period_guess=4,
+        avg_vel_scale_guess=1,
+        avg_vel_guess=None,
+        initial_guess=None,
+        PLOT_INITIAL_GUESS=False,
+        solver_config=DEFAULT_SOLVER_CONFIG,
+        N_plot=200,
+    ):
+        start_time = time.time()
+
+        zhukovskii_glider = self.glider_ref()
+        V_l, L, T, C = zhukovskii_glider.get_char_values()
+        N = self.N
+        dircol = self.dircol
+        h0 = self.h0
+
+        # Initial guess
+        if avg_vel_guess == None:
+            avg_vel_guess = V_l * avg_vel_scale_guess
+        total_dist_travelled_guess = avg_vel_guess * period_guess
+
+        log.info(
+            " *** Running DirCol for travel_angle: {0} deg".format(
+                travel_angle * 180 / np.pi
+            )
+        )
+
+        # Make all values dimless
+        total_dist_travelled_guess /= L
+        avg_vel_guess /= V_l
+        period_guess /= T
+
+        ######
+        # UPDATE TRAJOPT PROBLEM
+        ######
+
+        self.set_travel_angle(travel_angle)
+        self.set_period_guess(period_guess)
+        dir_vector = self.dir_vector
+        min_dt = self.min_dt
+        max_dt = self.max_dt
+
+        ######
+        # PROVIDE INITIAL GUESS
+        ######
+
+        # If no initial guess provided, use a straight line
+        if initial_guess == None:
+            log.debug("\tRunning with straight line as initial guess")
+            log.debug(
+                "\tperiod_guess: {0}, avg_vel_guess: {1}".format(
+                    period_guess * T, avg_vel_guess * V_l
+                )
+            )
+            x0_guess = np.array(
+                [
+                    0,
+                    0,
+                    h0,
+                    avg_vel_guess * dir_vector[0],
+                    avg_vel_guess * dir_vector[1],
+                    0,
+                ]
+            )
+
+            xf_guess = np.array(
+                [
+                    dir_vector[0] * total_dist_travelled_guess,
+                    dir_vector[1] * total_dist_travelled_guess,
+                    h0,
+                    avg_vel_guess * dir_vector[0],
+                    avg_vel_guess * dir_vector[1],
+                    0,
+                ]
+            )
+            # Linear interpolation
+            initial_x_trajectory = PiecewisePolynomial.FirstOrderHold(
+                [0.0, period_guess], np.column_stack((x0_guess, xf_guess))
+            )
+            dircol.SetInitialTrajectory(PiecewisePolynomial(), initial_x_trajectory)
+
+        # Use provided initial_guess
+        else:
+            log.debug(
+                "\tRunning with provided initial guess\n"
+                + "\t\tperiod_guess: {0}".format(period_guess * T)
+            )
+            initial_x_traj, initial_u_traj = initial_guess
+            dircol.SetInitialTrajectory(initial_u_traj, initial_x_traj)
+
+        if PLOT_INITIAL_GUESS:
+            times = np.linspace(
+                initial_x_trajectory.start_time(), initial_x_trajectory.end_time(), N
+            )
+            x0_knots = np.hstack([initial_x_trajectory.value(t) for t in times]).T
+            traj_plt = plot_trj_3_wind(x0_knots[:, 0:3], dir_vector)
+            plt.show()
+
+        #######
+        # SOLVE TRAJOPT PROBLEM
+        #######
+
+        # Only the first solve pays for building the program
+        formulate_time = time.time()
+        self.formulation_time = formulate_time - start_time
+        if self.n_solves == 0:
+            self.formulation_time += self.build_time
+        self.n_solves += 1
+        log.debug("\tFormulated trajopt in: {0} s".format(self.formulation_time))
+        result, iterations = solve_with_config(dircol, solver_config)
+        solve_time = time.time()
+        self.solve_time = solve_time - formulate_time
+        exit_status = get_exit_status(result)
+        log.debug(
+            "\t! Finished trajopt in: {0} s, {1} iterations of {2}, {3}".format(
+                self.solve_time, iterations, solver_config.solver, exit_status
+            )
+        )
+        # assert result.is_success()
+        found_solution = result.is_success()
+        constraint_violation = calc_constraint_violation(dircol, result)
+
+        if found_solution:
+            reconstruction_start_time = time.time()
+            x_traj_dimless = dircol.ReconstructStateTrajectory(result)
+            u_traj_dimless = dircol.ReconstructInputTrajectory(result)
+            sample_times = dircol.GetSampleTimes(result)
+
+            ## Reconstruct and re-scale trajectory
+            times, x_knots, u_knots = reconstruct_trajectory(
+                zhukovskii_glider, x_traj_dimless, u_traj_dimless, N_plot
+            )
+            reconstruction_time = time.time() - reconstruction_start_time
+
+            # Calculate solution properties
+            solution_period = x_traj_dimless.end_time() * T
+            solution_cost = result.get_optimal_cost()
+            solution_distance = dir_vector.T.dot(x_knots[-1, 0:2])
+            solution_avg_vel = solution_distance / solution_period
+
+            log.info(
+                "\t** Solution details:\n"
+                + "\t\tperiod: {0} (s)\n\t\tcost: {1}\n\t\tdistance: {2} (m) \n\t\tavg. vel: {3} (m/s)".format(
+                    solution_period, solution_cost, solution_distance, solution_avg_vel
+                )
+            )
+
+            # Check time step
+            time_step = sample_times[1] - sample_times[0]
+            log.debug("\tTime step: {0}".format(time_step))
+            log.debug("\tmin_dt: {0}, max_dt: {1}".format(min_dt, max_dt))
+
+            tol = 0.0001
+            limited_by_time_step = "false"
+            if abs(time_step - min_dt) < tol:
+                limited_by_time_step = "lower"
+            if abs(time_step - max_dt) < tol:
+                limited_by_time_step = "upper"
+
+            solution_details = SolutionDetails(
+                avg_speed=solution_avg_vel,
+                period=solution_period,
+                limited_by_time_step=limited_by_time_step,
+                cost=solution_cost,
+                formulation_time=self.formulation_time,
+                solve_time=self.solve_time,
+                solver=solver_config.solver,
+                iterations=iterations,
+                exit_status=exit_status,
+                reconstruction_time=reconstruction_time,
+                constraint_violation=constraint_violation,
+            )
+            solution_trajectory = (times, x_knots, u_knots)
+            next_initial_guess = (x_traj_dimless, u_traj_dimless)
+
+            return (
+                found_solution,
+                solution_details,
+                solution_trajectory,
+                next_initial_guess,
+            )
+
+        else:  # No solution
+            log.error(" Did not find a solution: {0}".format(exit_status))
+            solution_details = SolutionDetails(
+                avg_speed=-1,
+                period=-1,
+                limited_by_time_step=-1,
+                cost=-1,
+                formulation_time=self.formulation_time,
+                solve_time=self.solve_time,
+                solver=solver_config.solver,
+                iterations=iterations,
+                exit_status=exit_status,
+                constraint_violation=constraint_violation,
+            )
+            return found_solution, solution_details, None, None
+
+
+def calc_constraint_violation(prog, result):
+    # Largest violation of any constraint bound at the returned solution
+    max_violation = 0
+    for binding in prog.GetAllConstraints():
+        value = result.EvalBinding(binding)
+        constraint = binding.evaluator()
+        violation = np.max(
+            np.maximum(
+                constraint.lower_bound() - value, value - constraint.upper_bound()
+            ),
+            initial=0,
+        )
+        max_violation = max(max_violation, violation)
+    return float(max_violation)
+
+
+def reconstruct_trajectory(
+    zhukovskii_glider, x_traj_dimless, u_traj_dimless, N_plot=200
 ):
+    # Samples the dimless solution at N_plot points, and re-scales it
+    V_l, L, T, C = zhukovskii_glider.get_char_values()
+    times_dimless = np.linspace(
+        x_traj_dimless.start_time(), x_traj_dimless.end_time(), N_plot
+    )
+
+    x_knots_dimless = np.hstack([x_traj_dimless.value(t) for t in times_dimless]).T
+    p_knots = x_knots_dimless[:, 0:3] * L
+    v_r_knots = x_knots_dimless[:, 3:6] * V_l
+    x_knots = np.hstack((p_knots, v_r_knots))
+
+    times = times_dimless * T
 
-    start_time = time.time()
+    u_knots_dimless = np.hstack([u_traj_dimless.value(t) for t in times_dimless]).T
+    u_knots = u_knots_dimless * C
+    return times, x_knots, u_knots
 
-    # Get model parameters
+
+def get_dimless_problem(zhukovskii_glider):
+    # Returns (dimless_groups, dimless_bounds) of the dimless trajopt problem.
+    # dimless_groups determine the dimless dynamics and boundary conditions.
+    # dimless_bounds are the constraint bounds, in the order of
+    # calc_dimless_constraint_values. Gliders with the same dimless problem
+    # have the same dimless solutions, even when their dimensional
+    # parameters differ.
     V_l, L, T, C = zhukovskii_glider.get_char_values()
     A = zhukovskii_glider.get_wing_area()
-    # TODO neater way of passing params
     (
         max_bank_angle,
         max_lift_coeff,
@@ -44,305 +589,312 @@ def direct_collocation_relative(
         min_travelled_distance,
     ) = zhukovskii_glider.get_constraints()
 
-    # Initial guess
-    if avg_vel_guess == None:
-        avg_vel_guess = V_l * avg_vel_scale_guess
-    total_dist_travelled_guess = avg_vel_guess * period_guess
-
-    log.info(
-        " *** Running DirCol for travel_angle: {0} deg".format(
-            travel_angle * 180 / np.pi
-        )
-    )
-
-    # Make all values dimless
-    max_lift_coeff *= V_l / C
-    min_height /= L
-    max_height /= L
-    min_travelled_distance /= L
-    h0 /= L
-    total_dist_travelled_guess /= L
-    avg_vel_guess /= V_l
-    period_guess /= T
-
-    ######
-    # DEFINE TRAJOPT PROBLEM
-    # Implemented as dimensionless
-    ######
-
-    # Optimization params
-    N = 31  # Collocation points
-    min_dt = (period_guess / N) * 0.5
-    max_dt = (period_guess / N) * 3
-
-    fast_solve_time = False # NOTE set to true to speed up the solver!
-    if fast_solve_time:
-        N = 21
-        max_dt = (period_guess / N) * 1.5
-
-    plant = zhukovskii_glider.create_drake_plant()
-    context = plant.CreateDefaultContext()
-    dircol = DirectCollocation(
-        plant,
-        context,
-        num_time_samples=N,
-        minimum_timestep=min_dt,
-        maximum_timestep=max_dt,
-        # TODO add/find solution treshold
-    )
-    # Constrain all timesteps, h[k], to be equal,
-    # so the trajectory breaks are evenly distributed.
-    dircol.AddEqualTimeIntervalsConstraints()
-
-    ######
-    # ADD CONSTRAINTS
-    ######
-
-    ## Add input constraint
-    u = dircol.input()
-
-    # Brake param
-    enable_brake_param = u.shape[0] > 3
-    if enable_brake_param:
-        dircol.AddConstraintToAllKnotPoints(0 <= u[3])
-
-    ## Add state constraints
-    x = dircol.state()
-
-    # Max velocity constraint
-    max_vel = 40  # m/s
-    max_vel /= V_l
-    airspeed_squared = x[3:6].T.dot(x[3:6])
-    dircol.AddConstraintToAllKnotPoints(airspeed_squared <= max_vel ** 2)
-
-    # Lift coefficient constraint
-    lift_coeff_squared = u.T.dot(u) / ((0.5 * A) ** 2 * x[3:6].T.dot(x[3:6]))
-    dircol.AddConstraintToAllKnotPoints(lift_coeff_squared <= max_lift_coeff ** 2)
-    dircol.AddConstraintToAllKnotPoints(min_lift_coeff ** 2 <= lift_coeff_squared)
-
-    # Load factor constraint
-    load_factor_squared = x[3:6].T.dot(x[3:6]) * u.T.dot(u)
-    dircol.AddConstraintToAllKnotPoints(load_factor_squared <= max_load_factor ** 2)
-
-    # Height constraints
-    dircol.AddConstraintToAllKnotPoints(min_height <= x[2])
-    dircol.AddConstraintToAllKnotPoints(x[2] <= max_height)
-
-    # Bank angle constraint
-    max_sin_bank_angle_squared = np.sin(max_bank_angle) ** 2
-    sin_bank_angle_squared = u[2] ** 2 / (
-        u.T.dot(u) * (1 - x[5] ** 2 / (x[3:6].T.dot(x[3:6])))
-    )
-    dircol.AddConstraintToAllKnotPoints(
-        sin_bank_angle_squared <= max_sin_bank_angle_squared
+    # Sample the dimless wind profile around the initial height
+    wind_heights = h0 * np.array([0.1, 0.2, 0.5, 1, 2, 4, 8])
+    dimless_wind = [-get_wind_vector(h)[1] / V_l for h in wind_heights]
+    dimless_groups = np.array(
+        [zhukovskii_glider.Lam, h0 / L, min_travelled_distance / L] + dimless_wind
     )
 
-    # Initial state constraint
-    x0_pos = np.array([0, 0, h0])
-    dircol.AddBoundingBoxConstraint(x0_pos, x0_pos, dircol.initial_state()[0:3])
-
-    ## Periodicity constraints
-    # Periodic height
-    dircol.AddLinearConstraint(dircol.final_state()[2] == dircol.initial_state()[2])
-
-    # Periodic velocities
-    dircol.AddLinearConstraint(dircol.final_state()[3] == dircol.initial_state()[3])
-    dircol.AddLinearConstraint(dircol.final_state()[4] == dircol.initial_state()[4])
-    dircol.AddLinearConstraint(dircol.final_state()[5] == dircol.initial_state()[5])
-
-    # Periodic inputs
-    dircol.AddLinearConstraint(dircol.input(0)[0] == dircol.input(N - 1)[0])
-    dircol.AddLinearConstraint(dircol.input(0)[1] == dircol.input(N - 1)[1])
-    dircol.AddLinearConstraint(dircol.input(0)[2] == dircol.input(N - 1)[2])
-
-    # Final position constraint in terms of travel angle
-    if travel_angle % np.pi == 0:
-        # Travel along y-axis, constrain x values to be equal
-        dircol.AddConstraint(dircol.final_state()[0] == dircol.initial_state()[0])
-    elif travel_angle % ((1 / 2) * np.pi) == 0:
-        # Travel along x-axis, constrain y values to be equal
-        dircol.AddConstraint(dircol.final_state()[1] == dircol.initial_state()[1])
-    else:
-        dircol.AddConstraint(
-            dircol.final_state()[0] == dircol.final_state()[1] * np.tan(travel_angle)
-        )
-
-    #    # Constraint covered distance along travel angle to be positive
-    hor_pos_final = dircol.final_state()[0:2]
-    dir_vector = np.array([np.sin(travel_angle), np.cos(travel_angle)])
-    dircol.AddConstraintToAllKnotPoints(
-        min_travelled_distance <= dir_vector.T.dot(hor_pos_final)
+    # Lift coefficient constraints act on |c| / |v_r| in dimless units
+    lift_coeff_scale = 0.5 * A * V_l / C
+    dimless_bounds = np.array(
+        [
+            MAX_VEL / V_l,
+            max_lift_coeff * lift_coeff_scale,
+            min_lift_coeff * lift_coeff_scale,
+            max_load_factor,
+            max_bank_angle,
+            min_height / L,
+            max_height / L,
+        ]
     )
+    return dimless_groups, dimless_bounds
 
-    ## Objective function
-    # Maximize average velocity travelled in desired direction
-    Q = 1
-
-    def average_speed(vars):
-        hor_pos_final = vars[0:2]
-        time_step = vars[2]
-        avg_speed = dir_vector.T.dot(hor_pos_final) / (time_step * N)
-        return -Q * avg_speed
 
-    time_step = dircol.timestep(0)[0]
-    dircol.AddCost(average_speed, vars=hor_pos_final.tolist() + [time_step])
+# True for upper bounds in dimless_bounds, False for lower bounds
+DIMLESS_UPPER_BOUNDS = np.array([True, True, False, True, True, False, True])
 
-    # Cost on input effort
-    R = 0.01
 
-    # Constrain input rates
-    # Using 2nd order forward finite differences for first derivative
-    first_order_finite_diff_matrix = -1 * np.diag(np.ones(N), 0) + 1 * np.diag(
-        np.ones((N - 1)), 1
+def calc_dimless_constraint_values(knots):
+    # Extreme values of the constrained quantities over the knot points,
+    # in the order of the dimless_bounds from get_dimless_problem
+    sample_times, x_knots, u_knots = knots
+    v_r_norm = np.linalg.norm(x_knots[:, 3:6], axis=1)
+    c_norm = np.linalg.norm(u_knots, axis=1)
+    sin_bank_angle_squared = u_knots[:, 2] ** 2 / (
+        c_norm ** 2 * (1 - x_knots[:, 5] ** 2 / v_r_norm ** 2)
     )
-    second_order_finite_diff_matrix = (
-        -3 / 2 * np.diag(np.ones(N), 0)
-        + 2 * np.diag(np.ones((N - 1)), 1)
-        - 1 / 2 * np.diag(np.ones((N - 2)), 2)
+    bank_angle = np.arcsin(np.sqrt(np.clip(sin_bank_angle_squared, 0, 1)))
+    return np.array(
+        [
+            np.max(v_r_norm),
+            np.max(c_norm / v_r_norm),
+            np.min(c_norm / v_r_norm),
+            np.max(c_norm * v_r_norm),
+            np.max(bank_angle),
+            np.min(x_knots[:, 2]),
+            np.max(x_knots[:, 2]),
+        ]
     )
-    third_order_finite_diff_matrix = (
-        -11 / 6 * np.diag(np.ones(N), 0)
-        + 3 * np.diag(np.ones((N - 1)), 1)
-        - 3 / 2 * np.diag(np.ones((N - 2)), 2)
-        + 1 / 3 * np.diag(np.ones((N - 3)), 3)
-    )
-    finite_diff_matrix = first_order_finite_diff_matrix
 
-    def input_rate(vars):
-        time_step = vars[0]
-        u = np.array(vars[1:]).reshape(N, 3)
-        u_change = finite_diff_matrix.dot(u)
-        u_change_squared = np.sum(np.diag(u_change.T.dot(u_change)))
 
-        return R * u_change_squared / time_step
+def calc_dimless_problem_residual(dimless_groups_0, dimless_groups_1):
+    # Largest relative difference between the groups of two dimless problems
+    scale = np.maximum(np.abs(dimless_groups_0), np.abs(dimless_groups_1))
+    diff = np.abs(dimless_groups_0 - dimless_groups_1)
+    return float(np.max(diff / np.where(scale > 0, scale, 1)))
 
-    input_vars = (
-        np.vstack([dircol.input(i).reshape((3, 1)) for i in range(N)])
-        .flatten()
-        .tolist()
-    )
-    dircol.AddCost(input_rate, vars=[time_step] + input_vars)
 
-    ######
-    # PROVIDE INITIAL GUESS
-    ######
+def is_same_dimless_solution(
+    dimless_problem_0, dimless_problem_1, knots, tol=1e-6, margin=1e-3
+):
+    # True if knots, a solution of dimless_problem_0, is also the solution of
+    # dimless_problem_1. The groups must be equal, and constraint bounds
+    # may only differ where the solution is strictly inside both bounds.
+    groups_0, bounds_0 = dimless_problem_0
+    groups_1, bounds_1 = dimless_problem_1
+    if calc_dimless_problem_residual(groups_0, groups_1) > tol:
+        return False
+
+    values = calc_dimless_constraint_values(knots)
+    for value, bound_0, bound_1, upper in zip(
+        values, bounds_0, bounds_1, DIMLESS_UPPER_BOUNDS
+    ):
+        if abs(bound_0 - bound_1) <= tol * max(abs(bound_0), abs(bound_1)):
+            continue
+        for bound in (bound_0, bound_1):
+            if upper and not value < bound - margin * abs(bound):
+                return False
+            if not upper and not value > bound + margin * abs(bound):
+                return False
+    return True
+
+
+def calc_collocation_defects(zhukovskii_glider, knots):
+    # Dimless defects of the Hermite-Simpson collocation constraints at the
+    # midpoint of every segment, with shape (N - 1, 6). These are zero for
+    # a solution of the same dimless problem.
+    sample_times, x_knots, u_knots = knots
+    h = np.diff(sample_times)[:, None]
+    x_dot = zhukovskii_glider.continuous_dynamics_dimless_batch(x_knots, u_knots)
+
+    x_mid = (x_knots[:-1] + x_knots[1:]) / 2 + h / 8 * (x_dot[:-1] - x_dot[1:])
+    x_dot_mid = (
+        -3 / (2 * h) * (x_knots[:-1] - x_knots[1:]) - (x_dot[:-1] + x_dot[1:]) / 4
+    )
+    u_mid = (u_knots[:-1] + u_knots[1:]) / 2
+    return x_dot_mid - zhukovskii_glider.continuous_dynamics_dimless_batch(x_mid, u_mid)
+
+
+def integrate_segments(zhukovskii_glider, knots, x_start, n_substeps=8):
+    # Integrates the dimless dynamics over every segment with RK4, starting
+    # from x_start with shape (N - 1, 6) and with the input linearly
+    # interpolated as in the solution. Returns the states at the segment ends.
+    sample_times, x_knots, u_knots = knots
+    h = np.diff(sample_times)[:, None] / n_substeps
+    dynamics = zhukovskii_glider.continuous_dynamics_dimless_batch
+
+    def get_input(phase):
+        return (1 - phase) * u_knots[:-1] + phase * u_knots[1:]
+
+    x = np.array(x_start)
+    for i in range(n_substeps):
+        u_start = get_input(i / n_substeps)
+        u_mid = get_input((i + 0.5) / n_substeps)
+        u_end = get_input((i + 1) / n_substeps)
+        k1 = dynamics(x, u_start)
+        k2 = dynamics(x + h / 2 * k1, u_mid)
+        k3 = dynamics(x + h / 2 * k2, u_mid)
+        k4 = dynamics(x + h * k3, u_end)
+        x = x + h / 6 * (k1 + 2 * k2 + 2 * k3 + k4)
+    return x
+
+
+def calc_integration_errors(zhukovskii_glider, knots, n_substeps=8):
+    # Largest difference between the integrated dynamics and the knot at the
+    # end of every segment, starting from the knot at the start of the
+    # segment, with shape (N - 1,)
+    sample_times, x_knots, u_knots = knots
+    x_end = integrate_segments(zhukovskii_glider, knots, x_knots[:-1], n_substeps)
+    return np.max(np.abs(x_end - x_knots[1:]), axis=1)
+
+
+def simulate_knots(zhukovskii_glider, knots, n_substeps=8):
+    # Integrates the dimless dynamics over the whole trajectory from the
+    # first knot, with the input of the solution. Returns the states at
+    # the sample times, with shape (N, 6).
+    sample_times, x_knots, u_knots = knots
+    x_sim = np.empty(x_knots.shape)
+    x_sim[0] = x_knots[0]
+    for k in range(len(sample_times) - 1):
+        segment = (sample_times[k : k + 2], x_knots[k : k + 2], u_knots[k : k + 2])
+        x_sim[k + 1] = integrate_segments(
+            zhukovskii_glider, segment, x_sim[k : k + 1], n_substeps
+        )[0]
+    return x_sim
+
+
+def calc_avg_speed_drift(travel_angle, x_knots, x_sim):
+    # Relative difference between the distance travelled by the solution and
+    # by the simulated trajectory, which is the same as the relative
+    # difference of their average speeds
+    dir_vector = np.array([np.sin(travel_angle), np.cos(travel_angle)])
+    distance = dir_vector.dot(x_knots[-1, 0:2])
+    return abs(dir_vector.dot(x_sim[-1, 0:2]) - distance) / abs(distance)
 
-    # If no initial guess provided, use a straight line
-    if initial_guess == None:
-        log.debug("\tRunning with straight line as initial guess")
-        log.debug(
-            "\tperiod_guess: {0}, avg_vel_guess: {1}".format(
-                period_guess * T, avg_vel_guess * V_l
-            )
-        )
-        x0_guess = np.array(
-            [0, 0, h0, avg_vel_guess * dir_vector[0], avg_vel_guess * dir_vector[1], 0]
-        )
 
-        xf_guess = np.array(
-            [
-                dir_vector[0] * total_dist_travelled_guess,
-                dir_vector[1] * total_dist_travelled_guess,
-                h0,
-                avg_vel_guess * dir_vector[0],
-                avg_vel_guess * dir_vector[1],
-                0,
-            ]
-        )
-        # Linear interpolation
-        initial_x_trajectory = PiecewisePolynomial.FirstOrderHold(
-            [0.0, period_guess], np.column_stack((x0_guess, xf_guess))
+def direct_collocation_refined(
+    zhukovskii_glider,
+    travel_angle,
+    mesh_tol=1e-4,  # Max dimless integration error per segment
+    N_coarse=15,
+    max_N=61,
+    max_dt_scale=3,
+    **solve_kwargs
+):
+    # Coarse to fine mesh refinement. Solves with N_coarse collocation points
+    # first, and re-solves with more points, warm started from the previous
+    # solution, until the integration error of every segment is below
+    # mesh_tol. Returns the same values as direct_collocation_relative.
+    N = N_coarse
+    formulation_time = 0
+    solve_time = 0
+    iterations = 0
+    previous_result = None
+    while True:
+        result = direct_collocation_relative(
+            zhukovskii_glider,
+            travel_angle,
+            N=N,
+            max_dt_scale=max_dt_scale,
+            **solve_kwargs
         )
-        dircol.SetInitialTrajectory(PiecewisePolynomial(), initial_x_trajectory)
+        (
+            found_solution,
+            solution_details,
+            solution_trajectory,
+            next_initial_guess,
+        ) = result
+        formulation_time += solution_details.formulation_time
+        solve_time += solution_details.solve_time
+        iterations += solution_details.iterations
+        if not found_solution and previous_result is None:
+            if N >= max_N:
+                return result
+            # Coarse meshes are harder to solve from a straight line,
+            # so retry with twice as many segments
+            N = min(max_N, 2 * (N - 1) + 1)
+            log.warning(
+                " No solution on the coarse mesh, retrying with N={0}".format(N)
+            )
+            continue
+        if not found_solution:
+            # Keep the coarser solution
+            log.warning(
+                " Mesh refinement failed at N={0}, keeping the coarser solution".format(
+                    N
+                )
+            )
+            result = previous_result
+            break
 
-    # Use provided initial_guess
-    else:
-        log.debug(
-            "\tRunning with provided initial guess\n"
-            + "\t\tperiod_guess: {0}".format(period_guess * T)
+        errors = calc_integration_errors(
+            zhukovskii_glider, get_trajectory_knots(next_initial_guess)
         )
-        initial_x_traj, initial_u_traj = initial_guess
-        dircol.SetInitialTrajectory(initial_u_traj, initial_x_traj)
-
-    if PLOT_INITIAL_GUESS:
-        times = np.linspace(
-            initial_x_trajectory.start_time(), initial_x_trajectory.end_time(), N
+        max_error = np.max(errors)
+        log.info(
+            " Mesh with N={0}: max integration error {1}, {2} of {3} segments above {4}".format(
+                N, max_error, np.sum(errors > mesh_tol), len(errors), mesh_tol
+            )
         )
-        x0_knots = np.hstack([initial_x_trajectory.value(t) for t in times]).T
-        traj_plt = plot_trj_3_wind(x0_knots[:, 0:3], dir_vector)
-        plt.show()
-
-    #######
-    # SOLVE TRAJOPT PROBLEM
-    #######
-
-    formulate_time = time.time()
-    log.debug("\tFormulated trajopt in: {0} s".format(formulate_time - start_time))
-    result = Solve(dircol)
-    solve_time = time.time()
-    log.debug("\t! Finished trajopt in: {0} s".format(solve_time - formulate_time))
-    # assert result.is_success()
-    found_solution = result.is_success()
-
-    if found_solution:
-        x_traj_dimless = dircol.ReconstructStateTrajectory(result)
-        sample_times = dircol.GetSampleTimes(result)
-        N_plot = 200
-
-        ## Reconstruct and re-scale trajectory
-        times_dimless = np.linspace(
-            x_traj_dimless.start_time(), x_traj_dimless.end_time(), N_plot
+        if max_error <= mesh_tol:
+            break
+        if N >= max_N:
+            log.warning(
+                " Mesh refinement stopped at N={0} with max integration error {1}".format(
+                    N, max_error
+                )
+            )
+            break
+
+        # The error per segment is O(h^5) for Hermite-Simpson collocation,
+        # with some margin as the solution also changes with the mesh
+        n_segments = 1.2 * (N - 1) * (max_error / mesh_tol) ** (1 / 5)
+        N = int(min(max_N, max(N + 2, np.ceil(n_segments) + 1)))
+        previous_result = result
+        solve_kwargs = dict(
+            solve_kwargs,
+            initial_guess=next_initial_guess,
+            period_guess=solution_details.period,
         )
 
-        x_knots_dimless = np.hstack([x_traj_dimless.value(t) for t in times_dimless]).T
+    found_solution, solution_details, solution_trajectory, next_initial_guess = result
+    solution_details = solution_details._replace(
+        formulation_time=formulation_time, solve_time=solve_time, iterations=iterations
+    )
+    return found_solution, solution_details, solution_trajectory, next_initial_guess
 
-        p_knots = x_knots_dimless[:, 0:3] * L
-        v_r_knots = x_knots_dimless[:, 3:6] * V_l
-        x_knots = np.hstack((p_knots, v_r_knots))
 
-        times = times_dimless * T
+def rescale_solution(zhukovskii_glider, travel_angle, knots):
+    # Creates a solution for zhukovskii_glider from the dimless knots of a
+    # solution of another glider, without solving. Returns the same values
+    # as direct_collocation_relative.
+    sample_times, x_knots, u_knots = knots
+    V_l, L, T, C = zhukovskii_glider.get_char_values()
+    x_dot = zhukovskii_glider.continuous_dynamics_dimless_batch(x_knots, u_knots)
+    x_traj_dimless = PiecewisePolynomial.CubicHermite(sample_times, x_knots.T, x_dot.T)
+    u_traj_dimless = PiecewisePolynomial.FirstOrderHold(sample_times, u_knots.T)
+    solution_trajectory = reconstruct_trajectory(
+        zhukovskii_glider, x_traj_dimless, u_traj_dimless
+    )
 
-        u_traj_dimless = dircol.ReconstructInputTrajectory(result)
-        u_knots_dimless = np.hstack([u_traj_dimless.value(t) for t in times_dimless]).T
-        u_knots = u_knots_dimless * C
+    dir_vector = np.array([np.sin(travel_angle), np.cos(travel_angle)])
+    period = sample_times[-1] * T
+    distance = dir_vector.dot(x_knots[-1, 0:2]) * L
+    solution_details = SolutionDetails(
+        avg_speed=distance / period,
+        period=period,
+        limited_by_time_step="unknown",
+        cost=np.nan,
+        formulation_time=0,
+        solve_time=0,
+        solver="rescaled",
+        iterations=0,
+        exit_status="SolutionFound",
+    )
+    return True, solution_details, solution_trajectory, (x_traj_dimless, u_traj_dimless)
 
-        # Calculate solution properties
-        solution_period = x_traj_dimless.end_time() * T
-        solution_cost = result.get_optimal_cost()
-        solution_distance = dir_vector.T.dot(x_knots[-1, 0:2])
-        solution_avg_vel = solution_distance / solution_period
 
-        log.info(
-            "\t** Solution details:\n"
-            + "\t\tperiod: {0} (s)\n\t\tcost: {1}\n\t\tdistance: {2} (m) \n\t\tavg. vel: {3} (m/s)".format(
-                solution_period, solution_cost, solution_distance, solution_avg_vel
-            )
-        )
+def _cost_with_gradient(value_and_gradient):
+    # Wraps a function returning (value, gradient) w.r.t. its float
+    # arguments as a Drake cost. The gradient is supplied in closed form
+    # instead of pushing AutoDiffXd through the calculations.
+    def cost(vars):
+        if vars.dtype != object:
+            value, _ = value_and_gradient(vars)
+            return value
 
-        # Check time step
-        time_step = sample_times[1] - sample_times[0]
-        log.debug("\tTime step: {0}".format(time_step))
-        log.debug("\tmin_dt: {0}, max_dt: {1}".format(min_dt, max_dt))
+        values = ExtractValue(vars).flatten()
+        value, gradient = value_and_gradient(values)
+        return AutoDiffXd(value, gradient.dot(ExtractGradient(vars)))
 
-        tol = 0.0001
-        limited_by_time_step = "false"
-        if abs(time_step - min_dt) < tol:
-            limited_by_time_step = "lower"
-        if abs(time_step - max_dt) < tol:
-            limited_by_time_step = "upper"
+    return cost
 
-        solution_details = (solution_avg_vel, solution_period, limited_by_time_step)
-        solution_trajectory = (times, x_knots, u_knots)
-        next_initial_guess = (x_traj_dimless, u_traj_dimless)
 
-        return (
-            found_solution,
-            solution_details,
-            solution_trajectory,
-            next_initial_guess,
-        )
+def get_trajectory_knots(initial_guess):
+    # Extract the dimless knot points of a solution, so that
+    # it can be stored and used as an initial guess later
+    x_traj_dimless, u_traj_dimless = initial_guess
+    sample_times = np.array(x_traj_dimless.get_segment_times())
+    x_knots = np.hstack([x_traj_dimless.value(t) for t in sample_times]).T
+    u_knots = np.hstack([u_traj_dimless.value(t) for t in sample_times]).T
+    return sample_times, x_knots, u_knots
 
-    else:  # No solution
-        log.error(" Did not find a solution")
-        return found_solution, (-1, -1, -1), None, None
 
+def create_initial_guess(sample_times, x_knots, u_knots):
+    # Inverse of get_trajectory_knots. Linear interpolation
+    # reproduces the knot values exactly
+    x_traj_dimless = PiecewisePolynomial.FirstOrderHold(sample_times, x_knots.T)
+    u_traj_dimless = PiecewisePolynomial.FirstOrderHold(sample_times, u_knots.T)
+    return x_traj_dimless, u_traj_dimless
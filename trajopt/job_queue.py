@@ -0,0 +1,397 @@
+import os
+import json
+import time
+import uuid
+import signal
+import traceback
+import logging as log
+import multiprocessing as mp
+
+from trajopt.parameter_sweep import split_params, GLIDER_PARAMS, WIND_PARAMS
+from trajopt.results import JOBS_DIR, SWEEP_TELEMETRY_FILE, TELEMETRY_FILE
+from trajopt.solve_telemetry import TelemetryLog
+from trajopt.solver_config import DEFAULT_SOLVER_CONFIG
+
+JOB_RECORD_FILE = "job.json"
+JOB_CANCEL_FILE = "cancel"
+JOB_ERROR_FILE = "error.txt"
+JOB_LOG_FILE = "job.log"
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = (
+    "queued",
+    "running",
+    "done",
+    "failed",
+    "cancelled",
+)
+FINISHED_STATUSES = (DONE, FAILED, CANCELLED)
+
+# Arguments of every kind of job and their defaults. params are glider and
+# wind parameters, with the names of the parameter sweep.
+DEFAULT_JOB_ARGS = {
+    "sweep": {
+        "params": {},
+        "start_angle": 0,
+        "period_guess": 7,
+        "avg_vel_scale_guess": 1,
+        "n_angles": 9,
+        "n_workers": 1,
+        "resume": False,
+        "solver_config": {},
+    },
+    "single": {
+        "params": {},
+        "travel_angle": 90,
+        "period_guess": 7,
+        "avg_vel_scale_guess": 1,
+        "N": 31,
+        "mesh_tol": None,
+        "n_racers": 1,
+        "solver_config": {},
+    },
+}
+
+# Sweeps are solved with the default constraints, so only the physical
+# glider parameters and the wind can be set
+SWEEP_JOB_PARAMS = GLIDER_PARAMS[:6] + WIND_PARAMS
+
+# Per angle results of every kind of job, relative to the job directory
+JOB_PROGRESS_FILES = {"sweep": SWEEP_TELEMETRY_FILE, "single": TELEMETRY_FILE}
+
+
+def get_job_args(kind, args):
+    # Returns the arguments with defaults for all missing ones, or raises a
+    # ValueError for an invalid job
+    if kind not in DEFAULT_JOB_ARGS:
+        raise ValueError("Unknown job kind: {0}".format(kind))
+    for name in args:
+        if name not in DEFAULT_JOB_ARGS[kind]:
+            raise ValueError("Unknown argument of {0} job: {1}".format(kind, name))
+    args = dict(DEFAULT_JOB_ARGS[kind], **args)
+    split_params(args["params"])
+    if kind == "sweep":
+        for name in args["params"]:
+            if name not in SWEEP_JOB_PARAMS:
+                raise ValueError(
+                    "Sweep jobs can not set the constraint: {0}".format(name)
+                )
+    DEFAULT_SOLVER_CONFIG._replace(**args["solver_config"])
+    return args
+
+
+def get_n_processes(record):
+    # Solver processes used by a job
+    if record["kind"] == "sweep":
+        return record["args"]["n_workers"]
+    return record["args"]["n_racers"]
+
+
+class JobQueue:
+    # Persistent job records, with one directory per job. The directory
+    # also holds the results of the job, as every job runs in its own
+    # directory. Only the scheduler changes the records of submitted jobs.
+    def __init__(self, directory=JOBS_DIR):
+        self.directory = directory
+        return
+
+    def get_job_dir(self, job_id):
+        return os.path.join(self.directory, job_id)
+
+    def _save(self, record):
+        job_dir = self.get_job_dir(record["id"])
+        os.makedirs(job_dir, exist_ok=True)
+        filename = os.path.join(job_dir, JOB_RECORD_FILE)
+        tmp_filename = filename + ".tmp"
+        with open(tmp_filename, "w") as f:
+            json.dump(record, f, indent=2)
+        os.replace(tmp_filename, filename)
+        return
+
+    def submit(self, kind, args, priority=0):
+        # Returns the id of the job. Jobs with a higher priority run first.
+        record = {
+            "id": "{0}_{1}".format(
+                time.strftime("%Y%m%d_%H%M%S"), uuid.uuid4().hex[:6]
+            ),
+            "kind": kind,
+            "args": get_job_args(kind, args),
+            "priority": priority,
+            "status": QUEUED,
+            "submit_time": time.time(),
+            "start_time": None,
+            "finish_time": None,
+            "error": None,
+        }
+        self._save(record)
+        log.info(" Submitted {0} job {1}".format(kind, record["id"]))
+        return record["id"]
+
+    def get(self, job_id):
+        filename = os.path.join(self.get_job_dir(job_id), JOB_RECORD_FILE)
+        if not os.path.exists(filename):
+            raise ValueError("Unknown job: {0}".format(job_id))
+        with open(filename, "r") as f:
+            record = json.load(f)
+        record["cancel_requested"] = self.is_cancel_requested(job_id)
+        return record
+
+    def get_jobs(self):
+        # All jobs, in the order they were submitted
+        if not os.path.isdir(self.directory):
+            return []
+        records = [
+            self.get(job_id)
+            for job_id in os.listdir(self.directory)
+            if os.path.exists(os.path.join(self.get_job_dir(job_id), JOB_RECORD_FILE))
+        ]
+        return sorted(records, key=lambda record: record["submit_time"])
+
+    def get_queued_jobs(self):
+        # Queued jobs in the order they should run
+        records = [record for record in self.get_jobs() if record["status"] == QUEUED]
+        return sorted(
+            records, key=lambda record: (-record["priority"], record["submit_time"])
+        )
+
+    def cancel(self, job_id):
+        # The scheduler stops the job at its next poll
+        record = self.get(job_id)
+        if record["status"] in FINISHED_STATUSES:
+            return False
+        open(os.path.join(self.get_job_dir(job_id), JOB_CANCEL_FILE), "w").close()
+        log.info(" Cancel requested for job {0}".format(job_id))
+        return True
+
+    def is_cancel_requested(self, job_id):
+        return os.path.exists(os.path.join(self.get_job_dir(job_id), JOB_CANCEL_FILE))
+
+    def set_status(self, job_id, status, **fields):
+        record = self.get(job_id)
+        del record["cancel_requested"]
+        record.update(fields, status=status)
+        self._save(record)
+        return record
+
+    def get_progress(self, job_id):
+        # Telemetry records of the angles finished so far
+        record = self.get(job_id)
+        filename = os.path.join(
+            self.get_job_dir(job_id), JOB_PROGRESS_FILES[record["kind"]]
+        )
+        return TelemetryLog(filename).load()
+
+    def stream_progress(self, job_id, poll_interval=1):
+        # Yields every finished angle of the job as it is produced, until the
+        # job has finished
+        n_records = 0
+        while True:
+            finished = self.get(job_id)["status"] in FINISHED_STATUSES
+            records = self.get_progress(job_id)
+            yield from records[n_records:]
+            n_records = len(records)
+            if finished:
+                return
+            time.sleep(poll_interval)
+
+
+class JobScheduler:
+    # Runs the queued jobs in their own processes, with at most
+    # max_processes solver processes at a time
+    def __init__(self, job_queue, max_processes=None, poll_interval=1):
+        self.job_queue = job_queue
+        self.max_processes = max_processes or mp.cpu_count()
+        self.poll_interval = poll_interval
+        self.processes = dict()  # job id -> (process, n_processes)
+
+        # Jobs that were running when a previous scheduler stopped
+        for record in job_queue.get_jobs():
+            if record["status"] == RUNNING:
+                log.warning(" Requeuing interrupted job {0}".format(record["id"]))
+                args = record["args"]
+                if record["kind"] == "sweep":
+                    args = dict(args, resume=True)
+                job_queue.set_status(record["id"], QUEUED, args=args)
+        return
+
+    def get_n_running_processes(self):
+        return sum(n_processes for _, n_processes in self.processes.values())
+
+    def run(self):
+        log.info(
+            " ### Scheduling jobs with at most {0} solver processes".format(
+                self.max_processes
+            )
+        )
+        try:
+            while True:
+                self.step()
+                time.sleep(self.poll_interval)
+        finally:
+            for job_id in list(self.processes):
+                self._stop(job_id)
+        return
+
+    def step(self):
+        # Collects the finished jobs and starts as many queued jobs as fit
+        for job_id, (process, _) in list(self.processes.items()):
+            if process.is_alive() and self.job_queue.is_cancel_requested(job_id):
+                self._stop(job_id)
+            if not process.is_alive():
+                process.join()
+                del self.processes[job_id]
+                self._finish(job_id, process.exitcode)
+
+        for record in self.job_queue.get_queued_jobs():
+            if record["cancel_requested"]:
+                self.job_queue.set_status(
+                    record["id"], CANCELLED, finish_time=time.time()
+                )
+                continue
+            n_processes = min(get_n_processes(record), self.max_processes)
+            if self.get_n_running_processes() + n_processes > self.max_processes:
+                # Keep the priority order, no job jumps the queue
+                break
+            self._start(record, n_processes)
+        return
+
+    def _start(self, record, n_processes):
+        args = dict(record["args"])
+        if record["kind"] == "sweep":
+            args["n_workers"] = n_processes
+        else:
+            args["n_racers"] = n_processes
+        record = self.job_queue.set_status(
+            record["id"], RUNNING, args=args, start_time=time.time()
+        )
+        job_dir = os.path.abspath(self.job_queue.get_job_dir(record["id"]))
+        process = mp.Process(target=_run_job, args=(job_dir, record))
+        process.start()
+        self.processes[record["id"]] = (process, n_processes)
+        log.info(
+            " Started {0} job {1} with {2} processes".format(
+                record["kind"], record["id"], n_processes
+            )
+        )
+        return
+
+    def _stop(self, job_id, timeout=10):
+        # The job runs in its own process group, which includes its workers.
+        # A job that has not yet created its group is terminated directly.
+        process, _ = self.processes[job_id]
+        try:
+            os.killpg(process.pid, signal.SIGTERM)
+        except ProcessLookupError:
+            process.terminate()
+        process.join(timeout)
+        if process.is_alive():
+            log.warning(" Killing job {0}".format(job_id))
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                process.kill()
+            process.join()
+        return
+
+    def _finish(self, job_id, exitcode):
+        if self.job_queue.is_cancel_requested(job_id):
+            status = CANCELLED
+        elif exitcode == 0:
+            status = DONE
+        else:
+            status = FAILED
+        error = None
+        error_file = os.path.join(self.job_queue.get_job_dir(job_id), JOB_ERROR_FILE)
+        if status == FAILED and os.path.exists(error_file):
+            with open(error_file, "r") as f:
+                error = f.read()
+        self.job_queue.set_status(job_id, status, finish_time=time.time(), error=error)
+        log.info(" Job {0} {1}".format(job_id, status))
+        return
+
+
+def _link_shared_results(job_dir):
+    # Jobs share the warm starts and the solution cache
+    os.makedirs(os.path.join(job_dir, "results"), exist_ok=True)
+    for name in ("warm_starts", "solution_cache"):
+        shared_dir = os.path.abspath(os.path.join("results", name))
+        os.makedirs(shared_dir, exist_ok=True)
+        link = os.path.join(job_dir, "results", name)
+        if not os.path.lexists(link):
+            os.symlink(shared_dir, link)
+    return
+
+
+def _run_job(job_dir, record):
+    # Runs in the job directory, so that the results of concurrent jobs
+    # are kept apart, and in a new process group, so that cancelling also
+    # stops the worker processes of the job
+    os.setpgrp()
+    _link_shared_results(job_dir)
+    os.chdir(job_dir)
+    os.makedirs(os.path.join("results", "plots"), exist_ok=True)
+    log.basicConfig(
+        format="%(levelname)s:%(message)s",
+        filename=JOB_LOG_FILE,
+        filemode="a",
+        level=log.DEBUG,
+        force=True,
+    )
+    try:
+        # Plots are saved, never shown
+        import matplotlib
+
+        matplotlib.use("Agg")
+        JOB_RUNNERS[record["kind"]](record["args"])
+    except BaseException:
+        with open(JOB_ERROR_FILE, "w") as f:
+            f.write(traceback.format_exc())
+        raise
+    return
+
+
+def _get_job_problem(args):
+    # Returns (phys_params, phys_constraints) and sets the wind
+    from dynamics.zhukovskii_glider import RelativeZhukovskiiGlider
+    from dynamics.wind_models import set_wind_params, DEFAULT_WIND_PARAMS
+
+    glider_params, wind_params = split_params(args["params"])
+    set_wind_params(**dict(DEFAULT_WIND_PARAMS, **wind_params))
+    zhukovskii_glider = RelativeZhukovskiiGlider(**glider_params)
+    return zhukovskii_glider.get_phys_params(), zhukovskii_glider.get_constraints()[:7]
+
+
+def _run_sweep_job(args):
+    from trajopt.trajectory_generator import sweep_calculation
+
+    phys_params, _ = _get_job_problem(args)
+    sweep_calculation(
+        phys_params,
+        args["start_angle"],
+        args["period_guess"],
+        args["avg_vel_scale_guess"],
+        args["n_angles"],
+        n_workers=args["n_workers"],
+        resume=args["resume"],
+        solver_config=DEFAULT_SOLVER_CONFIG._replace(**args["solver_config"]),
+    )
+    return
+
+
+def _run_single_job(args):
+    from trajopt.trajectory_generator import calc_and_plot_trajectory
+
+    phys_params, phys_constraints = _get_job_problem(args)
+    calc_and_plot_trajectory(
+        phys_params,
+        phys_constraints,
+        args["travel_angle"],
+        args["period_guess"],
+        args["avg_vel_scale_guess"],
+        N=args["N"],
+        mesh_tol=args["mesh_tol"],
+        solver_config=DEFAULT_SOLVER_CONFIG._replace(**args["solver_config"]),
+        n_racers=args["n_racers"],
+    )
+    return
+
+
+JOB_RUNNERS = {"sweep": _run_sweep_job, "single": _run_single_job}
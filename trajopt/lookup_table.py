@@ -0,0 +1,185 @@
+import os
+import logging as log
+import numpy as np
+
+# The table file is one header followed by n_angles records, sorted by angle.
+# All trajectories are dimless, and resampled to the same n_samples points
+# in normalized time, so a query only has to rotate and blend two records.
+LOOKUP_TABLE_MAGIC = b"DSLUT"
+LOOKUP_TABLE_VERSION = 1
+
+# Queries between two solved angles further apart than this are refused, as
+# the blended trajectory is then far from a solution
+DEFAULT_MAX_ANGLE_GAP = 60  # deg
+
+LOOKUP_TABLE_HEADER_DTYPE = np.dtype(
+    [
+        ("magic", "S8"),
+        ("version", "<u4"),
+        ("n_angles", "<u4"),
+        ("n_samples", "<u4"),
+        ("V_l", "<f8"),
+        ("L", "<f8"),
+        ("T", "<f8"),
+        ("C", "<f8"),
+    ]
+)
+
+
+def get_lookup_table_record_dtype(n_samples):
+    return np.dtype(
+        [
+            ("angle", "<f8"),  # deg
+            ("period", "<f8"),  # dimless
+            ("avg_speed", "<f8"),  # dimless
+            ("x_knots", "<f4", (n_samples, 6)),  # dimless
+            ("u_knots", "<f4", (n_samples, 3)),  # dimless
+        ]
+    )
+
+
+def build_lookup_table(zhukovskii_glider, trajectory_store, filename, n_samples=64):
+    # Writes all solved trajectories in the store to a lookup table,
+    # made dimless with the characteristic values of the glider
+    V_l, L, T, C = zhukovskii_glider.get_char_values()
+    travel_angles = [
+        angle
+        for angle in trajectory_store.get_angles()
+        if trajectory_store.get(angle)["status"] == "solved"
+    ]
+
+    records = np.zeros(len(travel_angles), get_lookup_table_record_dtype(n_samples))
+    phase = np.linspace(0, 1, n_samples)
+    for i, travel_angle in enumerate(travel_angles):
+        record = trajectory_store.get(travel_angle)
+        times, x_knots, u_knots = trajectory_store.get_trajectory(travel_angle)
+        knots_phase = (times - times[0]) / (times[-1] - times[0])
+
+        x_knots_dimless = np.hstack((x_knots[:, 0:3] / L, x_knots[:, 3:6] / V_l))
+        u_knots_dimless = u_knots / C
+        records[i]["angle"] = travel_angle
+        records[i]["period"] = record["period"] / T
+        records[i]["avg_speed"] = record["avg_speed"] / V_l
+        records[i]["x_knots"] = np.column_stack(
+            [np.interp(phase, knots_phase, column) for column in x_knots_dimless.T]
+        )
+        records[i]["u_knots"] = np.column_stack(
+            [np.interp(phase, knots_phase, column) for column in u_knots_dimless.T]
+        )
+
+    header = np.zeros(1, LOOKUP_TABLE_HEADER_DTYPE)
+    header["magic"] = LOOKUP_TABLE_MAGIC
+    header["version"] = LOOKUP_TABLE_VERSION
+    header["n_angles"] = len(records)
+    header["n_samples"] = n_samples
+    header["V_l"] = V_l
+    header["L"] = L
+    header["T"] = T
+    header["C"] = C
+
+    tmp_filename = filename + ".tmp"
+    with open(tmp_filename, "wb") as f:
+        f.write(header.tobytes())
+        f.write(records.tobytes())
+    os.replace(tmp_filename, filename)
+    log.info(
+        " Wrote lookup table with {0} angles to {1}".format(len(records), filename)
+    )
+    return
+
+
+class TrajectoryLookupTable:
+    # max_angle_gap is in deg, None allows queries in any gap
+    def __init__(self, filename, max_angle_gap=DEFAULT_MAX_ANGLE_GAP):
+        self.max_angle_gap = max_angle_gap
+        with open(filename, "rb") as f:
+            header = np.frombuffer(
+                f.read(LOOKUP_TABLE_HEADER_DTYPE.itemsize), LOOKUP_TABLE_HEADER_DTYPE
+            )[0]
+            if (
+                header["magic"] != LOOKUP_TABLE_MAGIC
+                or header["version"] != LOOKUP_TABLE_VERSION
+            ):
+                raise ValueError("Not a lookup table: {0}".format(filename))
+            record_dtype = get_lookup_table_record_dtype(int(header["n_samples"]))
+            records = np.frombuffer(
+                f.read(record_dtype.itemsize * int(header["n_angles"])), record_dtype
+            )
+        if len(records) == 0:
+            raise ValueError("Empty lookup table: {0}".format(filename))
+
+        self.V_l = float(header["V_l"])
+        self.L = float(header["L"])
+        self.T = float(header["T"])
+        self.C = float(header["C"])
+        self.angles = np.array(records["angle"])
+        self.periods = np.array(records["period"])
+        self.avg_speeds = np.array(records["avg_speed"])
+        self.x_knots = np.array(records["x_knots"], dtype=float)
+        self.u_knots = np.array(records["u_knots"], dtype=float)
+        self.phase = np.linspace(0, 1, int(header["n_samples"]))
+
+        # Scaling from dimless to dimensional values, per state and input
+        self.x_scale = np.array([self.L] * 3 + [self.V_l] * 3)
+        self.u_scale = self.C
+        return
+
+    def _rotate(self, index, angle):
+        # Rotates record index about the z axis by angle (deg)
+        angle = angle * np.pi / 180
+        cos, sin = np.cos(angle), np.sin(angle)
+        x_knots = self.x_knots[index].copy()
+        u_knots = self.u_knots[index].copy()
+        for knots, cols in ((x_knots, (0, 1)), (x_knots, (3, 4)), (u_knots, (0, 1))):
+            east = knots[:, cols[0]].copy()
+            north = knots[:, cols[1]]
+            knots[:, cols[0]] = cos * east + sin * north
+            knots[:, cols[1]] = -sin * east + cos * north
+        return x_knots, u_knots
+
+    def query_dimless(self, travel_angle):
+        # Returns (phase, period, avg_speed, x_knots, u_knots), dimless
+        travel_angle = travel_angle % 360
+        index = np.searchsorted(self.angles, travel_angle)
+        lower_index = (index - 1) % len(self.angles)
+        upper_index = index % len(self.angles)
+        lower_dist = (travel_angle - self.angles[lower_index]) % 360
+        upper_dist = (self.angles[upper_index] - travel_angle) % 360
+
+        if upper_dist > 1e-9 and self.max_angle_gap is not None:
+            angle_gap = lower_dist + upper_dist
+            if lower_index == upper_index:
+                angle_gap = 360
+            if angle_gap > self.max_angle_gap:
+                raise ValueError(
+                    "No lookup for {0} deg, it lies in a gap of {1} deg between solved angles, more than the max gap of {2} deg".format(
+                        travel_angle, angle_gap, self.max_angle_gap
+                    )
+                )
+
+        x_knots, u_knots = self._rotate(upper_index, -upper_dist)
+        period = self.periods[upper_index]
+        avg_speed = self.avg_speeds[upper_index]
+        if upper_dist > 1e-9 and lower_index != upper_index:
+            # Blend with the neighbour on the other side
+            weight = upper_dist / (lower_dist + upper_dist)
+            lower_x_knots, lower_u_knots = self._rotate(lower_index, lower_dist)
+            x_knots = (1 - weight) * x_knots + weight * lower_x_knots
+            u_knots = (1 - weight) * u_knots + weight * lower_u_knots
+            period = (1 - weight) * period + weight * self.periods[lower_index]
+            avg_speed = (1 - weight) * avg_speed + weight * self.avg_speeds[lower_index]
+        return self.phase, period, avg_speed, x_knots, u_knots
+
+    def query(self, travel_angle):
+        # Returns (times, x_knots, u_knots, period, avg_speed) in the ENU
+        # frame, in the same format as the solution_trajectory from
+        # direct_collocation_relative
+        phase, period, avg_speed, x_knots, u_knots = self.query_dimless(travel_angle)
+        times = phase * (period * self.T)
+        return (
+            times,
+            x_knots * self.x_scale,
+            u_knots * self.u_scale,
+            period * self.T,
+            avg_speed * self.V_l,
+        )
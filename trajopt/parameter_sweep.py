@@ -0,0 +1,237 @@
+import os
+import logging as log
+import numpy as np
+
+GLIDER_PARAMS = (
+    "m",
+    "c_Dp",
+    "A",
+    "b",
+    "rho",
+    "g",
+    "max_bank_angle",
+    "max_lift_coeff",
+    "min_lift_coeff",
+    "max_load_factor",
+    "min_height",
+    "max_height",
+    "h0",
+)
+WIND_PARAMS = ("w_ref", "h_ref", "h_0", "alpha")
+
+
+def split_params(params):
+    # Splits a dict of swept parameters into glider and wind parameters
+    for name in params:
+        if name not in GLIDER_PARAMS and name not in WIND_PARAMS:
+            raise ValueError("Unknown sweep parameter: {0}".format(name))
+    glider_params = {
+        name: value for name, value in params.items() if name in GLIDER_PARAMS
+    }
+    wind_params = {name: value for name, value in params.items() if name in WIND_PARAMS}
+    return glider_params, wind_params
+
+
+def get_grid_samples(param_values):
+    # Full factorial grid over param_values = {name: [values]}. The samples
+    # are ordered such that consecutive samples differ in a single parameter
+    # by a single grid step, so every sample can be warm started from the
+    # previous one.
+    names = list(param_values.keys())
+    samples = [dict()]
+    for name in names:
+        next_samples = []
+        for i, sample in enumerate(samples):
+            values = list(param_values[name])
+            # Every other row is traversed backwards
+            if i % 2 == 1:
+                values = values[::-1]
+            next_samples += [dict(sample, **{name: value}) for value in values]
+        samples = next_samples
+    return samples
+
+
+def get_latin_hypercube_samples(param_bounds, n_samples, seed=0):
+    # Latin hypercube samples over param_bounds = {name: (lower, upper)},
+    # ordered by a nearest neighbour tour in normalized coordinates
+    # so that consecutive samples are close to each other
+    rng = np.random.default_rng(seed)
+    names = list(param_bounds.keys())
+    unit_samples = np.column_stack(
+        [
+            (rng.permutation(n_samples) + rng.uniform(size=n_samples)) / n_samples
+            for _ in names
+        ]
+    )
+
+    order = [0]
+    unvisited = list(range(1, n_samples))
+    while len(unvisited) > 0:
+        dists = np.linalg.norm(
+            unit_samples[unvisited] - unit_samples[order[-1]], axis=1
+        )
+        order.append(unvisited.pop(int(np.argmin(dists))))
+    unit_samples = unit_samples[order]
+
+    samples = []
+    for unit_sample in unit_samples:
+        samples.append(
+            {
+                name: param_bounds[name][0]
+                + unit_sample[i] * (param_bounds[name][1] - param_bounds[name][0])
+                for i, name in enumerate(names)
+            }
+        )
+    return samples
+
+
+def get_parameter_samples(config):
+    # Samples from a sweep config, either
+    #   {"grid": {name: [values]}} or
+    #   {"lhs": {name: [lower, upper]}, "n_samples": n, "seed": seed}
+    if "grid" in config:
+        return get_grid_samples(config["grid"])
+    if "lhs" in config:
+        return get_latin_hypercube_samples(
+            config["lhs"], config["n_samples"], config.get("seed", 0)
+        )
+    raise ValueError("Sweep config needs either 'grid' or 'lhs'")
+
+
+def split_samples(samples, n_chains):
+    # Contiguous chunks, so that the continuation is kept inside every chunk
+    n_chains = max(min(n_chains, len(samples)), 1)
+    return [
+        [samples[i] for i in chunk]
+        for chunk in np.array_split(np.arange(len(samples)), n_chains)
+    ]
+
+
+class ParameterSweepResults:
+    # One record per (parameter sample, travel angle), stored as a single
+    # .npy file of records that can be queried by parameter value.
+    # New records are appended to a journal next to the file, as in
+    # TrajectoryStore, so that every add only writes its own record.
+    # save merges the journal into the file.
+    def __init__(self, filename, param_names):
+        self.filename = filename
+        self.journal_filename = filename + ".journal"
+        self.param_names = tuple(param_names)
+        self.records = np.zeros(0, dtype=self.get_dtype())
+        self.new_records = []
+        if os.path.exists(filename) or os.path.exists(self.journal_filename):
+            self.load()
+        return
+
+    def get_dtype(self):
+        return np.dtype(
+            [(name, "f8") for name in self.param_names]
+            + [
+                ("travel_angle", "f8"),  # deg
+                ("status", "U16"),
+                ("avg_speed", "f8"),
+                ("period", "f8"),
+                ("cost", "f8"),
+                ("limited_by_time_step", "U8"),
+                ("solve_time", "f8"),
+            ]
+        )
+
+    def load(self):
+        if os.path.exists(self.filename):
+            records = np.load(self.filename)
+            if records.dtype != self.get_dtype():
+                raise ValueError(
+                    "Parameter sweep results in {0} have other parameters: {1}".format(
+                        self.filename, records.dtype.names
+                    )
+                )
+            self.records = records
+        self.new_records = []
+        if os.path.exists(self.journal_filename):
+            # A record that was cut off by a crash is ignored
+            with open(self.journal_filename, "rb") as f:
+                data = f.read()
+            n_records = len(data) // self.records.dtype.itemsize
+            self.new_records.append(
+                np.frombuffer(
+                    data[: n_records * self.records.dtype.itemsize],
+                    dtype=self.records.dtype,
+                )
+            )
+        self._merge()
+        log.info(
+            " Loaded {0} parameter sweep results from {1}".format(
+                len(self.records), self.filename
+            )
+        )
+        return
+
+    def save(self):
+        # Write to a temporary file first so that a crash while
+        # writing never destroys the previous results
+        self._merge()
+        tmp_filename = self.filename + ".tmp.npy"
+        np.save(tmp_filename, self.records)
+        os.replace(tmp_filename, self.filename)
+        if os.path.exists(self.journal_filename):
+            os.remove(self.journal_filename)
+        return
+
+    def _merge(self, tol=1e-9):
+        # Sorts the new records in by problem, the last record of a problem
+        # replaces all earlier ones
+        if len(self.new_records) == 0:
+            return
+        records = np.concatenate([self.records] + self.new_records)
+        self.new_records = []
+        keys = list(self.param_names) + ["travel_angle"]
+        # lexsort is stable, and sorts by the last key first
+        records = records[np.lexsort([records[name] for name in keys[::-1]])]
+        is_last = np.zeros(len(records), dtype=bool)
+        is_last[-1] = True
+        for name in keys:
+            values = records[name]
+            is_last[:-1] |= np.abs(np.diff(values)) > tol * np.maximum(
+                np.abs(values[1:]), 1
+            )
+        self.records = records[is_last]
+        return
+
+    def _get_mask(self, tol=1e-9, **conditions):
+        self._merge()
+        mask = np.ones(len(self.records), dtype=bool)
+        for name, value in conditions.items():
+            mask &= np.abs(self.records[name] - value) <= tol * max(abs(value), 1)
+        return mask
+
+    def add(self, params, travel_angle, solution_details, status="solved"):
+        record = np.zeros(1, dtype=self.records.dtype)
+        for name in self.param_names:
+            record[name] = params[name]
+        record["travel_angle"] = travel_angle
+        record["status"] = status
+        record["avg_speed"] = solution_details.avg_speed
+        record["period"] = solution_details.period
+        record["cost"] = solution_details.cost
+        record["limited_by_time_step"] = solution_details.limited_by_time_step
+        record["solve_time"] = solution_details.solve_time
+
+        directory = os.path.dirname(self.journal_filename)
+        if directory != "":
+            os.makedirs(directory, exist_ok=True)
+        with open(self.journal_filename, "ab") as f:
+            f.write(record.tobytes())
+        self.new_records.append(record)
+        return
+
+    def is_completed(self, params, travel_angle):
+        mask = self._get_mask(travel_angle=travel_angle, **params)
+        return bool(np.any(self.records["status"][mask] == "solved"))
+
+    def query(self, **conditions):
+        # Returns all records matching the conditions, e.g.
+        # query(m=8.5, travel_angle=90), sorted by parameters and angle
+        mask = self._get_mask(**conditions)
+        records = self.records[mask]
+        return np.sort(records, order=list(self.param_names) + ["travel_angle"])
@@ -0,0 +1,44 @@
+import os
+import json
+from trajopt.trajectory_store import TrajectoryStore
+
+# Result locations, kept apart from the solver so that the results can be
+# shown or cleared without loading pydrake
+
+SWEEP_SPEEDS_FILE = "./results/plots/sweep_results_speeds.txt"
+SWEEP_PERIODS_FILE = "./results/plots/sweep_results_periods.txt"
+SWEEP_CHECKPOINT_FILE = "./results/plots/sweep_checkpoint.npz"
+SWEEP_TRAJECTORIES_FILE = "./results/plots/sweep_trajectories.npy"
+WARM_START_DIR = "./results/warm_starts"
+SOLUTION_CACHE_DIR = "./results/solution_cache"
+LOOKUP_TABLE_FILE = "./results/lookup_table.bin"
+PARAMETER_SWEEP_FILE = "./results/parameter_sweep.npy"
+SWEEP_TELEMETRY_FILE = "./results/plots/sweep_telemetry.jsonl"
+SWEEP_TELEMETRY_SUMMARY_FILE = "./results/plots/sweep_telemetry_summary.json"
+TELEMETRY_FILE = "./results/telemetry.jsonl"
+JOBS_DIR = "./results/jobs"
+
+
+def show_sweep_result():
+    import matplotlib.pyplot as plt
+    from plot.plot import plot_sweep_polar
+
+    # Load data from files
+    if os.path.exists(SWEEP_TRAJECTORIES_FILE):
+        trajectory_store = TrajectoryStore(SWEEP_TRAJECTORIES_FILE, mmap=True)
+        solution_avg_speeds, solution_periods = trajectory_store.get_results()
+        plot_sweep_polar(solution_avg_speeds, solution_periods)
+        plt.show()
+        return
+
+    solution_avg_speeds = dict()
+    solution_periods = dict()
+    with open(SWEEP_SPEEDS_FILE, "r") as f:
+        solution_avg_speeds = json.load(f)
+        f.close()
+    with open(SWEEP_PERIODS_FILE, "r") as f:
+        solution_periods = json.load(f)
+        f.close()
+
+    plot_sweep_polar(solution_avg_speeds, solution_periods)
+    plt.show()
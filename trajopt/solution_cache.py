@@ -0,0 +1,107 @@
+import os
+import json
+import hashlib
+import logging as log
+import numpy as np
+
+
+def _round_values(values):
+    # Makes floats, numpy values and nested tuples hashable as json
+    if isinstance(values, dict):
+        return {key: _round_values(value) for key, value in values.items()}
+    if isinstance(values, (list, tuple, np.ndarray)):
+        return [_round_values(value) for value in values]
+    if isinstance(values, (bool, np.bool_)):
+        return bool(values)
+    if isinstance(values, (int, float, np.integer, np.floating)):
+        return round(float(values), 9)
+    return values
+
+
+def get_cache_key(problem_definition):
+    # problem_definition is a dict with everything that determines a solution
+    definition_str = json.dumps(_round_values(problem_definition), sort_keys=True)
+    return hashlib.sha256(definition_str.encode()).hexdigest()
+
+
+class SolutionCache:
+    # Content addressed cache of solutions, with one file per solution.
+    # The file modification time is used as last access time, and the
+    # least recently used solutions are removed above max_entries.
+    def __init__(self, directory, max_entries=1000):
+        self.directory = directory
+        self.max_entries = max_entries
+        return
+
+    def _filename(self, key):
+        return os.path.join(self.directory, "{0}.npz".format(key))
+
+    def get_keys(self):
+        if not os.path.isdir(self.directory):
+            return []
+        return [
+            filename[: -len(".npz")]
+            for filename in os.listdir(self.directory)
+            if filename.endswith(".npz") and not filename.endswith(".tmp.npz")
+        ]
+
+    def get(self, key):
+        # Returns (solution_details, solution_trajectory), where
+        # solution_details is a dict, or None if the key is not cached
+        filename = self._filename(key)
+        if not os.path.exists(filename):
+            return None
+        with np.load(filename) as data:
+            solution_details = json.loads(str(data["solution_details"]))
+            solution_trajectory = (
+                data["times"],
+                data["x_knots"],
+                data["u_knots"],
+            )
+        os.utime(filename)  # Mark as recently used
+        log.debug(" Loaded cached solution {0}".format(key))
+        return solution_details, solution_trajectory
+
+    def put(self, key, solution_details, solution_trajectory):
+        os.makedirs(self.directory, exist_ok=True)
+        times, x_knots, u_knots = solution_trajectory
+
+        # Write to a temporary file first so that a crash while
+        # writing never leaves a broken entry
+        filename = self._filename(key)
+        tmp_filename = filename + ".tmp.npz"
+        np.savez(
+            tmp_filename,
+            solution_details=np.array(json.dumps(_round_values(solution_details))),
+            times=times,
+            x_knots=x_knots,
+            u_knots=u_knots,
+        )
+        os.replace(tmp_filename, filename)
+        self.evict()
+        return
+
+    def evict(self):
+        keys = self.get_keys()
+        if len(keys) <= self.max_entries:
+            return
+        keys.sort(key=lambda key: os.path.getmtime(self._filename(key)))
+        for key in keys[: len(keys) - self.max_entries]:
+            os.remove(self._filename(key))
+        log.debug(
+            " Evicted {0} solutions from cache".format(len(keys) - self.max_entries)
+        )
+        return
+
+    def invalidate(self, key):
+        filename = self._filename(key)
+        if os.path.exists(filename):
+            os.remove(filename)
+        return
+
+    def clear(self):
+        keys = self.get_keys()
+        for key in keys:
+            os.remove(self._filename(key))
+        log.info(" Cleared {0} solutions from cache".format(len(keys)))
+        return
@@ -0,0 +1,131 @@
+import os
+import json
+import logging as log
+import numpy as np
+
+
+def get_telemetry_record(travel_angle, solution_details, status, **extra):
+    # One record per solved or failed angle, extra are e.g. sweep parameters
+    record = dict(extra)
+    record["travel_angle"] = float(travel_angle)
+    record["status"] = status
+    for name, value in solution_details._asdict().items():
+        if isinstance(value, (np.integer, np.floating)):
+            value = value.item()
+        record[name] = value
+    return record
+
+
+class TelemetryLog:
+    # Append only log of telemetry records, with one json record per line
+    def __init__(self, filename):
+        self.filename = filename
+        return
+
+    def add(self, record):
+        directory = os.path.dirname(self.filename)
+        if directory != "":
+            os.makedirs(directory, exist_ok=True)
+        with open(self.filename, "a") as f:
+            f.write(json.dumps(record) + "\n")
+        return
+
+    def load(self):
+        if not os.path.exists(self.filename):
+            return []
+        records = []
+        with open(self.filename, "r") as f:
+            for line in f:
+                # Skip a line that was cut off by a crash
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+        return records
+
+    def clear(self):
+        if os.path.exists(self.filename):
+            os.remove(self.filename)
+        return
+
+
+def calc_percentiles(values):
+    values = [value for value in values if value is not None and np.isfinite(value)]
+    if len(values) == 0:
+        return {"p50": None, "p95": None, "max": None}
+    return {
+        "p50": float(np.percentile(values, 50)),
+        "p95": float(np.percentile(values, 95)),
+        "max": float(np.max(values)),
+    }
+
+
+def summarize_telemetry(records, n_slowest=10):
+    # Aggregates the records of a sweep. Every record counts retries + 1
+    # attempts, of which all but a final solved one have failed.
+    attempts_by_angle = dict()
+    failures_by_angle = dict()
+    for record in records:
+        angle = record["travel_angle"]
+        attempts = record.get("retries", 0) + 1
+        failures = attempts - (1 if record["status"] == "solved" else 0)
+        attempts_by_angle[angle] = attempts_by_angle.get(angle, 0) + attempts
+        failures_by_angle[angle] = failures_by_angle.get(angle, 0) + failures
+
+    n_attempts = sum(attempts_by_angle.values())
+    n_failures = sum(failures_by_angle.values())
+    slowest_records = sorted(
+        [record for record in records if np.isfinite(record.get("total_time", np.nan))],
+        key=lambda record: record["total_time"],
+        reverse=True,
+    )[:n_slowest]
+    return {
+        "n_records": len(records),
+        "n_solved": sum(1 for record in records if record["status"] == "solved"),
+        "n_attempts": n_attempts,
+        "failure_rate": n_failures / n_attempts if n_attempts > 0 else None,
+        "solve_time": calc_percentiles(
+            [record["solve_time"] for record in records if record["status"] == "solved"]
+        ),
+        "total_time": calc_percentiles(
+            [record.get("total_time", np.nan) for record in records]
+        ),
+        "iterations": calc_percentiles(
+            [record["iterations"] for record in records if record["iterations"] >= 0]
+        ),
+        "failure_rate_by_angle": {
+            str(angle): failures_by_angle[angle] / attempts_by_angle[angle]
+            for angle in sorted(attempts_by_angle)
+        },
+        "slowest_angles": [
+            [record["travel_angle"], record["total_time"]] for record in slowest_records
+        ],
+    }
+
+
+def log_telemetry_summary(summary):
+    log.info(
+        " ### Telemetry of {0} angles, {1} solved, {2} attempts, failure rate {3}".format(
+            summary["n_records"],
+            summary["n_solved"],
+            summary["n_attempts"],
+            summary["failure_rate"],
+        )
+    )
+    for name in ("solve_time", "total_time", "iterations"):
+        log.info(
+            "\t{0}: p50 {1}, p95 {2}, max {3}".format(
+                name,
+                summary[name]["p50"],
+                summary[name]["p95"],
+                summary[name]["max"],
+            )
+        )
+    failing_angles = {
+        angle: rate
+        for angle, rate in summary["failure_rate_by_angle"].items()
+        if rate > 0
+    }
+    log.info("\tfailure rate by angle: {0}".format(failing_angles))
+    log.info("\tslowest angles (deg, s): {0}".format(summary["slowest_angles"]))
+    return
@@ -0,0 +1,109 @@
+import os
+import re
+import tempfile
+from collections import namedtuple
+
+# None means the default of the solver
+SolverConfig = namedtuple(
+    "SolverConfig",
+    [
+        "solver",  # "snopt" or "ipopt"
+        "optimality_tol",
+        "feasibility_tol",
+        "max_iterations",  # Major iterations for SNOPT
+        "max_time",  # s, NOTE only SNOPT 7.7 and later support a time limit
+    ],
+)
+
+DEFAULT_SOLVER_CONFIG = SolverConfig(
+    solver="snopt",
+    optimality_tol=None,
+    feasibility_tol=None,
+    max_iterations=None,
+    max_time=None,
+)
+
+# Solver classes in pydrake.all, which is only imported when solving
+SOLVERS = {"snopt": "SnoptSolver", "ipopt": "IpoptSolver"}
+
+SOLVER_OPTION_NAMES = {
+    "snopt": {
+        "optimality_tol": "Major optimality tolerance",
+        "feasibility_tol": "Major feasibility tolerance",
+        "max_iterations": "Major iterations limit",
+        "max_time": "Time limit",
+    },
+    "ipopt": {
+        "optimality_tol": "tol",
+        "feasibility_tol": "constr_viol_tol",
+        "max_iterations": "max_iter",
+        "max_time": "max_wall_time",
+    },
+}
+
+# Iteration counts in the solver print files
+ITERATIONS_PATTERNS = {
+    "snopt": re.compile(r"No\. of major iterations\s+(\d+)"),
+    "ipopt": re.compile(r"Number of Iterations\.*:\s*(\d+)"),
+}
+
+
+def get_solver(solver_config):
+    import pydrake.all
+
+    if solver_config.solver not in SOLVERS:
+        raise ValueError("Unknown solver: {0}".format(solver_config.solver))
+    solver = getattr(pydrake.all, SOLVERS[solver_config.solver])()
+    if not solver.available():
+        raise ValueError("Solver is not available: {0}".format(solver_config.solver))
+    return solver
+
+
+def get_solver_option_values(solver_config):
+    # Returns {option name: value} in the names of the solver
+    if solver_config.solver not in SOLVER_OPTION_NAMES:
+        raise ValueError("Unknown solver: {0}".format(solver_config.solver))
+    option_values = dict()
+    for field, option_name in SOLVER_OPTION_NAMES[solver_config.solver].items():
+        value = getattr(solver_config, field)
+        if value is None:
+            continue
+        if field == "max_iterations":
+            option_values[option_name] = int(value)
+        else:
+            option_values[option_name] = float(value)
+    return option_values
+
+
+def get_solver_options(solver, solver_config, print_file=None):
+    from pydrake.all import SolverOptions, CommonSolverOption
+
+    solver_options = SolverOptions()
+    for option_name, value in get_solver_option_values(solver_config).items():
+        solver_options.SetOption(solver.solver_id(), option_name, value)
+    if print_file is not None:
+        solver_options.SetOption(CommonSolverOption.kPrintFileName, print_file)
+    return solver_options
+
+
+def solve_with_config(prog, solver_config):
+    # Returns (result, iterations). The iterations are read from the
+    # print file of the solver, and are -1 if they could not be found.
+    solver = get_solver(solver_config)
+    fd, print_file = tempfile.mkstemp(prefix="trajopt_", suffix=".out")
+    os.close(fd)
+    try:
+        result = solver.Solve(
+            prog, None, get_solver_options(solver, solver_config, print_file)
+        )
+        with open(print_file, "r") as f:
+            matches = ITERATIONS_PATTERNS[solver_config.solver].findall(f.read())
+    finally:
+        os.remove(print_file)
+    iterations = int(matches[-1]) if len(matches) > 0 else -1
+    return result, iterations
+
+
+def get_exit_status(result):
+    # e.g. "SolutionFound" or "IterationLimit"
+    return result.get_solution_result().name.lstrip("k")
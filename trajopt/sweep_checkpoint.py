@@ -0,0 +1,211 @@
+import io
+import os
+import json
+import logging as log
+import numpy as np
+
+
+# One journal entry per angle, followed by the sample times, state knots and
+# input knots of the angle if it has knots
+JOURNAL_DTYPE = np.dtype(
+    [
+        ("angle", "f8"),  # deg
+        ("status", "U16"),
+        ("avg_speed", "f8"),
+        ("period", "f8"),
+        ("has_knots", "?"),
+    ]
+)
+
+
+class SweepCheckpoint:
+    # Stores the status, solution metrics and dimless knot trajectory of
+    # every angle in a sweep, so that an interrupted sweep can be resumed.
+    # All angles are in degrees.
+    # Every entry is appended to a journal next to the file, so that adding
+    # an angle only writes that angle. save, and loading a journal, compact
+    # the journal into the file.
+    def __init__(self, filename):
+        self.filename = filename
+        self.journal_filename = filename + ".journal"
+        self.entries = dict()
+        if os.path.exists(filename) or os.path.exists(self.journal_filename):
+            self.load()
+        return
+
+    def _key(self, travel_angle):
+        return round(float(travel_angle), 6)
+
+    def load(self):
+        if os.path.exists(self.filename):
+            with np.load(self.filename) as data:
+                for i, travel_angle in enumerate(data["angles"]):
+                    entry = {
+                        "status": str(data["status"][i]),
+                        "avg_speed": float(data["avg_speeds"][i]),
+                        "period": float(data["periods"][i]),
+                        "knots": None,
+                    }
+                    if "x_knots_{0}".format(i) in data:
+                        entry["knots"] = (
+                            data["sample_times_{0}".format(i)],
+                            data["x_knots_{0}".format(i)],
+                            data["u_knots_{0}".format(i)],
+                        )
+                    self.entries[self._key(travel_angle)] = entry
+        if os.path.exists(self.journal_filename):
+            self._load_journal()
+            self.save()
+        log.info(
+            " Loaded checkpoint with {0} angles from {1}".format(
+                len(self.entries), self.filename
+            )
+        )
+        return
+
+    def _load_journal(self):
+        # Later entries of an angle replace the earlier ones
+        with open(self.journal_filename, "rb") as f:
+            while True:
+                try:
+                    record = np.load(f)[0]
+                    knots = None
+                    if record["has_knots"]:
+                        knots = tuple(np.load(f) for _ in range(3))
+                except (EOFError, ValueError, OSError):
+                    # The end of the journal, or an entry cut off by a crash
+                    break
+                self.entries[self._key(record["angle"])] = {
+                    "status": str(record["status"]),
+                    "avg_speed": float(record["avg_speed"]),
+                    "period": float(record["period"]),
+                    "knots": knots,
+                }
+        return
+
+    def save(self):
+        travel_angles = sorted(self.entries.keys())
+        arrays = {
+            "angles": np.array(travel_angles),
+            "status": np.array([self.entries[a]["status"] for a in travel_angles]),
+            "avg_speeds": np.array(
+                [self.entries[a]["avg_speed"] for a in travel_angles]
+            ),
+            "periods": np.array([self.entries[a]["period"] for a in travel_angles]),
+        }
+        for i, travel_angle in enumerate(travel_angles):
+            knots = self.entries[travel_angle]["knots"]
+            if knots is None:
+                continue
+            sample_times, x_knots, u_knots = knots
+            arrays["sample_times_{0}".format(i)] = sample_times
+            arrays["x_knots_{0}".format(i)] = x_knots
+            arrays["u_knots_{0}".format(i)] = u_knots
+
+        # Write to a temporary file first so that a crash while
+        # writing never destroys the previous checkpoint
+        tmp_filename = self.filename + ".tmp.npz"
+        np.savez(tmp_filename, **arrays)
+        os.replace(tmp_filename, self.filename)
+        if os.path.exists(self.journal_filename):
+            os.remove(self.journal_filename)
+        return
+
+    def _add_entry(self, travel_angle, entry):
+        record = np.zeros(1, dtype=JOURNAL_DTYPE)
+        record["angle"] = travel_angle
+        record["status"] = entry["status"]
+        record["avg_speed"] = entry["avg_speed"]
+        record["period"] = entry["period"]
+        record["has_knots"] = entry["knots"] is not None
+
+        # The entry is written at once, so that a crash can only cut off
+        # the last entry
+        data = io.BytesIO()
+        np.save(data, record)
+        if entry["knots"] is not None:
+            for array in entry["knots"]:
+                np.save(data, np.asarray(array, dtype=float))
+        directory = os.path.dirname(self.journal_filename)
+        if directory != "":
+            os.makedirs(directory, exist_ok=True)
+        with open(self.journal_filename, "ab") as f:
+            f.write(data.getvalue())
+        self.entries[self._key(travel_angle)] = entry
+        return
+
+    def add_solution(self, travel_angle, solution_details, knots, status="solved"):
+        self._add_entry(
+            travel_angle,
+            {
+                "status": status,
+                "avg_speed": solution_details.avg_speed,
+                "period": solution_details.period,
+                "knots": knots,
+            },
+        )
+        return
+
+    def import_sweep_results(self, speeds_filename, periods_filename, in_radians=False):
+        # Import the json results of an old sweep. These contain no
+        # trajectories, so they can only be skipped, not used as warm starts
+        with open(speeds_filename, "r") as f:
+            solution_avg_speeds = json.load(f)
+        with open(periods_filename, "r") as f:
+            solution_periods = json.load(f)
+
+        for angle_str, avg_speed in solution_avg_speeds.items():
+            travel_angle = float(angle_str)
+            if in_radians:
+                travel_angle *= 180 / np.pi
+            if self.is_completed(travel_angle):
+                continue
+            self._add_entry(
+                travel_angle,
+                {
+                    "status": "imported",
+                    "avg_speed": avg_speed,
+                    "period": solution_periods[angle_str],
+                    "knots": None,
+                },
+            )
+        return
+
+    def get_status(self, travel_angle):
+        entry = self.entries.get(self._key(travel_angle))
+        if entry is None:
+            return None
+        return entry["status"]
+
+    def is_completed(self, travel_angle):
+        entry = self.entries.get(self._key(travel_angle))
+        return entry is not None and entry["status"] in ("solved", "imported")
+
+    def get_completed_results(self):
+        solution_avg_speeds = dict()
+        solution_periods = dict()
+        for travel_angle, entry in sorted(self.entries.items()):
+            if entry["status"] in ("solved", "imported"):
+                solution_avg_speeds[travel_angle] = entry["avg_speed"]
+                solution_periods[travel_angle] = entry["period"]
+        return solution_avg_speeds, solution_periods
+
+    def get_solved_knots(self):
+        return {
+            travel_angle: entry["knots"]
+            for travel_angle, entry in self.entries.items()
+            if entry["knots"] is not None
+        }
+
+    def get_nearest_knots(self, travel_angle):
+        # Returns the knots of the closest solved angle, or None
+        nearest_knots = None
+        min_dist = np.inf
+        for other_angle, entry in self.entries.items():
+            if entry["knots"] is None:
+                continue
+            dist = abs((other_angle - travel_angle + 180) % 360 - 180)
+            if dist < min_dist:
+                min_dist = dist
+                nearest_knots = entry["knots"]
+        return nearest_knots
@@ -0,0 +1,240 @@
+import numpy as np
+from collections import namedtuple
+
+# Recovery steps, tried in order of the schedule:
+#   previous: warm start from the previous solution in the chain
+#   neighbours: warm start from the nearest solved angles
+#   interpolated: warm start from an interpolation of the solved
+#       neighbours on both sides of the angle
+#   perturbed_period: best warm start with scaled period guesses
+#   straight_line: straight line guesses with scaled avg vel guesses
+RecoveryConfig = namedtuple(
+    "RecoveryConfig",
+    [
+        "schedule",
+        "max_attempts",  # per angle
+        "max_time",  # s per angle
+        "n_neighbours",
+        "period_scales",
+        "avg_vel_scales",
+    ],
+)
+
+DEFAULT_RECOVERY_CONFIG = RecoveryConfig(
+    schedule=(
+        "previous",
+        "neighbours",
+        "interpolated",
+        "perturbed_period",
+        "straight_line",
+    ),
+    max_attempts=8,
+    max_time=900,
+    n_neighbours=2,
+    period_scales=(0.75, 1.5),
+    avg_vel_scales=(1, 0.9, 0.81),
+)
+
+RecoveryAttempt = namedtuple(
+    "RecoveryAttempt", ["step", "source", "knots", "period_guess", "avg_vel_guess"]
+)
+
+
+def calc_angle_dist(angle_0, angle_1):
+    # Signed distance from angle_0 to angle_1 in degrees, in [-180, 180)
+    return (angle_1 - angle_0 + 180) % 360 - 180
+
+
+def interpolate_knots(knots_0, knots_1, weight):
+    # Interpolates two knot trajectories (sample_times, x_knots, u_knots)
+    # over normalized time, so trajectories with different periods can be
+    # combined. weight = 0 returns knots_0 and weight = 1 returns knots_1.
+    sample_times_0, x_knots_0, u_knots_0 = knots_0
+    sample_times_1, x_knots_1, u_knots_1 = knots_1
+    period_0 = sample_times_0[-1] - sample_times_0[0]
+    period_1 = sample_times_1[-1] - sample_times_1[0]
+    phase_0 = (sample_times_0 - sample_times_0[0]) / period_0
+    phase_1 = (sample_times_1 - sample_times_1[0]) / period_1
+    phase = phase_0
+
+    def interpolate_columns(knots, knots_phase):
+        return np.column_stack(
+            [np.interp(phase, knots_phase, column) for column in knots.T]
+        )
+
+    x_knots = (1 - weight) * interpolate_columns(
+        x_knots_0, phase_0
+    ) + weight * interpolate_columns(x_knots_1, phase_1)
+    u_knots = (1 - weight) * interpolate_columns(
+        u_knots_0, phase_0
+    ) + weight * interpolate_columns(u_knots_1, phase_1)
+    period = (1 - weight) * period_0 + weight * period_1
+    return phase * period, x_knots, u_knots
+
+
+def get_recovery_attempts(
+    config,
+    travel_angle,
+    previous_knots,
+    solved_knots,
+    period_guess,
+    avg_vel_guess,
+):
+    # Returns the list of attempts for one angle, following the schedule.
+    # previous_knots is the warm start from the chain, or None.
+    # solved_knots maps solved angles (deg) to their knots.
+    neighbour_angles = sorted(
+        solved_knots.keys(),
+        key=lambda angle: abs(calc_angle_dist(travel_angle, angle)),
+    )
+    neighbour_angles = [
+        angle
+        for angle in neighbour_angles
+        if abs(calc_angle_dist(travel_angle, angle)) > 1e-6
+    ]
+
+    best_knots = previous_knots
+    best_source = "previous"
+    if best_knots is None and len(neighbour_angles) > 0:
+        best_knots = solved_knots[neighbour_angles[0]]
+        best_source = "neighbour {0}".format(neighbour_angles[0])
+
+    steps = config.schedule
+    attempts = []
+    for step in steps:
+        if step == "previous":
+            if previous_knots is not None:
+                attempts.append(
+                    RecoveryAttempt(
+                        step, "previous", previous_knots, period_guess, avg_vel_guess
+                    )
+                )
+            else:
+                attempts.append(
+                    RecoveryAttempt(
+                        step, "straight line", None, period_guess, avg_vel_guess
+                    )
+                )
+
+        elif step == "neighbours":
+            for angle in neighbour_angles[: config.n_neighbours]:
+                # Skip neighbours that are identical to the previous solution
+                if solved_knots[angle] is previous_knots:
+                    continue
+                attempts.append(
+                    RecoveryAttempt(
+                        step,
+                        "neighbour {0}".format(angle),
+                        solved_knots[angle],
+                        period_guess,
+                        avg_vel_guess,
+                    )
+                )
+
+        elif step == "interpolated":
+            lower_angles = [
+                angle
+                for angle in neighbour_angles
+                if calc_angle_dist(travel_angle, angle) < 0
+            ]
+            upper_angles = [
+                angle
+                for angle in neighbour_angles
+                if calc_angle_dist(travel_angle, angle) > 0
+            ]
+            if len(lower_angles) == 0 or len(upper_angles) == 0:
+                continue
+            lower_angle = lower_angles[0]
+            upper_angle = upper_angles[0]
+            lower_dist = abs(calc_angle_dist(travel_angle, lower_angle))
+            upper_dist = abs(calc_angle_dist(travel_angle, upper_angle))
+            weight = lower_dist / (lower_dist + upper_dist)
+            attempts.append(
+                RecoveryAttempt(
+                    step,
+                    "interpolated {0} and {1}".format(lower_angle, upper_angle),
+                    interpolate_knots(
+                        solved_knots[lower_angle], solved_knots[upper_angle], weight
+                    ),
+                    period_guess,
+                    avg_vel_guess,
+                )
+            )
+
+        elif step == "perturbed_period":
+            if best_knots is None:
+                continue
+            sample_times, x_knots, u_knots = best_knots
+            for scale in config.period_scales:
+                # The period of the warm start is given by its sample times
+                attempts.append(
+                    RecoveryAttempt(
+                        step,
+                        best_source,
+                        (scale * sample_times, x_knots, u_knots),
+                        scale * period_guess,
+                        avg_vel_guess,
+                    )
+                )
+
+        elif step == "straight_line":
+            for scale in config.avg_vel_scales:
+                # The first attempt was already a straight line
+                if previous_knots is None and scale == 1 and "previous" in steps:
+                    continue
+                attempts.append(
+                    RecoveryAttempt(
+                        step, "straight line", None, period_guess, scale * avg_vel_guess
+                    )
+                )
+
+        else:
+            raise ValueError("Unknown recovery step: {0}".format(step))
+
+    # The plain attempt is always run, even with an empty schedule
+    if len(attempts) == 0 or config.max_attempts < 1:
+        plain_knots = previous_knots
+        plain_source = "previous"
+        if plain_knots is None:
+            plain_source = "straight line"
+        return [
+            RecoveryAttempt(
+                "previous", plain_source, plain_knots, period_guess, avg_vel_guess
+            )
+        ]
+    return attempts[: config.max_attempts]
+
+
+def get_race_starts(
+    n_starts,
+    period_guess,
+    avg_vel_guess,
+    warm_start=None,
+    period_scales=(1, 0.75, 1.5, 0.5, 2),
+    avg_vel_scales=(1, 0.8, 1.25),
+):
+    # Returns n_starts different attempts for one angle, to be solved in
+    # parallel. warm_start is (knots, source) or None. The warm start is
+    # tried with all period guesses first, then straight lines with all
+    # combinations of period and avg vel guesses.
+    attempts = []
+    if warm_start is not None:
+        knots, source = warm_start
+        for period_scale in period_scales:
+            attempts.append(
+                RecoveryAttempt(
+                    "race", source, knots, period_scale * period_guess, avg_vel_guess
+                )
+            )
+    for avg_vel_scale in avg_vel_scales:
+        for period_scale in period_scales:
+            attempts.append(
+                RecoveryAttempt(
+                    "race",
+                    "straight line",
+                    None,
+                    period_scale * period_guess,
+                    avg_vel_scale * avg_vel_guess,
+                )
+            )
+    return attempts[:n_starts]
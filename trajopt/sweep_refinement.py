@@ -0,0 +1,74 @@
+import numpy as np
+
+
+def calc_interval_change(
+    avg_speed_0, avg_speed_1, period_0, period_1, speed_tol, period_tol
+):
+    # Largest change over an interval, relative to the tolerances.
+    # Values above 1 mean the interval should be refined.
+    return max(
+        abs(avg_speed_1 - avg_speed_0) / speed_tol,
+        abs(period_1 - period_0) / period_tol,
+    )
+
+
+def get_refinement_angles(
+    travel_angles,
+    avg_speeds,
+    periods,
+    topologies=None,
+    speed_tol=1.0,
+    period_tol=1.0,
+    min_angle_increment=1.0,
+    max_angles=None,
+    wrap_around=False,
+):
+    # Returns the midpoints of all intervals between neighbouring solved
+    # angles where avg speed, period or solution topology change by more
+    # than the tolerance, ordered with the largest change first.
+    # travel_angles are in degrees. With wrap_around, the interval from the
+    # last angle over 360 deg to the first angle is also refined.
+    order = np.argsort(travel_angles)
+    travel_angles = np.asarray(travel_angles, dtype=float)[order]
+    avg_speeds = np.asarray(avg_speeds, dtype=float)[order]
+    periods = np.asarray(periods, dtype=float)[order]
+    if topologies is None:
+        topologies = [None] * len(travel_angles)
+    topologies = [topologies[i] for i in order]
+    if wrap_around and len(travel_angles) > 1:
+        travel_angles = np.append(travel_angles, travel_angles[0] + 360)
+        avg_speeds = np.append(avg_speeds, avg_speeds[0])
+        periods = np.append(periods, periods[0])
+        topologies.append(topologies[0])
+
+    candidates = []
+    for i in range(len(travel_angles) - 1):
+        # Do not bisect intervals below the minimum increment
+        if travel_angles[i + 1] - travel_angles[i] < 2 * min_angle_increment:
+            continue
+
+        change = calc_interval_change(
+            avg_speeds[i],
+            avg_speeds[i + 1],
+            periods[i],
+            periods[i + 1],
+            speed_tol,
+            period_tol,
+        )
+        # A change in topology always triggers a refinement
+        if (
+            topologies[i] is not None
+            and topologies[i + 1] is not None
+            and topologies[i] != topologies[i + 1]
+        ):
+            change = np.inf
+
+        if change > 1:
+            midpoint = (travel_angles[i] + travel_angles[i + 1]) / 2 % 360
+            candidates.append((change, midpoint))
+
+    candidates.sort(key=lambda candidate: -candidate[0])
+    refinement_angles = [float(midpoint) for _, midpoint in candidates]
+    if max_angles is not None:
+        refinement_angles = refinement_angles[:max_angles]
+    return refinement_angles
@@ -1,10 +1,85 @@
-from analysis.traj_analyzer import do_energy_analysis, calc_phys_values_from_traj
+from analysis.traj_analyzer import (
+    do_energy_analysis,
+    calc_energy_analysis,
+    calc_phys_values_from_traj,
+    convert_traj_to_NED,
+)
 from trajopt.direct_collocation import *
 from dynamics.zhukovskii_glider import *
 from plot.plot import *
-from trajopt.fourier_collocation import *
+from trajopt.results import (
+    SWEEP_SPEEDS_FILE,
+    SWEEP_PERIODS_FILE,
+    SWEEP_CHECKPOINT_FILE,
+    SWEEP_TRAJECTORIES_FILE,
+    WARM_START_DIR,
+    SOLUTION_CACHE_DIR,
+    LOOKUP_TABLE_FILE,
+    PARAMETER_SWEEP_FILE,
+    SWEEP_TELEMETRY_FILE,
+    SWEEP_TELEMETRY_SUMMARY_FILE,
+    TELEMETRY_FILE,
+    show_sweep_result,
+)
+from trajopt.sweep_checkpoint import SweepCheckpoint
+from trajopt.trajectory_store import TrajectoryStore
+from trajopt.sweep_refinement import get_refinement_angles
+from trajopt.sweep_recovery import (
+    DEFAULT_RECOVERY_CONFIG,
+    get_recovery_attempts,
+    get_race_starts,
+)
+from trajopt.solver_config import DEFAULT_SOLVER_CONFIG
+from trajopt.solve_telemetry import (
+    TelemetryLog,
+    get_telemetry_record,
+    summarize_telemetry,
+    log_telemetry_summary,
+)
+from trajopt.warm_start_library import WarmStartLibrary, find_similar_libraries
+from trajopt.solution_cache import SolutionCache, get_cache_key
+from trajopt.lookup_table import build_lookup_table
+from dynamics.wind_models import get_wind_params, set_wind_params, DEFAULT_WIND_PARAMS
+from trajopt.parameter_sweep import (
+    ParameterSweepResults,
+    get_parameter_samples,
+    split_params,
+    split_samples,
+)
+import os
 import json
+import time
 import logging as log
+import queue
+from collections import namedtuple
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+
+# Coarse mesh and relaxed tolerances for fast previews
+PREVIEW_N = 15
+PREVIEW_SOLVER_CONFIG = DEFAULT_SOLVER_CONFIG._replace(
+    optimality_tol=1e-3, feasibility_tol=1e-4
+)
+
+
+def get_preview_solver_config(solver_config):
+    # The preview keeps its relaxed tolerances, apart from the options that
+    # are changed from the defaults in solver_config
+    changed_options = {
+        name: value
+        for name, value in solver_config._asdict().items()
+        if value != getattr(DEFAULT_SOLVER_CONFIG, name)
+    }
+    return PREVIEW_SOLVER_CONFIG._replace(**changed_options)
+
+
+PreviewAccuracy = namedtuple(
+    "PreviewAccuracy",
+    [
+        "max_integration_error",  # dimless, largest over the segments
+        "avg_speed_drift",  # relative, of the simulated solution input
+    ],
+)
 
 
 def calc_and_plot_trajectory(
@@ -14,6 +89,14 @@ def calc_and_plot_trajectory(
     period_guess=8,
     avg_vel_scale_guess=1,
     plot_axis="",
+    use_warm_start=True,
+    use_cache=True,
+    N=31,
+    max_dt_scale=3,
+    mesh_tol=None,
+    solver_config=DEFAULT_SOLVER_CONFIG,
+    n_racers=1,
+    race_deadline=None,
 ):
 
     (m, c_Dp, A, b, rho, g, AR) = phys_params
@@ -27,7 +110,7 @@ def calc_and_plot_trajectory(
         h0,
     ) = phys_constraints
 
-    zhukovskii_glider = RelativeZhukovskiiGlider(
+    glider_args = (
         m,
         c_Dp,
         A,
@@ -42,6 +125,7 @@ def calc_and_plot_trajectory(
         max_height,
         h0,
     )
+    zhukovskii_glider = RelativeZhukovskiiGlider(*glider_args)
 
     # Print performance params
     Lam = zhukovskii_glider.calc_opt_glide_ratio(AR, c_Dp)
@@ -58,19 +142,150 @@ def calc_and_plot_trajectory(
         )
     )
 
-    (
-        found_solution,
-        solution_details,
-        solution_trajectory,
-        _,
-    ) = direct_collocation_relative(
-        zhukovskii_glider,
-        travel_angle * np.pi / 180,
-        period_guess=period_guess,
-        avg_vel_scale_guess=avg_vel_scale_guess,
+    # Identical requests return the cached solution
+    solution_cache = SolutionCache(SOLUTION_CACHE_DIR)
+    cache_key = get_cache_key(
+        {
+            "phys_params": phys_params,
+            "phys_constraints": phys_constraints,
+            "travel_angle": travel_angle,
+            "period_guess": period_guess,
+            "avg_vel_scale_guess": avg_vel_scale_guess,
+            "use_warm_start": use_warm_start,
+            "N": N,
+            "max_dt_scale": max_dt_scale,
+            "mesh_tol": mesh_tol,
+            "solver_config": solver_config._asdict(),
+            "n_racers": n_racers,
+            "race_deadline": race_deadline,
+            "wind": get_wind_params(),
+            "dynamics_version": DYNAMICS_VERSION,
+        }
     )
+    start_time = time.time()
+    cached_solution = None
+    if use_cache:
+        cached_solution = solution_cache.get(cache_key)
 
-    avg_speed, period, limited_by_time_step = solution_details
+    if cached_solution is not None:
+        log.info(" Using cached solution {0}".format(cache_key))
+        solution_details, solution_trajectory = cached_solution
+        solution_details = SolutionDetails(**solution_details)
+        TelemetryLog(TELEMETRY_FILE).add(
+            get_telemetry_record(
+                travel_angle,
+                solution_details._replace(
+                    warm_start="cache", total_time=time.time() - start_time
+                ),
+                "cached",
+            )
+        )
+    else:
+        # Start from the stored solutions closest to the travel angle
+        warm_start_library = WarmStartLibrary(WARM_START_DIR, zhukovskii_glider)
+        warm_start = None
+        dimless_reuse = None
+        if use_warm_start:
+            warm_start = warm_start_library.get_knots(travel_angle)
+            if not warm_start_library.has_angle(travel_angle):
+                dimless_reuse = find_dimless_reuse(zhukovskii_glider, travel_angle)
+            if dimless_reuse is not None and warm_start is None:
+                warm_start = dimless_reuse[0:2]
+
+        if dimless_reuse is not None and dimless_reuse[3]:
+            # Same dimless problem, only rescale the solution
+            (
+                found_solution,
+                solution_details,
+                solution_trajectory,
+                next_initial_guess,
+            ) = rescale_solution(
+                zhukovskii_glider, travel_angle * np.pi / 180, dimless_reuse[0]
+            )
+            solution_details = solution_details._replace(warm_start=dimless_reuse[1])
+        elif n_racers > 1:
+            # Solve from several starts in parallel
+            found_solution, solution_details, solution_trajectory, knots = race_solve(
+                glider_args,
+                travel_angle,
+                get_race_starts(
+                    n_racers, period_guess, avg_vel_scale_guess * V_l, warm_start
+                ),
+                n_racers,
+                race_deadline,
+                N,
+                max_dt_scale,
+                mesh_tol,
+                solver_config,
+            )
+            if found_solution:
+                next_initial_guess = create_initial_guess(*knots)
+        else:
+            initial_guess = None
+            if warm_start is not None:
+                knots, source = warm_start
+                log.info(" Warm starting from {0}".format(source))
+                initial_guess = create_initial_guess(*knots)
+
+            if mesh_tol is not None:
+                # Coarse to fine, starting from a coarser mesh than N
+                (
+                    found_solution,
+                    solution_details,
+                    solution_trajectory,
+                    next_initial_guess,
+                ) = direct_collocation_refined(
+                    zhukovskii_glider,
+                    travel_angle * np.pi / 180,
+                    mesh_tol=mesh_tol,
+                    N_coarse=min(15, N),
+                    max_dt_scale=max_dt_scale,
+                    period_guess=period_guess,
+                    avg_vel_scale_guess=avg_vel_scale_guess,
+                    initial_guess=initial_guess,
+                    solver_config=solver_config,
+                )
+            else:
+                (
+                    found_solution,
+                    solution_details,
+                    solution_trajectory,
+                    next_initial_guess,
+                ) = direct_collocation_relative(
+                    zhukovskii_glider,
+                    travel_angle * np.pi / 180,
+                    period_guess=period_guess,
+                    avg_vel_scale_guess=avg_vel_scale_guess,
+                    initial_guess=initial_guess,
+                    N=N,
+                    max_dt_scale=max_dt_scale,
+                    solver_config=solver_config,
+                )
+
+        if solution_details.warm_start == "unknown":
+            solution_details = solution_details._replace(
+                warm_start="straight line" if warm_start is None else warm_start[1]
+            )
+        solution_details = solution_details._replace(
+            total_time=time.time() - start_time
+        )
+        TelemetryLog(TELEMETRY_FILE).add(
+            get_telemetry_record(
+                travel_angle, solution_details, "solved" if found_solution else "failed"
+            )
+        )
+        if found_solution:
+            warm_start_library.add(
+                travel_angle, get_trajectory_knots(next_initial_guess)
+            )
+            warm_start_library.save()
+            if use_cache:
+                solution_cache.put(
+                    cache_key, solution_details._asdict(), solution_trajectory
+                )
+
+    period = solution_details.period
+    limited_by_time_step = solution_details.limited_by_time_step
 
     # Check if it was limited by step size
     if limited_by_time_step == "upper":
@@ -82,19 +297,7 @@ def calc_and_plot_trajectory(
     times, x_knots_ENU, u_knots_ENU = solution_trajectory
 
     # Calc NED frame trajectory for physical calcs
-    x_knots_NED = np.zeros(x_knots_ENU.shape)
-    u_knots_NED = np.zeros(u_knots_ENU.shape)
-
-    x_knots_NED[:, 0] = x_knots_ENU[:, 1]
-    x_knots_NED[:, 1] = x_knots_ENU[:, 0]
-    x_knots_NED[:, 2] = -x_knots_ENU[:, 2]
-    x_knots_NED[:, 3] = x_knots_ENU[:, 4]
-    x_knots_NED[:, 4] = x_knots_ENU[:, 3]
-    x_knots_NED[:, 5] = -x_knots_ENU[:, 5]
-
-    u_knots_NED[:, 0] = u_knots_ENU[:, 1]
-    u_knots_NED[:, 1] = u_knots_ENU[:, 0]
-    u_knots_NED[:, 2] = -u_knots_ENU[:, 2]
+    x_knots_NED, u_knots_NED = convert_traj_to_NED(x_knots_ENU, u_knots_ENU)
 
     # Calculate physical quantities in trajectory
     (
@@ -123,7 +326,7 @@ def calc_and_plot_trajectory(
         times, x_knots_NED, u_knots_NED, phys_params
     )
     height_knots = x_knots_ENU[:, 2]
-    abs_vel_knots = np.sqrt(np.diag(vel_knots.dot(vel_knots.T)))
+    abs_vel_knots = np.linalg.norm(vel_knots, axis=1)
 
     # Plotting
     plot_glider_pos(
@@ -159,8 +362,313 @@ def calc_and_plot_trajectory(
     return
 
 
+def preview_trajectory(
+    phys_params,
+    phys_constraints,
+    travel_angle=0,
+    period_guess=8,
+    avg_vel_scale_guess=1,
+    use_warm_start=True,
+    N=PREVIEW_N,
+    solver_config=PREVIEW_SOLVER_CONFIG,
+    max_drift=0.01,
+):
+    # Fast coarse solve for quick feedback. Only the knots are returned, and
+    # nothing is plotted, cached or added to the warm start library. Returns
+    # (found_solution, solution_details, accuracy, message), with a message
+    # for the user.
+    (m, c_Dp, A, b, rho, g, AR) = phys_params
+    zhukovskii_glider = RelativeZhukovskiiGlider(
+        m, c_Dp, A, b, rho, g, *phys_constraints
+    )
+
+    start_time = time.time()
+    initial_guess = None
+    warm_start = None
+    if use_warm_start:
+        warm_start = WarmStartLibrary(WARM_START_DIR, zhukovskii_glider).get_knots(
+            travel_angle
+        )
+        if warm_start is not None:
+            initial_guess = create_initial_guess(*warm_start[0])
+
+    (
+        found_solution,
+        solution_details,
+        solution_trajectory,
+        next_initial_guess,
+    ) = direct_collocation_relative(
+        zhukovskii_glider,
+        travel_angle * np.pi / 180,
+        period_guess=period_guess,
+        avg_vel_scale_guess=avg_vel_scale_guess,
+        initial_guess=initial_guess,
+        N=N,
+        solver_config=solver_config,
+        N_plot=N,
+    )
+    solution_details = solution_details._replace(
+        warm_start="straight line" if warm_start is None else warm_start[1],
+        total_time=time.time() - start_time,
+    )
+    TelemetryLog(TELEMETRY_FILE).add(
+        get_telemetry_record(
+            travel_angle,
+            solution_details,
+            "solved" if found_solution else "failed",
+            preview=True,
+        )
+    )
+    if not found_solution:
+        log.warning(" Preview found no solution")
+        return (
+            False,
+            solution_details,
+            None,
+            "No preview solution found, try a full solve",
+        )
+
+    # The accuracy is estimated from simulating the solution input, as there
+    # is no full resolution solution to compare with
+    knots = get_trajectory_knots(next_initial_guess)
+    x_sim = simulate_knots(zhukovskii_glider, knots)
+    accuracy = PreviewAccuracy(
+        max_integration_error=np.max(calc_integration_errors(zhukovskii_glider, knots)),
+        avg_speed_drift=calc_avg_speed_drift(
+            travel_angle * np.pi / 180, knots[1], x_sim
+        ),
+    )
+    message = (
+        "Preview with N={0}: avg speed {1:.2f} m/s, period {2:.2f} s, "
+        + "speed drift {3:.2%}, max integration error {4:.1e}, in {5:.2f} s"
+    ).format(
+        N,
+        solution_details.avg_speed,
+        solution_details.period,
+        accuracy.avg_speed_drift,
+        accuracy.max_integration_error,
+        solution_details.total_time,
+    )
+    log.info(" " + message)
+    if accuracy.avg_speed_drift > max_drift:
+        log.warning(" Preview speed drift above {0}".format(max_drift))
+        message += "\nThe preview is inaccurate, run a full solve before using it"
+    return True, solution_details, accuracy, message
+
+
+def find_dimless_reuse(zhukovskii_glider, travel_angle, max_residual=0.1):
+    # Looks for solutions of other gliders with (nearly) the same dimless
+    # problem. Returns (knots, source, residual, exact) or None. If exact, the
+    # knots are also the solution for this glider and only need rescaling,
+    # otherwise they are a warm start.
+    similar_libraries = find_similar_libraries(
+        WARM_START_DIR, zhukovskii_glider, max_residual
+    )
+    dimless_problem = get_dimless_problem(zhukovskii_glider)
+    for residual, library in similar_libraries:
+        if library.is_same_dimless_solution(travel_angle, dimless_problem):
+            knots, _ = library.get_knots(travel_angle)
+            defect = np.max(np.abs(calc_collocation_defects(zhukovskii_glider, knots)))
+            log.info(
+                " Reusing dimless solution of glider {0} at {1} deg, residual: {2}, max defect: {3}".format(
+                    library.key, travel_angle, residual, defect
+                )
+            )
+            return knots, "glider {0}".format(library.key), residual, True
+
+    for residual, library in similar_libraries:
+        warm_start = library.get_knots(travel_angle)
+        if warm_start is not None:
+            knots, source = warm_start
+            log.info(
+                " Using dimless solution of glider {0} as warm start, residual: {1}".format(
+                    library.key, residual
+                )
+            )
+            return (
+                knots,
+                "{0} of glider {1}".format(source, library.key),
+                residual,
+                False,
+            )
+    return None
+
+
+def race_solve(
+    glider_args,
+    travel_angle,
+    attempts,
+    n_workers,
+    deadline=None,
+    N=31,
+    max_dt_scale=3,
+    mesh_tol=None,
+    solver_config=DEFAULT_SOLVER_CONFIG,
+):
+    # Solves all attempts for one angle in parallel processes.
+    # Without a deadline the first solution wins, with a deadline (s) the
+    # solution with the highest avg speed found before the deadline wins.
+    # The remaining solves are cancelled.
+    # Returns (found_solution, solution_details, solution_trajectory, knots)
+    start_time = time.time()
+    _, w_ref, _, h_ref, h_0, alpha = get_wind_params()
+    wind_params = {"w_ref": w_ref, "h_ref": h_ref, "h_0": h_0, "alpha": alpha}
+    # More workers than cores only slow down every solve
+    n_workers = min(n_workers, len(attempts), mp.cpu_count())
+    log.info(
+        " ### Racing {0} starts for {1} deg with {2} workers".format(
+            len(attempts), travel_angle, n_workers
+        )
+    )
+
+    result_queue = queue.Queue()
+    pool = mp.Pool(n_workers)
+    try:
+        for attempt in attempts:
+            pool.apply_async(
+                _race_worker,
+                (
+                    glider_args,
+                    wind_params,
+                    travel_angle,
+                    attempt,
+                    N,
+                    max_dt_scale,
+                    mesh_tol,
+                    solver_config,
+                ),
+                callback=result_queue.put,
+                error_callback=result_queue.put,
+            )
+
+        best_result = None
+        failed_result = None
+        n_finished = 0
+        while n_finished < len(attempts):
+            timeout = None
+            if deadline is not None:
+                timeout = deadline - (time.time() - start_time)
+                if timeout <= 0:
+                    break
+            try:
+                result = result_queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if isinstance(result, Exception):
+                raise result
+            n_finished += 1
+
+            found_solution, solution_details, _, _ = result
+            log.info(
+                " Race start from {0} {1} in {2} s, avg speed: {3}".format(
+                    solution_details.warm_start,
+                    "solved" if found_solution else "failed",
+                    solution_details.solve_time,
+                    solution_details.avg_speed,
+                )
+            )
+            if not found_solution:
+                failed_result = result
+                continue
+            if (
+                best_result is None
+                or solution_details.avg_speed > best_result[1].avg_speed
+            ):
+                best_result = result
+            if deadline is None:
+                break
+    finally:
+        # Cancel the remaining solves
+        pool.terminate()
+        pool.join()
+
+    result = best_result if best_result is not None else failed_result
+    if result is None:
+        log.error(" No race start finished within {0} s".format(deadline))
+        solution_details = SolutionDetails(
+            avg_speed=-1,
+            period=-1,
+            limited_by_time_step=-1,
+            cost=-1,
+            formulation_time=0,
+            solve_time=time.time() - start_time,
+            solver=solver_config.solver,
+            exit_status="Deadline",
+            warm_start="race",
+            total_time=time.time() - start_time,
+        )
+        return False, solution_details, None, None
+
+    found_solution, solution_details, solution_trajectory, knots = result
+    solution_details = solution_details._replace(
+        retries=n_finished - 1, total_time=time.time() - start_time
+    )
+    log.info(
+        " Race for {0} deg {1} with start from {2} after {3} s, {4} of {5} starts finished".format(
+            travel_angle,
+            "won" if found_solution else "lost",
+            solution_details.warm_start,
+            solution_details.total_time,
+            n_finished,
+            len(attempts),
+        )
+    )
+    return found_solution, solution_details, solution_trajectory, knots
+
+
+def _race_worker(
+    glider_args,
+    wind_params,
+    travel_angle,
+    attempt,
+    N,
+    max_dt_scale,
+    mesh_tol,
+    solver_config,
+):
+    # Every worker builds its own glider and Drake programs
+    set_wind_params(**wind_params)
+    zhukovskii_glider = RelativeZhukovskiiGlider(*glider_args)
+    initial_guess = None
+    if attempt.knots is not None:
+        initial_guess = create_initial_guess(*attempt.knots)
+    solve_kwargs = dict(
+        period_guess=attempt.period_guess,
+        avg_vel_guess=attempt.avg_vel_guess,
+        initial_guess=initial_guess,
+        max_dt_scale=max_dt_scale,
+        solver_config=solver_config,
+    )
+    if mesh_tol is not None:
+        result = direct_collocation_refined(
+            zhukovskii_glider,
+            travel_angle * np.pi / 180,
+            mesh_tol=mesh_tol,
+            N_coarse=min(15, N),
+            **solve_kwargs
+        )
+    else:
+        result = direct_collocation_relative(
+            zhukovskii_glider, travel_angle * np.pi / 180, N=N, **solve_kwargs
+        )
+
+    found_solution, solution_details, solution_trajectory, next_initial_guess = result
+    solution_details = solution_details._replace(
+        warm_start="{0}, period_guess: {1}, avg_vel_guess: {2}".format(
+            attempt.source, attempt.period_guess, attempt.avg_vel_guess
+        )
+    )
+    # Drake trajectories can not be sent between processes
+    knots = None
+    if found_solution:
+        knots = get_trajectory_knots(next_initial_guess)
+    return found_solution, solution_details, solution_trajectory, knots
+
+
 # TODO this is unfinished and currently not working
 def do_collocation_w_fourier():
+    from trajopt.fourier_collocation import FourierCollocationProblem
+
     zhukovskii_glider = ZhukovskiiGlider()
     prog = FourierCollocationProblem(
         zhukovskii_glider.continuous_dynamics_dimless,
@@ -170,27 +678,26 @@ def do_collocation_w_fourier():
     return
 
 
-def show_sweep_result():
-    # Load data from files
-
-    solution_avg_speeds = dict()
-    solution_periods = dict()
-    with open("./results/plots/sweep_results_speeds.txt", "r") as f:
-        solution_avg_speeds = json.load(f)
-        f.close()
-    with open("./results/plots/sweep_results_periods.txt", "r") as f:
-        solution_periods = json.load(f)
-        f.close()
-
-    plot_sweep_polar(solution_avg_speeds, solution_periods)
-    plt.show()
+def generate_lookup_table(phys_params, filename=LOOKUP_TABLE_FILE, n_samples=64):
+    # Builds the lookup table from the trajectories of the last sweep
+    (m, c_Dp, A, b, rho, g, AR) = phys_params
+    zhukovskii_glider = RelativeZhukovskiiGlider(m, c_Dp, A, b, rho, g)
+    trajectory_store = TrajectoryStore(SWEEP_TRAJECTORIES_FILE, mmap=True)
+    build_lookup_table(zhukovskii_glider, trajectory_store, filename, n_samples)
+    return
 
 
 def sweep_calculation(
-    phys_params, start_angle, period_guess=7, avg_vel_scale_guess=2, n_angles=9
+    phys_params,
+    start_angle,
+    period_guess=7,
+    avg_vel_scale_guess=2,
+    n_angles=9,
+    n_workers=1,
+    resume=False,
+    recovery_config=DEFAULT_RECOVERY_CONFIG,
+    solver_config=DEFAULT_SOLVER_CONFIG,
 ):
-    SAVE_SOLUTION_EVERY_N_ANGLE = 1
-
     (m, c_Dp, A, b, rho, g, AR) = phys_params
     zhukovskii_glider = RelativeZhukovskiiGlider(m, c_Dp, A, b, rho, g)
 
@@ -223,40 +730,504 @@ def sweep_calculation(
     #        ]
     #    )
 
-    travel_angles = np.hstack(
-        [
-            np.arange(280, 350, angle_increment),
-            np.flip(np.arange(180, 280, angle_increment)),
-            np.flip(np.arange(10, 80, angle_increment)),
-            np.arange(80, 180, angle_increment),
-        ]
+    chains = get_sweep_chains(angle_increment)
+    if n_workers > 1:
+        chains = split_sweep_chains(chains, n_workers)
+    else:
+        # Solve everything as one continuous chain
+        chains = [np.hstack(chains)]
+
+    checkpoint, trajectory_store = open_sweep_results(resume)
+
+    # Skip completed angles, and warm start every chain
+    # from the nearest solved neighbour
+    chains = [
+        np.array([angle for angle in chain if not checkpoint.is_completed(angle)])
+        for chain in chains
+    ]
+    chains = [chain for chain in chains if len(chain) > 0]
+    chains = reuse_dimless_sweep_results(
+        zhukovskii_glider, checkpoint, trajectory_store, chains
     )
+    initial_knots = [checkpoint.get_nearest_knots(chain[0]) for chain in chains]
+    for i, chain in enumerate(chains):
+        if initial_knots[i] is None:
+            dimless_reuse = find_dimless_reuse(zhukovskii_glider, chain[0])
+            if dimless_reuse is not None:
+                initial_knots[i] = dimless_reuse[0]
+    if resume:
+        log.info(
+            " ### Resuming sweep, {0} angles left".format(
+                sum(len(chain) for chain in chains)
+            )
+        )
+
+    for result in run_sweep_chains(
+        phys_params,
+        chains,
+        period_guess,
+        avg_vel_scale_guess,
+        n_workers,
+        initial_knots=initial_knots,
+        neighbour_knots=checkpoint.get_solved_knots(),
+        recovery_config=recovery_config,
+        solver_config=solver_config,
+    ):
+        save_sweep_result(checkpoint, trajectory_store, *result)
+
+    checkpoint.save()
+    trajectory_store.save()
+    update_warm_start_library(phys_params, checkpoint)
+    write_telemetry_summary(SWEEP_TELEMETRY_FILE, SWEEP_TELEMETRY_SUMMARY_FILE)
+    return
+
+
+def get_sweep_chains(angle_increment):
+    # Every chain is solved in order, using the previous solution
+    # as initial guess for the next angle
+    return [
+        np.arange(280, 350, angle_increment),
+        np.flip(np.arange(180, 280, angle_increment)),
+        np.flip(np.arange(10, 80, angle_increment)),
+        np.arange(80, 180, angle_increment),
+    ]
 
-    solution_avg_speeds = dict()
-    solution_periods = dict()
+
+def open_sweep_results(resume=False):
+    if not resume:
+        for filename in (
+            SWEEP_CHECKPOINT_FILE,
+            SWEEP_CHECKPOINT_FILE + ".journal",
+            SWEEP_TRAJECTORIES_FILE,
+            SWEEP_TRAJECTORIES_FILE + ".journal",
+            SWEEP_TELEMETRY_FILE,
+        ):
+            if os.path.exists(filename):
+                os.remove(filename)
+    checkpoint = SweepCheckpoint(SWEEP_CHECKPOINT_FILE)
+    trajectory_store = TrajectoryStore(SWEEP_TRAJECTORIES_FILE)
+    if (
+        resume
+        and len(checkpoint.entries) == 0
+        and os.path.exists(SWEEP_SPEEDS_FILE)
+        and os.path.exists(SWEEP_PERIODS_FILE)
+    ):
+        # Continue a sweep that was run without a checkpoint
+        checkpoint.import_sweep_results(SWEEP_SPEEDS_FILE, SWEEP_PERIODS_FILE)
+    return checkpoint, trajectory_store
+
+
+def save_sweep_result(
+    checkpoint,
+    trajectory_store,
+    travel_angle,
+    solution_details,
+    solution_trajectory,
+    knots,
+    status="solved",
+):
+    # Only appended to the journals, the checkpoint and the store are saved
+    # once per sweep
+    checkpoint.add_solution(travel_angle, solution_details, knots, status)
+    trajectory_store.add(travel_angle, solution_details, solution_trajectory, status)
+
+    TelemetryLog(SWEEP_TELEMETRY_FILE).add(
+        get_telemetry_record(travel_angle, solution_details, status)
+    )
+
+    solution_avg_speeds, solution_periods = checkpoint.get_completed_results()
+    with open(SWEEP_SPEEDS_FILE, "w") as f:
+        f.write(json.dumps(solution_avg_speeds))
+        f.close()
+
+    with open(SWEEP_PERIODS_FILE, "w") as f:
+        f.write(json.dumps(solution_periods))
+        f.close()
+    return
+
+
+def adaptive_sweep_calculation(
+    phys_params,
+    period_guess=7,
+    avg_vel_scale_guess=2,
+    n_initial_angles=9,
+    max_solves=40,
+    speed_tol=1.0,
+    period_tol=1.0,
+    min_angle_increment=1.0,
+    n_workers=1,
+    resume=False,
+    recovery_config=DEFAULT_RECOVERY_CONFIG,
+    solver_config=DEFAULT_SOLVER_CONFIG,
+):
+    # Solves a coarse sweep first, and then bisects the intervals where
+    # avg speed, period or topology change the most until the change over
+    # every interval is within tolerance or max_solves angles are solved.
+    # The coarse sweep is always completed.
+    log.info(
+        " ### Running adaptive dircol sweep with:\n"
+        + "\tinitial angles: {0}\n\tmax solves: {1}\n\tspeed tol: {2} m/s\n\tperiod tol: {3} s".format(
+            n_initial_angles, max_solves, speed_tol, period_tol
+        )
+    )
+
+    checkpoint, trajectory_store = open_sweep_results(resume)
+    n_solves = 0
+
+    chains = get_sweep_chains(360 / n_initial_angles)
+    chains = [
+        np.array([angle for angle in chain if not checkpoint.is_completed(angle)])
+        for chain in chains
+    ]
+    chains = [chain for chain in chains if len(chain) > 0]
+    if n_workers > 1:
+        chains = split_sweep_chains(chains, n_workers)
+    initial_knots = [checkpoint.get_nearest_knots(chain[0]) for chain in chains]
+    for result in run_sweep_chains(
+        phys_params,
+        chains,
+        period_guess,
+        avg_vel_scale_guess,
+        n_workers,
+        initial_knots=initial_knots,
+        neighbour_knots=checkpoint.get_solved_knots(),
+        recovery_config=recovery_config,
+        solver_config=solver_config,
+    ):
+        save_sweep_result(checkpoint, trajectory_store, *result)
+        n_solves += 1
+
+    # Refinement, every new angle is warm started from its nearest neighbour
+    while n_solves < max_solves:
+        solution_avg_speeds, solution_periods = checkpoint.get_completed_results()
+        travel_angles = sorted(solution_avg_speeds.keys())
+        topologies = []
+        for travel_angle in travel_angles:
+            record = trajectory_store.get(travel_angle)
+            topologies.append(
+                None if record is None else str(record["limited_by_time_step"])
+            )
+
+        refinement_args = (
+            travel_angles,
+            [solution_avg_speeds[angle] for angle in travel_angles],
+            [solution_periods[angle] for angle in travel_angles],
+            topologies,
+            speed_tol,
+            period_tol,
+        )
+        refinement_angles = get_refinement_angles(
+            *refinement_args, min_angle_increment, wrap_around=True
+        )
+        # Failed angles are not solved again
+        refinement_angles = [
+            angle for angle in refinement_angles if checkpoint.get_status(angle) is None
+        ][: max_solves - n_solves]
+        if len(refinement_angles) == 0:
+            # Intervals can be above tolerance, but too small to bisect or
+            # with a failed midpoint
+            n_unresolved = len(
+                get_refinement_angles(*refinement_args, 0, wrap_around=True)
+            )
+            if n_unresolved == 0:
+                log.info(" ### Sweep converged after {0} solves".format(n_solves))
+            else:
+                log.warning(
+                    " ### Sweep stopped after {0} solves with {1} intervals above tolerance that can not be refined".format(
+                        n_solves, n_unresolved
+                    )
+                )
+            break
+
+        log.info(" ### Refining sweep at angles {0}".format(refinement_angles))
+        chains = [np.array([angle]) for angle in refinement_angles]
+        initial_knots = [
+            checkpoint.get_nearest_knots(angle) for angle in refinement_angles
+        ]
+        for result in run_sweep_chains(
+            phys_params,
+            chains,
+            period_guess,
+            avg_vel_scale_guess,
+            n_workers,
+            initial_knots=initial_knots,
+            neighbour_knots=checkpoint.get_solved_knots(),
+            recovery_config=recovery_config,
+            solver_config=solver_config,
+        ):
+            save_sweep_result(checkpoint, trajectory_store, *result)
+            n_solves += 1
+
+    if n_solves >= max_solves:
+        log.info(" ### Sweep stopped at solve budget of {0}".format(max_solves))
+
+    checkpoint.save()
+    trajectory_store.save()
+    update_warm_start_library(phys_params, checkpoint)
+    write_telemetry_summary(SWEEP_TELEMETRY_FILE, SWEEP_TELEMETRY_SUMMARY_FILE)
+    return
+
+
+def reuse_dimless_sweep_results(
+    zhukovskii_glider, checkpoint, trajectory_store, chains
+):
+    # Angles where another glider has the same dimless solution are only
+    # rescaled. Returns the chains with the remaining angles.
+    n_reused = 0
+    remaining_chains = []
+    for chain in chains:
+        remaining_chain = []
+        for travel_angle in chain:
+            dimless_reuse = find_dimless_reuse(zhukovskii_glider, travel_angle)
+            if dimless_reuse is None or not dimless_reuse[3]:
+                remaining_chain.append(travel_angle)
+                continue
+            start_time = time.time()
+            found_solution, solution_details, solution_trajectory, _ = rescale_solution(
+                zhukovskii_glider, travel_angle * np.pi / 180, dimless_reuse[0]
+            )
+            solution_details = solution_details._replace(
+                warm_start=dimless_reuse[1], total_time=time.time() - start_time
+            )
+            save_sweep_result(
+                checkpoint,
+                trajectory_store,
+                travel_angle,
+                solution_details,
+                solution_trajectory,
+                dimless_reuse[0],
+            )
+            n_reused += 1
+        if len(remaining_chain) > 0:
+            remaining_chains.append(np.array(remaining_chain))
+    if n_reused > 0:
+        log.info(" ### Reused {0} dimless solutions of other gliders".format(n_reused))
+    return remaining_chains
+
+
+def write_telemetry_summary(telemetry_file, summary_file):
+    summary = summarize_telemetry(TelemetryLog(telemetry_file).load())
+    log_telemetry_summary(summary)
+    with open(summary_file, "w") as f:
+        json.dump(summary, f, indent=2)
+    return summary
+
+
+def update_warm_start_library(phys_params, checkpoint):
+    # Make all solved sweep angles available as warm starts
+    # for single angle runs with the same glider
+    (m, c_Dp, A, b, rho, g, AR) = phys_params
+    zhukovskii_glider = RelativeZhukovskiiGlider(m, c_Dp, A, b, rho, g)
+    warm_start_library = WarmStartLibrary(WARM_START_DIR, zhukovskii_glider)
+    for travel_angle, knots in checkpoint.get_solved_knots().items():
+        warm_start_library.add(travel_angle, knots)
+    warm_start_library.save()
+    return
+
+
+def split_sweep_chains(chains, n_chains):
+    # Split the longest chains in two until there is one chain per worker
+    chains = [chain for chain in chains if len(chain) > 0]
+    while len(chains) < n_chains:
+        longest = max(range(len(chains)), key=lambda i: len(chains[i]))
+        chain = chains[longest]
+        if len(chain) < 2:
+            break
+        chains[longest : longest + 1] = [
+            chain[: len(chain) // 2],
+            chain[len(chain) // 2 :],
+        ]
+    return chains
+
+
+def run_sweep_chains(
+    phys_params,
+    chains,
+    period_guess=7,
+    avg_vel_scale_guess=2,
+    n_workers=1,
+    initial_knots=None,
+    neighbour_knots=None,
+    recovery_config=DEFAULT_RECOVERY_CONFIG,
+    solver_config=DEFAULT_SOLVER_CONFIG,
+):
+    # Yields (travel_angle, solution_details, solution_trajectory, knots, status)
+    # for every angle as soon as it is solved or has failed
+    if initial_knots is None:
+        initial_knots = [None] * len(chains)
+
+    if n_workers <= 1:
+        (m, c_Dp, A, b, rho, g, AR) = phys_params
+        zhukovskii_glider = RelativeZhukovskiiGlider(m, c_Dp, A, b, rho, g)
+        for chain, knots in zip(chains, initial_knots):
+            yield from solve_sweep_chain(
+                zhukovskii_glider,
+                chain,
+                period_guess,
+                avg_vel_scale_guess,
+                knots,
+                neighbour_knots,
+                recovery_config,
+                solver_config,
+            )
+        return
+
+    n_workers = min(n_workers, len(chains))
+    log.info(" ### Solving {0} chains with {1} workers".format(len(chains), n_workers))
+
+    manager = mp.Manager()
+    result_queue = manager.Queue()
+    executor = ProcessPoolExecutor(n_workers)
+    futures = []
+    try:
+        futures = [
+            executor.submit(
+                _sweep_chain_worker,
+                phys_params,
+                chain,
+                period_guess,
+                avg_vel_scale_guess,
+                knots,
+                neighbour_knots,
+                recovery_config,
+                solver_config,
+                result_queue,
+            )
+            for chain, knots in zip(chains, initial_knots)
+        ]
+        yield from _get_chain_results(futures, result_queue)
+    finally:
+        _stop_chain_workers(executor, futures)
+        manager.shutdown()
+
+
+def _get_chain_results(futures, result_queue, poll_interval=5):
+    # Yields the results of the chain workers until every chain is done.
+    # Raises the exception of a failed worker. A killed worker breaks the
+    # executor, which raises BrokenProcessPool for all unfinished chains.
+    n_chains_done = 0
+    while n_chains_done < len(futures):
+        try:
+            result = result_queue.get(timeout=poll_interval)
+        except queue.Empty:
+            for future in futures:
+                if future.done():
+                    future.result()
+            continue
+        if result is None:
+            n_chains_done += 1
+            continue
+        yield result
+
+    # Reraise any exception from the workers
+    for future in futures:
+        future.result()
+    return
+
+
+def _stop_chain_workers(executor, futures):
+    # Chains that have not started are cancelled. Running chains stop at
+    # their next result, as the result queue is shut down after this.
+    for future in futures:
+        future.cancel()
+    executor.shutdown(wait=False)
+    return
+
+
+def _sweep_chain_worker(
+    phys_params,
+    chain,
+    period_guess,
+    avg_vel_scale_guess,
+    initial_knots,
+    neighbour_knots,
+    recovery_config,
+    solver_config,
+    result_queue,
+):
+    # Every worker builds its own glider and Drake programs
+    try:
+        (m, c_Dp, A, b, rho, g, AR) = phys_params
+        zhukovskii_glider = RelativeZhukovskiiGlider(m, c_Dp, A, b, rho, g)
+        for result in solve_sweep_chain(
+            zhukovskii_glider,
+            chain,
+            period_guess,
+            avg_vel_scale_guess,
+            initial_knots,
+            neighbour_knots,
+            recovery_config,
+            solver_config,
+        ):
+            result_queue.put(result)
+    finally:
+        # Signal that this chain is done
+        result_queue.put(None)
+
+
+def solve_sweep_chain(
+    zhukovskii_glider,
+    travel_angles,
+    period_guess=7,
+    avg_vel_scale_guess=2,
+    initial_knots=None,
+    neighbour_knots=None,
+    recovery_config=DEFAULT_RECOVERY_CONFIG,
+    solver_config=DEFAULT_SOLVER_CONFIG,
+    save_plots=True,
+):
+    SAVE_SOLUTION_EVERY_N_ANGLE = 1
+
+    V_l, _, _, _ = zhukovskii_glider.get_char_values()
 
     # Initial guess
-    period_initial_guess = period_guess
     avg_speed_initial_guess = 1 * V_l
     avg_speed_start_guess = avg_vel_scale_guess * V_l
-    next_initial_guess = None
-    reduced_period = period_initial_guess
-    reduced_avg_vel = avg_speed_initial_guess
+    previous_knots = initial_knots
+    if initial_knots is not None:
+        log.debug(" Warm starting chain from stored neighbour")
+
+    # Knots of all solved angles, used as warm starts when a solve fails
+    solved_knots = dict()
+    if neighbour_knots is not None:
+        solved_knots.update(neighbour_knots)
 
     # Run a sweep search
     for index, travel_angle in enumerate(travel_angles):
-        found_solution = False
-        reduced_period = period_initial_guess
-        reduced_avg_vel = avg_speed_initial_guess
-        changing_step_size = False
+        travel_angle = float(travel_angle)
 
         # Let the user supply initial guess for first trajectory
+        avg_vel_guess = avg_speed_initial_guess
         if index == 0:
-            reduced_avg_vel = avg_speed_start_guess
+            avg_vel_guess = avg_speed_start_guess
+
+        attempts = get_recovery_attempts(
+            recovery_config,
+            travel_angle,
+            previous_knots,
+            solved_knots,
+            period_guess,
+            avg_vel_guess,
+        )
+        found_solution = False
+        n_attempts = 0
+        start_time = time.time()
+        for attempt_index, attempt in enumerate(attempts):
+            # The first attempt is always run, so that there is a result
+            if (
+                attempt_index > 0
+                and time.time() - start_time > recovery_config.max_time
+            ):
+                log.warning(
+                    " Time budget of {0} s used up for {1} deg".format(
+                        recovery_config.max_time, travel_angle
+                    )
+                )
+                break
 
-        # Decrease the avg vel every iteration until a solution is found
-        while not found_solution:
-            # Obtain solution with straight line as initial guess
+            initial_guess = None
+            if attempt.knots is not None:
+                initial_guess = create_initial_guess(*attempt.knots)
             (
                 found_solution,
                 solution_details,
@@ -265,50 +1236,76 @@ def sweep_calculation(
             ) = direct_collocation_relative(
                 zhukovskii_glider,
                 travel_angle * np.pi / 180,
-                period_guess=reduced_period,
-                avg_vel_guess=reduced_avg_vel,
-                initial_guess=next_initial_guess,
+                period_guess=attempt.period_guess,
+                avg_vel_guess=attempt.avg_vel_guess,
+                initial_guess=initial_guess,
+                solver_config=solver_config,
             )
-
-            # Solution not found
-            if not found_solution:
-                # If we did not find a solution, reduce period
-                log.warning(
-                    " No solution found, using straight line and reducing avg_vel"
+            log.info(
+                " Attempt {0}/{1} for {2} deg: {3} from {4}, period_guess: {5}, avg_vel_guess: {6}, {7} in {8} s, {9} iterations of {10}, {11}".format(
+                    attempt_index + 1,
+                    len(attempts),
+                    travel_angle,
+                    attempt.step,
+                    attempt.source,
+                    attempt.period_guess,
+                    attempt.avg_vel_guess,
+                    "solved" if found_solution else "failed",
+                    solution_details.solve_time,
+                    solution_details.iterations,
+                    solution_details.solver,
+                    solution_details.exit_status,
                 )
-                next_initial_guess = None
-                reduced_avg_vel *= 0.90
-                continue
+            )
+            n_attempts += 1
+            warm_start_source = attempt.source
+            if found_solution:
+                break
 
-            # Found a solution
-            avg_speed, period, limited_by_time_step = solution_details
-            next_initial_guess = potential_initial_guess
+        # Telemetry over all attempts at this angle
+        solution_details = solution_details._replace(
+            retries=n_attempts - 1,
+            warm_start=warm_start_source,
+            total_time=time.time() - start_time,
+        )
 
-            # Check if it was limited by step size
-            if not limited_by_time_step == "false":
-                if limited_by_time_step == "upper":
-                    log.warning(" Time step at max")
-                elif limited_by_time_step == "lower":
-                    log.warning(" Time step at min")
+        if not found_solution:
+            log.error(
+                " No solution found for {0} deg after {1} attempts".format(
+                    travel_angle, n_attempts
+                )
+            )
+            yield travel_angle, solution_details, None, None, "failed"
+            continue
 
-        # Found solution and it is not limited by step size
-        # then save values
-        initial_guess = next_initial_guess
-        solution_avg_speeds[travel_angle] = avg_speed
-        solution_periods[travel_angle] = period
+        # Found a solution
+        period = solution_details.period
+        limited_by_time_step = solution_details.limited_by_time_step
 
-        with open("./results/plots/sweep_results_speeds.txt", "w") as f:
-            f.write(json.dumps(solution_avg_speeds))
-            f.close()
+        # Check if it was limited by step size
+        if not limited_by_time_step == "false":
+            if limited_by_time_step == "upper":
+                log.warning(" Time step at max")
+            elif limited_by_time_step == "lower":
+                log.warning(" Time step at min")
 
-        with open("./results/plots/sweep_results_periods.txt", "w") as f:
-            f.write(json.dumps(solution_periods))
-            f.close()
+        # Energy analysis without plotting
+        times, x_knots_ENU, u_knots_ENU = solution_trajectory
+        x_knots_NED, u_knots_NED = convert_traj_to_NED(x_knots_ENU, u_knots_ENU)
+        energy_analysis = calc_energy_analysis(
+            times, x_knots_NED, u_knots_NED, zhukovskii_glider.get_phys_params()
+        )
+        log.info(
+            "\tEnergy gained from dynamic soaring: active: {0} J, passive: {1} J, dissipated: {2} J".format(
+                energy_analysis.total_E_dyn_active,
+                energy_analysis.total_E_dyn_passive,
+                energy_analysis.total_E_dissipated,
+            )
+        )
 
         # Save plot of every Nth trajectory
-        if travel_angle % SAVE_SOLUTION_EVERY_N_ANGLE < 0.001:
+        if save_plots and travel_angle % SAVE_SOLUTION_EVERY_N_ANGLE < 0.001:
             log.debug("Saving trajectory plot")
-            times, x_knots_ENU, u_knots_ENU = solution_trajectory
             plot_glider_pos(
                 x_knots_ENU,
                 u_knots_ENU,
@@ -318,4 +1315,179 @@ def sweep_calculation(
             )
             plt.close()
 
+        knots = get_trajectory_knots(potential_initial_guess)
+        previous_knots = knots
+        solved_knots[travel_angle] = knots
+        yield travel_angle, solution_details, solution_trajectory, knots, "solved"
+
     return
+
+
+def parameter_sweep_calculation(
+    samples,
+    travel_angles=(90,),
+    period_guess=7,
+    avg_vel_scale_guess=1,
+    n_workers=1,
+    resume=False,
+    filename=PARAMETER_SWEEP_FILE,
+    recovery_config=DEFAULT_RECOVERY_CONFIG,
+    solver_config=DEFAULT_SOLVER_CONFIG,
+):
+    # Solves every travel angle for every sample of glider and wind
+    # parameters. samples is a list of {name: value} dicts, ordered for
+    # continuation, e.g. from get_grid_samples or get_latin_hypercube_samples.
+    param_names = list(samples[0].keys())
+    telemetry_file = os.path.splitext(filename)[0] + "_telemetry.jsonl"
+    telemetry_log = TelemetryLog(telemetry_file)
+    if not resume:
+        for results_filename in (filename, filename + ".journal"):
+            if os.path.exists(results_filename):
+                os.remove(results_filename)
+        telemetry_log.clear()
+    results = ParameterSweepResults(filename, param_names)
+
+    # Every travel angle is solved as a continuation over the samples,
+    # split in contiguous chains for the workers
+    chains = []
+    for travel_angle in travel_angles:
+        for chain in split_samples(samples, n_workers):
+            chain = [
+                params
+                for params in chain
+                if not results.is_completed(params, float(travel_angle))
+            ]
+            if len(chain) > 0:
+                chains.append((float(travel_angle), chain))
+
+    n_problems = sum(len(chain) for _, chain in chains)
+    log.info(
+        " ### Running parameter sweep over {0} with {1} problems".format(
+            param_names, n_problems
+        )
+    )
+
+    for params, travel_angle, solution_details, status in run_parameter_chains(
+        chains,
+        period_guess,
+        avg_vel_scale_guess,
+        n_workers,
+        recovery_config,
+        solver_config,
+    ):
+        results.add(params, travel_angle, solution_details, status)
+        telemetry_log.add(
+            get_telemetry_record(travel_angle, solution_details, status, **params)
+        )
+    results.save()
+
+    write_telemetry_summary(
+        telemetry_file, os.path.splitext(filename)[0] + "_telemetry_summary.json"
+    )
+    return results
+
+
+def run_parameter_chains(
+    chains,
+    period_guess=7,
+    avg_vel_scale_guess=1,
+    n_workers=1,
+    recovery_config=DEFAULT_RECOVERY_CONFIG,
+    solver_config=DEFAULT_SOLVER_CONFIG,
+):
+    # Yields (params, travel_angle, solution_details, status)
+    # for every problem as soon as it is solved or has failed
+    if n_workers <= 1:
+        for travel_angle, chain in chains:
+            yield from solve_parameter_chain(
+                travel_angle,
+                chain,
+                period_guess,
+                avg_vel_scale_guess,
+                recovery_config,
+                solver_config,
+            )
+        return
+
+    n_workers = min(n_workers, len(chains))
+    manager = mp.Manager()
+    result_queue = manager.Queue()
+    executor = ProcessPoolExecutor(n_workers)
+    futures = []
+    try:
+        futures = [
+            executor.submit(
+                _parameter_chain_worker,
+                travel_angle,
+                chain,
+                period_guess,
+                avg_vel_scale_guess,
+                recovery_config,
+                solver_config,
+                result_queue,
+            )
+            for travel_angle, chain in chains
+        ]
+        yield from _get_chain_results(futures, result_queue)
+    finally:
+        _stop_chain_workers(executor, futures)
+        manager.shutdown()
+
+
+def _parameter_chain_worker(
+    travel_angle,
+    chain,
+    period_guess,
+    avg_vel_scale_guess,
+    recovery_config,
+    solver_config,
+    result_queue,
+):
+    try:
+        for result in solve_parameter_chain(
+            travel_angle,
+            chain,
+            period_guess,
+            avg_vel_scale_guess,
+            recovery_config,
+            solver_config,
+        ):
+            result_queue.put(result)
+    finally:
+        # Signal that this chain is done
+        result_queue.put(None)
+
+
+def solve_parameter_chain(
+    travel_angle,
+    samples,
+    period_guess=7,
+    avg_vel_scale_guess=1,
+    recovery_config=DEFAULT_RECOVERY_CONFIG,
+    solver_config=DEFAULT_SOLVER_CONFIG,
+):
+    # Every sample is warm started from the dimless solution of the previous
+    # sample, which is close as the samples are ordered for continuation
+    knots = None
+    try:
+        for params in samples:
+            glider_params, wind_params = split_params(params)
+            set_wind_params(**dict(DEFAULT_WIND_PARAMS, **wind_params))
+            zhukovskii_glider = RelativeZhukovskiiGlider(**glider_params)
+            log.info(" ### Solving {0} at {1} deg".format(params, travel_angle))
+
+            for _, solution_details, _, next_knots, status in solve_sweep_chain(
+                zhukovskii_glider,
+                [travel_angle],
+                period_guess,
+                avg_vel_scale_guess,
+                initial_knots=knots,
+                recovery_config=recovery_config,
+                solver_config=solver_config,
+                save_plots=False,
+            ):
+                if status == "solved":
+                    knots = next_knots
+                yield params, travel_angle, solution_details, status
+    finally:
+        set_wind_params(**DEFAULT_WIND_PARAMS)
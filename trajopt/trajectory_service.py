@@ -0,0 +1,348 @@
+import json
+import time
+import logging as log
+import threading
+import multiprocessing as mp
+import urllib.request
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+
+from dynamics.zhukovskii_glider import RelativeZhukovskiiGlider, DYNAMICS_VERSION
+from dynamics.wind_models import set_wind_params, DEFAULT_WIND_PARAMS
+from trajopt.direct_collocation import (
+    direct_collocation_relative,
+    create_initial_guess,
+    get_trajectory_knots,
+    SolutionDetails,
+)
+from trajopt.parameter_sweep import split_params
+from trajopt.results import WARM_START_DIR, SOLUTION_CACHE_DIR, TELEMETRY_FILE
+from trajopt.solution_cache import SolutionCache, get_cache_key
+from trajopt.solve_telemetry import TelemetryLog, get_telemetry_record
+from trajopt.solver_config import DEFAULT_SOLVER_CONFIG
+from trajopt.warm_start_library import WarmStartLibrary
+
+SERVICE_HOST = "127.0.0.1"
+DEFAULT_SERVICE_PORT = 8765
+MAX_SERVICE_GLIDERS = 16
+
+# Request fields and their defaults. params are any glider, constraint or
+# wind parameters, constraints are merged into params.
+DEFAULT_REQUEST = {
+    "travel_angle": None,  # deg, required
+    "params": {},
+    "constraints": {},
+    "period_guess": 7,
+    "avg_vel_scale_guess": 1,
+    "N": 31,
+    "max_dt_scale": 3,
+    "n_points": None,  # Points in the returned trajectory, None returns the knots
+    "solver_config": {},
+    "use_cache": True,
+    "use_warm_start": True,
+}
+
+# Gliders of every worker process, which keep their prebuilt programs alive.
+# The programs of evicted gliders are freed together with them.
+_service_gliders = OrderedDict()
+
+
+def parse_request(request):
+    # Returns the request with defaults for all missing fields, or raises a
+    # ValueError for an invalid request
+    if not isinstance(request, dict):
+        raise ValueError("The request must be a json object")
+    for name in request:
+        if name not in DEFAULT_REQUEST:
+            raise ValueError("Unknown request field: {0}".format(name))
+    if request.get("travel_angle") is None:
+        raise ValueError("The request has no travel_angle")
+
+    request = dict(DEFAULT_REQUEST, **request)
+    params = dict(request["params"], **request["constraints"])
+    split_params(params)  # Raises for unknown parameters
+    # Raises a ValueError for unknown solver options
+    solver_config = DEFAULT_SOLVER_CONFIG._replace(**request["solver_config"])
+    if request["n_points"] is None:
+        request["n_points"] = request["N"]
+
+    request["params"] = params
+    request["solver_config"] = dict(solver_config._asdict())
+    del request["constraints"]
+    request["travel_angle"] = float(request["travel_angle"])
+    request["N"] = int(request["N"])
+    request["n_points"] = int(request["n_points"])
+    return request
+
+
+def get_service_glider(glider_params):
+    # The same glider is reused for equal parameters, so that its
+    # collocation programs are only built once per worker
+    key = tuple(sorted(glider_params.items()))
+    if key in _service_gliders:
+        _service_gliders.move_to_end(key)
+    else:
+        _service_gliders[key] = RelativeZhukovskiiGlider(**glider_params)
+        if len(_service_gliders) > MAX_SERVICE_GLIDERS:
+            _service_gliders.popitem(last=False)
+    return _service_gliders[key]
+
+
+def _service_worker(request, knots):
+    # Solves one parsed request. Returns (found_solution, solution_details,
+    # solution_trajectory, knots), with knots of the solution or None.
+    glider_params, wind_params = split_params(request["params"])
+    set_wind_params(**dict(DEFAULT_WIND_PARAMS, **wind_params))
+    zhukovskii_glider = get_service_glider(glider_params)
+    initial_guess = None
+    if knots is not None:
+        initial_guess = create_initial_guess(*knots)
+    (
+        found_solution,
+        solution_details,
+        solution_trajectory,
+        next_initial_guess,
+    ) = direct_collocation_relative(
+        zhukovskii_glider,
+        request["travel_angle"] * np.pi / 180,
+        period_guess=request["period_guess"],
+        avg_vel_scale_guess=request["avg_vel_scale_guess"],
+        initial_guess=initial_guess,
+        N=request["N"],
+        max_dt_scale=request["max_dt_scale"],
+        solver_config=DEFAULT_SOLVER_CONFIG._replace(**request["solver_config"]),
+        N_plot=request["n_points"],
+    )
+    # Drake trajectories can not be sent between processes
+    knots = None
+    if found_solution:
+        knots = get_trajectory_knots(next_initial_guess)
+    return found_solution, solution_details, solution_trajectory, knots
+
+
+def get_trajectory_message(solution_trajectory):
+    times, x_knots, u_knots = solution_trajectory
+    return {
+        "type": "trajectory",
+        "times": np.asarray(times).tolist(),
+        "x_knots": np.asarray(x_knots).tolist(),
+        "u_knots": np.asarray(u_knots).tolist(),
+    }
+
+
+class TrajectoryService:
+    # Solves trajectory requests in a pool of worker processes that stay
+    # alive between requests. The warm start libraries and the solution
+    # cache are only used by the server process.
+    def __init__(
+        self,
+        n_workers=1,
+        warm_start_dir=WARM_START_DIR,
+        cache_dir=SOLUTION_CACHE_DIR,
+        telemetry_file=TELEMETRY_FILE,
+    ):
+        self.n_workers = n_workers
+        self.pool = mp.Pool(n_workers)
+        self.warm_start_dir = warm_start_dir
+        self.solution_cache = SolutionCache(cache_dir)
+        self.telemetry_log = TelemetryLog(telemetry_file)
+        self.lock = threading.Lock()
+        self.n_requests = 0
+        self.n_active = 0
+        return
+
+    def close(self):
+        self.pool.terminate()
+        self.pool.join()
+        return
+
+    def get_status(self):
+        with self.lock:
+            return {
+                "n_workers": self.n_workers,
+                "n_requests": self.n_requests,
+                "n_active": self.n_active,
+            }
+
+    def solve(self, request):
+        # Yields the messages of a request: accepted, metrics and trajectory
+        start_time = time.time()
+        request = parse_request(request)
+        _, wind_params = split_params(request["params"])
+        cache_key = get_cache_key(
+            dict(
+                request,
+                wind=dict(DEFAULT_WIND_PARAMS, **wind_params),
+                dynamics_version=DYNAMICS_VERSION,
+                service=True,
+            )
+        )
+        with self.lock:
+            self.n_requests += 1
+            cached_solution = None
+            if request["use_cache"]:
+                cached_solution = self.solution_cache.get(cache_key)
+
+        if cached_solution is not None:
+            solution_details, solution_trajectory = cached_solution
+            solution_details = SolutionDetails(**solution_details)._replace(
+                warm_start="cache", total_time=time.time() - start_time
+            )
+            yield {"type": "accepted", "warm_start": "cache"}
+            yield self._get_metrics_message(request, solution_details, "cached")
+            yield get_trajectory_message(solution_trajectory)
+            return
+
+        warm_start = None
+        if request["use_warm_start"]:
+            with self.lock:
+                warm_start = self._open_warm_start_library(request).get_knots(
+                    request["travel_angle"]
+                )
+        source = "straight line" if warm_start is None else warm_start[1]
+        yield {"type": "accepted", "warm_start": source}
+
+        with self.lock:
+            self.n_active += 1
+        try:
+            (
+                found_solution,
+                solution_details,
+                solution_trajectory,
+                knots,
+            ) = self.pool.apply(
+                _service_worker,
+                (request, None if warm_start is None else warm_start[0]),
+            )
+        finally:
+            with self.lock:
+                self.n_active -= 1
+
+        solution_details = solution_details._replace(
+            warm_start=source, total_time=time.time() - start_time
+        )
+        status = "solved" if found_solution else "failed"
+        yield self._get_metrics_message(request, solution_details, status)
+        if not found_solution:
+            return
+
+        with self.lock:
+            # Opened again, as other requests may have added angles since
+            warm_start_library = self._open_warm_start_library(request)
+            warm_start_library.add(request["travel_angle"], knots)
+            warm_start_library.save()
+            if request["use_cache"]:
+                self.solution_cache.put(
+                    cache_key, solution_details._asdict(), solution_trajectory
+                )
+        yield get_trajectory_message(solution_trajectory)
+        return
+
+    def _open_warm_start_library(self, request):
+        # Warm start libraries are per glider and wind, so the wind of the
+        # request is set while opening. Must be called with the lock held.
+        glider_params, wind_params = split_params(request["params"])
+        try:
+            set_wind_params(**dict(DEFAULT_WIND_PARAMS, **wind_params))
+            return WarmStartLibrary(
+                self.warm_start_dir, RelativeZhukovskiiGlider(**glider_params)
+            )
+        finally:
+            set_wind_params(**DEFAULT_WIND_PARAMS)
+
+    def _get_metrics_message(self, request, solution_details, status):
+        record = get_telemetry_record(
+            request["travel_angle"], solution_details, status, service=True
+        )
+        with self.lock:
+            self.telemetry_log.add(record)
+        return dict(record, type="metrics")
+
+
+def get_service_handler(service):
+    class TrajectoryServiceHandler(BaseHTTPRequestHandler):
+        # POST /solve with a json request streams one json message per line,
+        # GET /status returns the state of the service
+        def do_GET(self):
+            if self.path != "/status":
+                self._send_error(404, "Unknown path: {0}".format(self.path))
+                return
+            self._send_messages(200, [service.get_status()])
+            return
+
+        def do_POST(self):
+            if self.path != "/solve":
+                self._send_error(404, "Unknown path: {0}".format(self.path))
+                return
+            length = int(self.headers.get("Content-Length", 0))
+            try:
+                request = json.loads(self.rfile.read(length))
+                messages = service.solve(request)
+                first_message = next(messages)
+            except (ValueError, TypeError) as e:
+                self._send_error(400, str(e))
+                return
+            self._send_messages(200, [first_message])
+            try:
+                for message in messages:
+                    self._send_messages(None, [message])
+            except Exception as e:
+                log.exception(" Trajectory request failed")
+                self._send_messages(None, [{"type": "error", "message": str(e)}])
+            return
+
+        def _send_error(self, code, message):
+            self._send_messages(code, [{"type": "error", "message": message}])
+            return
+
+        def _send_messages(self, code, messages):
+            # The headers are only sent with the first message, and the
+            # connection is closed after the last one
+            if code is not None:
+                self.send_response(code)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.end_headers()
+            for message in messages:
+                self.wfile.write((json.dumps(message) + "\n").encode())
+            self.wfile.flush()
+            return
+
+        def log_message(self, format, *args):
+            log.debug(" " + format % args)
+            return
+
+    return TrajectoryServiceHandler
+
+
+def serve_trajectories(port=DEFAULT_SERVICE_PORT, n_workers=1):
+    # Serves trajectory requests on localhost until interrupted
+    service = TrajectoryService(n_workers)
+    server = ThreadingHTTPServer((SERVICE_HOST, port), get_service_handler(service))
+    log.info(
+        " ### Serving trajectories on {0}:{1} with {2} workers".format(
+            SERVICE_HOST, server.server_address[1], n_workers
+        )
+    )
+    print("Serving trajectories on http://{0}:{1}".format(SERVICE_HOST, port))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+    return
+
+
+def request_trajectory(request, port=DEFAULT_SERVICE_PORT, timeout=None):
+    # Client side, yields the messages of the service as they arrive
+    http_request = urllib.request.Request(
+        "http://{0}:{1}/solve".format(SERVICE_HOST, port),
+        data=json.dumps(request).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+    with urllib.request.urlopen(http_request, timeout=timeout) as response:
+        for line in response:
+            yield json.loads(line)
+    return
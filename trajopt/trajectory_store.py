@@ -0,0 +1,155 @@
+import os
+import logging as log
+import numpy as np
+
+
+def get_trajectory_dtype(n_knots):
+    # One record per travel angle, with the full trajectory in the record
+    return np.dtype(
+        [
+            ("angle", "f8"),  # deg
+            ("status", "U16"),
+            ("avg_speed", "f8"),
+            ("period", "f8"),
+            ("cost", "f8"),
+            ("limited_by_time_step", "U8"),
+            ("formulation_time", "f8"),
+            ("solve_time", "f8"),
+            ("times", "f8", (n_knots,)),
+            ("x_knots", "f8", (n_knots, 6)),
+            ("u_knots", "f8", (n_knots, 3)),
+        ]
+    )
+
+
+class TrajectoryStore:
+    # Stores all trajectories of a sweep in a single .npy file of records,
+    # sorted by travel angle. The file can be memory-mapped, so that
+    # only the angles that are used are read from disk.
+    # New records are appended to a journal next to the file, so that every
+    # add only writes its own record. save merges the journal into the file.
+    def __init__(self, filename, n_knots=200, mmap=False):
+        self.filename = filename
+        self.journal_filename = filename + ".journal"
+        self.n_knots = n_knots
+        self.records = np.zeros(0, dtype=get_trajectory_dtype(n_knots))
+        self.new_records = []
+        if os.path.exists(filename) or os.path.exists(self.journal_filename):
+            self.load(mmap=mmap)
+        return
+
+    def load(self, mmap=True):
+        if os.path.exists(self.filename):
+            mmap_mode = "r" if mmap else None
+            self.records = np.load(self.filename, mmap_mode=mmap_mode)
+            self.n_knots = self.records.dtype["times"].shape[0]
+        self.new_records = []
+        if os.path.exists(self.journal_filename):
+            # A record that was cut off by a crash is ignored
+            with open(self.journal_filename, "rb") as f:
+                data = f.read()
+            n_records = len(data) // self.records.dtype.itemsize
+            self.new_records.append(
+                np.frombuffer(
+                    data[: n_records * self.records.dtype.itemsize],
+                    dtype=self.records.dtype,
+                )
+            )
+        self._merge()
+        log.debug(
+            " Loaded {0} trajectories from {1}".format(len(self.records), self.filename)
+        )
+        return
+
+    def save(self):
+        # Write to a temporary file first so that a crash while
+        # writing never destroys the previous store
+        self._merge()
+        tmp_filename = self.filename + ".tmp.npy"
+        np.save(tmp_filename, np.asarray(self.records))
+        os.replace(tmp_filename, self.filename)
+        if os.path.exists(self.journal_filename):
+            os.remove(self.journal_filename)
+        return
+
+    def _merge(self):
+        # Sorts the new records in by angle, the last record of an angle
+        # replaces all earlier ones
+        if len(self.new_records) == 0:
+            return
+        records = np.concatenate([np.asarray(self.records)] + self.new_records)
+        self.new_records = []
+        records = records[np.argsort(records["angle"], kind="stable")]
+        is_last = np.append(np.diff(records["angle"]) > 1e-6, True)
+        self.records = records[is_last]
+        return
+
+    def _find_index(self, travel_angle, tol=1e-6):
+        self._merge()
+        angles = self.records["angle"]
+        index = np.searchsorted(angles, travel_angle - tol)
+        if index < len(angles) and abs(angles[index] - travel_angle) <= tol:
+            return index
+        return None
+
+    def add(self, travel_angle, solution_details, solution_trajectory, status="solved"):
+        record = np.zeros(1, dtype=self.records.dtype)
+        record["angle"] = travel_angle
+        record["status"] = status
+        record["avg_speed"] = solution_details.avg_speed
+        record["period"] = solution_details.period
+        record["cost"] = solution_details.cost
+        record["limited_by_time_step"] = solution_details.limited_by_time_step
+        record["formulation_time"] = solution_details.formulation_time
+        record["solve_time"] = solution_details.solve_time
+        if solution_trajectory is not None:
+            times, x_knots, u_knots = solution_trajectory
+            record["times"] = times
+            record["x_knots"] = x_knots
+            record["u_knots"] = u_knots
+
+        directory = os.path.dirname(self.journal_filename)
+        if directory != "":
+            os.makedirs(directory, exist_ok=True)
+        with open(self.journal_filename, "ab") as f:
+            f.write(record.tobytes())
+        self.new_records.append(record)
+        return
+
+    def get_angles(self):
+        self._merge()
+        return np.array(self.records["angle"])
+
+    def get(self, travel_angle):
+        index = self._find_index(travel_angle)
+        if index is None:
+            return None
+        return self.records[index]
+
+    def get_trajectory(self, travel_angle):
+        # Returns (times, x_knots, u_knots) in the same format as
+        # the solution_trajectory from direct_collocation_relative
+        record = self.get(travel_angle)
+        if record is None:
+            return None
+        return (
+            np.array(record["times"]),
+            np.array(record["x_knots"]),
+            np.array(record["u_knots"]),
+        )
+
+    def get_results(self):
+        # Avg speeds and periods of all solved angles,
+        # in the format used by plot_sweep_polar
+        self._merge()
+        solution_avg_speeds = dict()
+        solution_periods = dict()
+        solved = self.records["status"] == "solved"
+        for travel_angle, avg_speed, period in zip(
+            self.records["angle"][solved],
+            self.records["avg_speed"][solved],
+            self.records["period"][solved],
+        ):
+            solution_avg_speeds[float(travel_angle)] = float(avg_speed)
+            solution_periods[float(travel_angle)] = float(period)
+        return solution_avg_speeds, solution_periods
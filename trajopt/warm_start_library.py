@@ -0,0 +1,197 @@
+import os
+import json
+import hashlib
+import logging as log
+import numpy as np
+
+from dynamics.wind_models import get_wind_params
+from trajopt.sweep_recovery import calc_angle_dist, interpolate_knots
+from trajopt.direct_collocation import (
+    get_dimless_problem,
+    calc_dimless_problem_residual,
+    is_same_dimless_solution,
+)
+
+
+def get_problem_key(zhukovskii_glider):
+    # Solutions can only be reused between problems with the same
+    # physical parameters, constraints and wind
+    wind_model_name, *wind_values = get_wind_params()
+    values = (
+        list(zhukovskii_glider.get_phys_params())
+        + list(zhukovskii_glider.get_constraints())
+        + wind_values
+    )
+    values = [round(float(value), 9) for value in values] + [wind_model_name]
+    return hashlib.sha1(json.dumps(values).encode()).hexdigest()[:16]
+
+
+def rotate_knots(knots, angle):
+    # Rotates a dimless knot trajectory about the z axis, such that a
+    # trajectory travelling at psi travels at psi + angle afterwards.
+    # angle is in degrees, measured from north towards east.
+    sample_times, x_knots, u_knots = knots
+    angle = angle * np.pi / 180
+    R = np.array([[np.cos(angle), np.sin(angle)], [-np.sin(angle), np.cos(angle)]])
+
+    x_knots = np.array(x_knots)
+    u_knots = np.array(u_knots)
+    x_knots[:, 0:2] = x_knots[:, 0:2].dot(R.T)
+    x_knots[:, 3:5] = x_knots[:, 3:5].dot(R.T)
+    u_knots[:, 0:2] = u_knots[:, 0:2].dot(R.T)
+    return sample_times, x_knots, u_knots
+
+
+class WarmStartLibrary:
+    # Persistent library of solved dimless knot trajectories, with one file
+    # per set of physical parameters, constraints and wind. All angles are in
+    # degrees. Libraries of other gliders are opened by key instead of by
+    # glider. Every entry keeps the dimless problem it was solved for.
+    def __init__(self, directory, zhukovskii_glider=None, key=None):
+        self.directory = directory
+        self.key = key
+        self.dimless_problem = None
+        if zhukovskii_glider is not None:
+            self.key = get_problem_key(zhukovskii_glider)
+            self.dimless_problem = get_dimless_problem(zhukovskii_glider)
+        self.filename = os.path.join(directory, "{0}.npz".format(self.key))
+        self.knots = dict()
+        self.dimless_problems = dict()
+        if os.path.exists(self.filename):
+            self.load()
+        return
+
+    def _key(self, travel_angle):
+        return round(float(travel_angle) % 360, 6)
+
+    def load(self):
+        with np.load(self.filename) as data:
+            # Libraries written before the entries were stamped
+            # have a single dimless problem for all entries
+            file_dimless_problem = None
+            if "dimless_groups" in data:
+                file_dimless_problem = (data["dimless_groups"], data["dimless_bounds"])
+            for i, travel_angle in enumerate(data["angles"]):
+                travel_angle = self._key(travel_angle)
+                self.knots[travel_angle] = (
+                    data["sample_times_{0}".format(i)],
+                    data["x_knots_{0}".format(i)],
+                    data["u_knots_{0}".format(i)],
+                )
+                if "dimless_groups_{0}".format(i) in data:
+                    self.dimless_problems[travel_angle] = (
+                        data["dimless_groups_{0}".format(i)],
+                        data["dimless_bounds_{0}".format(i)],
+                    )
+                elif file_dimless_problem is not None:
+                    self.dimless_problems[travel_angle] = file_dimless_problem
+        if self.dimless_problem is None and len(self.dimless_problems) > 0:
+            self.dimless_problem = next(iter(self.dimless_problems.values()))
+        log.debug(
+            " Loaded {0} warm starts from {1}".format(len(self.knots), self.filename)
+        )
+        return
+
+    def save(self):
+        os.makedirs(self.directory, exist_ok=True)
+        travel_angles = sorted(self.knots.keys())
+        arrays = {"angles": np.array(travel_angles)}
+        for i, travel_angle in enumerate(travel_angles):
+            sample_times, x_knots, u_knots = self.knots[travel_angle]
+            arrays["sample_times_{0}".format(i)] = sample_times
+            arrays["x_knots_{0}".format(i)] = x_knots
+            arrays["u_knots_{0}".format(i)] = u_knots
+            dimless_problem = self.dimless_problems.get(travel_angle)
+            if dimless_problem is not None:
+                arrays["dimless_groups_{0}".format(i)] = dimless_problem[0]
+                arrays["dimless_bounds_{0}".format(i)] = dimless_problem[1]
+
+        # Write to a temporary file first so that a crash while
+        # writing never destroys the library
+        tmp_filename = self.filename + ".tmp.npz"
+        np.savez(tmp_filename, **arrays)
+        os.replace(tmp_filename, self.filename)
+        return
+
+    def add(self, travel_angle, knots):
+        # The entry is stamped with the dimless problem of the glider and
+        # wind the library was opened with
+        self.knots[self._key(travel_angle)] = knots
+        self.dimless_problems[self._key(travel_angle)] = self.dimless_problem
+        return
+
+    def has_angle(self, travel_angle):
+        return self._key(travel_angle) in self.knots
+
+    def get_knots(self, travel_angle, max_angle_dist=45):
+        # Returns (knots, source) for the requested angle, or None if there
+        # is no stored angle within max_angle_dist. The nearest solutions
+        # on both sides are rotated to the requested angle and interpolated.
+        travel_angle = self._key(travel_angle)
+        angle_dists = {
+            angle: calc_angle_dist(travel_angle, angle) for angle in self.knots.keys()
+        }
+        angle_dists = {
+            angle: dist
+            for angle, dist in angle_dists.items()
+            if abs(dist) <= max_angle_dist
+        }
+        if len(angle_dists) == 0:
+            return None
+
+        nearest_angle = min(angle_dists, key=lambda angle: abs(angle_dists[angle]))
+        if abs(angle_dists[nearest_angle]) < 1e-6:
+            return self.knots[nearest_angle], "stored {0}".format(nearest_angle)
+
+        lower_angles = [angle for angle, dist in angle_dists.items() if dist < 0]
+        upper_angles = [angle for angle, dist in angle_dists.items() if dist > 0]
+        if len(lower_angles) == 0 or len(upper_angles) == 0:
+            knots = rotate_knots(self.knots[nearest_angle], -angle_dists[nearest_angle])
+            return knots, "rotated {0}".format(nearest_angle)
+
+        lower_angle = max(lower_angles, key=lambda angle: angle_dists[angle])
+        upper_angle = min(upper_angles, key=lambda angle: angle_dists[angle])
+        lower_dist = -angle_dists[lower_angle]
+        upper_dist = angle_dists[upper_angle]
+        knots = interpolate_knots(
+            rotate_knots(self.knots[lower_angle], lower_dist),
+            rotate_knots(self.knots[upper_angle], -upper_dist),
+            lower_dist / (lower_dist + upper_dist),
+        )
+        return knots, "interpolated {0} and {1}".format(lower_angle, upper_angle)
+
+    def is_same_dimless_solution(self, travel_angle, dimless_problem):
+        # True if the stored solution at travel_angle is also the
+        # solution of dimless_problem
+        knots = self.knots.get(self._key(travel_angle))
+        solved_dimless_problem = self.dimless_problems.get(self._key(travel_angle))
+        if knots is None or solved_dimless_problem is None:
+            return False
+        return is_same_dimless_solution(solved_dimless_problem, dimless_problem, knots)
+
+
+def find_similar_libraries(directory, zhukovskii_glider, max_residual=0.1):
+    # Returns [(residual, library)] for the libraries of other gliders whose
+    # dimless groups are within max_residual, the most similar first
+    if not os.path.isdir(directory):
+        return []
+    key = get_problem_key(zhukovskii_glider)
+    dimless_groups, _ = get_dimless_problem(zhukovskii_glider)
+
+    similar_libraries = []
+    for filename in sorted(os.listdir(directory)):
+        if not filename.endswith(".npz") or filename.endswith(".tmp.npz"):
+            continue
+        other_key = filename[: -len(".npz")]
+        if other_key == key:
+            continue
+        library = WarmStartLibrary(directory, key=other_key)
+        if library.dimless_problem is None:
+            continue
+        residual = calc_dimless_problem_residual(
+            dimless_groups, library.dimless_problem[0]
+        )
+        if residual <= max_residual:
+            similar_libraries.append((residual, library))
+    similar_libraries.sort(key=lambda similar_library: similar_library[0])
+    return similar_libraries